@@ -0,0 +1,326 @@
+"""
+Local stand-in for the Cloud Conformity API, used by the benchmarks.
+
+It implements every endpoint wrapped by CloudConformity with in-memory data, and can simulate
+network latency, large organisations and API throttling.
+"""
+
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REGIONS = [
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2", "ca-central-1", "sa-east-1", "eu-north-1", "eu-west-1",
+    "eu-west-2", "eu-west-3", "eu-central-1", "ap-south-1", "ap-northeast-1", "ap-northeast-2", "ap-southeast-1",
+    "ap-southeast-2"
+]
+CHANNELS = ["email", "sms", "slack", "pager-duty", "sns"]
+
+
+class MockCloudConformityServer:
+    """
+    Threaded HTTP server answering like the Cloud Conformity API.
+
+    Args:
+        accounts (int): Number of accounts in the organisation. (default 100)
+        profiles (int): Number of profiles in the organisation. (default 5)
+        rules_per_profile (int): Number of rule settings included in each profile. (default 100)
+        communication_settings_per_account (int): Number of account level communication settings. (default 1)
+        latency (float): Seconds added to every response. (default 0)
+        jitter (float): Random seconds, between 0 and this value, added to every response. (default 0)
+        max_requests_per_second (float): Requests above this rate are answered with 429 Too Many Requests.
+                                         Set it to None to never throttle. (default None)
+        host (str): Interface to listen on. (default "127.0.0.1")
+        port (int): Port to listen on, 0 for any free port. (default 0)
+    """
+
+    def __init__(self, accounts=100, profiles=5, rules_per_profile=100, communication_settings_per_account=1, latency=0, jitter=0, max_requests_per_second=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.max_requests_per_second = max_requests_per_second
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.accounts = {}
+        self.settings = {}
+        self.profiles = {}
+        self.report_configs = {}
+        self.__window = []
+
+        for i in range(accounts):
+            self.add_account("account-{}".format(i), "alias-{}".format(i), "production" if i % 2 else "staging", "{:012d}".format(100000000000 + i))
+
+        for i in range(profiles):
+            profile_id = "profile-{}".format(i)
+            self.profiles[profile_id] = {
+                "type": "profiles",
+                "id": profile_id,
+                "attributes": {"name": "Profile {}".format(i), "description": "Benchmark profile"},
+                "relationships": {
+                    "ruleSettings": {"data": [{"type": "rules", "id": "RULE-{:03d}".format(r)} for r in range(rules_per_profile)]}
+                }
+            }
+            self.profiles[profile_id]["included"] = [
+                {
+                    "type": "rules",
+                    "id": "RULE-{:03d}".format(r),
+                    "attributes": {
+                        "enabled": True,
+                        "riskLevel": "HIGH",
+                        "provider": "aws",
+                        "extraSettings": [{"name": "threshold", "type": "ttl", "value": r}]
+                    }
+                } for r in range(rules_per_profile)
+            ]
+
+        for i, account_id in enumerate(list(self.accounts)):
+            for c in range(communication_settings_per_account):
+                self.add_setting("setting-{}-{}".format(i, c), CHANNELS[(i + c) % len(CHANNELS)], account_id)
+
+        for c, channel in enumerate(CHANNELS):
+            self.add_setting("setting-organisation-{}".format(c), channel, None)
+
+        self.server = ThreadingHTTPServer((host, port), self.__handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return("http://{}:{}".format(host, port))
+
+    def add_account(self, account_id, name, environment, aws_account_id):
+        self.accounts[account_id] = {
+            "type": "accounts",
+            "id": account_id,
+            "attributes": {
+                "name": name,
+                "environment": environment,
+                "tags": [environment, "abc"],
+                "access": {"keys": {"roleArn": "arn:aws:iam::{}:role/CloudConformity".format(aws_account_id)}},
+                "cloud-type": "aws",
+                "settings": {"bot": {"disabled": False, "delay": 1, "disabledRegions": {}}}
+            }
+        }
+        return(self.accounts[account_id])
+
+    def add_setting(self, setting_id, channel, account_id):
+        self.settings[setting_id] = {
+            "type": "settings",
+            "id": setting_id,
+            "attributes": {"type": "communication", "channel": channel, "enabled": True, "configuration": {"key": "value"}},
+            "relationships": {
+                "organisation": {"data": {"type": "organisations", "id": "organisation"}},
+                "account": {"data": {"type": "accounts", "id": account_id} if account_id else None}
+            }
+        }
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+
+        Returns:
+            MockCloudConformityServer: self
+        """
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return(self)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return(self.start())
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def is_throttled(self):
+        """
+        Count a request and decide whether it exceeds max_requests_per_second.
+        """
+
+        with self.lock:
+            self.requests += 1
+
+            if self.max_requests_per_second is None:
+                return(False)
+
+            now = time.monotonic()
+            self.__window = [t for t in self.__window if now - t < 1.0]
+            if len(self.__window) >= self.max_requests_per_second:
+                self.throttled += 1
+                return(True)
+
+            self.__window.append(now)
+            return(False)
+
+    def route(self, method, path, query, body):
+        """
+        Answer one API call.
+
+        Returns:
+            tuple: Status code and JSON-serialisable body.
+        """
+
+        parts = [p for p in path.split("/") if p][1:]
+
+        if parts == ["organisation", "external-id"] and method == "GET":
+            return(200, {"data": {"type": "external-ids", "id": "external-id-0000"}})
+
+        if parts == ["accounts"]:
+            if method == "GET":
+                return(200, {"data": list(self.accounts.values())})
+            if method == "POST":
+                attributes = body["data"]["attributes"]
+                account_id = "account-{}".format(len(self.accounts) + random.randint(10 ** 6, 10 ** 7))
+                account = self.add_account(
+                    account_id, attributes["name"], attributes["environment"],
+                    attributes["access"]["keys"]["roleArn"].split(":")[4]
+                )
+                return(200, {"data": account})
+
+        if len(parts) == 2 and parts[0] == "accounts":
+            account = self.accounts.get(parts[1])
+            if account is None:
+                return(404, {"errors": [{"status": 404, "detail": "Account not found"}]})
+            if method == "PATCH":
+                account["attributes"].update(body["data"]["attributes"])
+                return(200, {"data": account})
+            if method == "DELETE":
+                del self.accounts[parts[1]]
+                return(200, {"meta": {"status": "sent"}})
+
+        if len(parts) == 4 and parts[0] == "accounts" and parts[2:] == ["settings", "bot"] and method == "PATCH":
+            account = self.accounts.get(parts[1])
+            if account is None:
+                return(404, {"errors": [{"status": 404, "detail": "Account not found"}]})
+            account["attributes"]["settings"]["bot"].update(body["data"]["attributes"]["settings"]["bot"])
+            return(200, {"data": account})
+
+        if parts == ["settings", "communication"] and method == "GET":
+            settings = list(self.settings.values())
+            account_id = query.get("accountId", [None])[0]
+            if account_id is not None:
+                include_parents = query.get("includeParents", ["false"])[0] == "true"
+                settings = [
+                    s for s in settings
+                    if (s["relationships"]["account"]["data"] or {}).get("id") == account_id
+                    or (include_parents and s["relationships"]["account"]["data"] is None)
+                ]
+            return(200, {"data": settings})
+
+        if len(parts) == 2 and parts[0] == "settings" and method == "DELETE":
+            if self.settings.pop(parts[1], None) is None:
+                return(404, {"errors": [{"status": 404, "detail": "Setting not found"}]})
+            return(200, {"meta": {"status": "deleted"}})
+
+        if parts == ["profiles"] and method == "GET":
+            return(200, {"data": [
+                {"type": p["type"], "id": p["id"], "attributes": p["attributes"]} for p in self.profiles.values()
+            ]})
+
+        if len(parts) == 2 and parts[0] == "profiles" and method == "GET":
+            profile = self.profiles.get(parts[1])
+            if profile is None:
+                return(404, {"errors": [{"status": 404, "detail": "Profile not found"}]})
+            return(200, {
+                "data": {k: v for k, v in profile.items() if k != "included"},
+                "included": profile["included"]
+            })
+
+        if len(parts) == 3 and parts[0] == "profiles" and parts[2] == "apply" and method == "POST":
+            if parts[1] not in self.profiles:
+                return(404, {"errors": [{"status": 404, "detail": "Profile not found"}]})
+            return(200, {"meta": {"status": "sent", "message": "Profile will be applied to the accounts in background"}})
+
+        if parts == ["report-configs"] and method == "POST":
+            report_config_id = "report-config-{}".format(len(self.report_configs))
+            self.report_configs[report_config_id] = {"type": "report-config", "id": report_config_id, "attributes": body["data"]["attributes"]}
+            return(200, {"data": [self.report_configs[report_config_id]]})
+
+        return(404, {"errors": [{"status": 404, "detail": "Not found"}]})
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle_any(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if raw and self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+
+                if server.latency or server.jitter:
+                    time.sleep(server.latency + random.uniform(0, server.jitter))
+
+                if server.is_throttled():
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                url = urlparse(self.path)
+                with server.lock:
+                    status, body = server.route(self.command, url.path, parse_qs(url.query), json.loads(raw) if raw else None)
+                    content = json.dumps(body).encode("utf-8")
+
+                etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+                if self.command == "GET" and status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/vnd.api+json")
+                if len(content) >= 1024 and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    content = gzip.compress(content, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(content)))
+                if self.command == "GET":
+                    self.send_header("ETag", etag)
+                if self.close_connection:
+                    # Announce the close like a real server, so pooled clients do not reuse the connection.
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = handle_any
+
+        return(Handler)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local mock Cloud Conformity API.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--max-requests-per-second", type=float, default=None)
+    args = parser.parse_args()
+
+    with MockCloudConformityServer(accounts=args.accounts, latency=args.latency, max_requests_per_second=args.max_requests_per_second, port=args.port) as mock:
+        print("Serving on {}".format(mock.url))
+        try:
+            mock.thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,303 @@
+"""
+Benchmarks of CloudConformity against a local mock Cloud Conformity API.
+
+Every public method is measured in calls per second, p50/p99 latency and peak memory,
+as well as the bulk pattern of samples/set_bot_settings.py in its serial, pooled, concurrent and asyncio variants,
+the import time of the package and the client-side CPU time of a call with each JSON codec.
+
+Usage:
+    python benchmarks/run_benchmarks.py --accounts 5000 --latency 0.02 --iterations 50
+    python benchmarks/run_benchmarks.py --json > bench_output.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cloud_conformity import CloudConformity  # noqa: E402
+from cloud_conformity.codec import JSONCodec, OrjsonCodec  # noqa: E402
+from mock_server import MockCloudConformityServer, REGIONS  # noqa: E402
+
+DISABLED_REGIONS = REGIONS[2:]
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+
+    values = sorted(values)
+    if not values:
+        return(0.0)
+
+    return(values[min(len(values) - 1, max(0, int(round(percent / 100.0 * len(values) + 0.5)) - 1))])
+
+
+def measure(name, function, iterations, calls_per_iteration=1):
+    """
+    Run a function several times and summarise its performance.
+
+    Args:
+        name (str): Name of the benchmark.
+        function (callable): Function to benchmark, called without arguments.
+        iterations (int): Number of times the function is called.
+        calls_per_iteration (int): Number of API calls made by one call of the function. (default 1)
+
+    Returns:
+        dict: {"name", "iterations", "calls_per_second", "p50", "p99", "peak_memory"}. Latencies are in milliseconds per iteration.
+    """
+
+    function()
+
+    latencies = []
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - call_start)
+
+    elapsed = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return({
+        "name": name,
+        "iterations": iterations,
+        "calls_per_second": iterations * calls_per_iteration / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "peak_memory": peak_memory
+    })
+
+
+def public_method_benchmarks(url, iterations):
+    """
+    Benchmark every public method of CloudConformity, one call at a time, through the pooled session.
+    """
+
+    results = []
+
+    with CloudConformity(api_key="benchmark", api_endpoint=url) as cc:
+        account_ids = [a["id"] for a in cc.list_accounts()["data"]]
+        profile_id = cc.list_profiles()["data"][0]["id"]
+        account_id = account_ids[0]
+
+        counter = {"n": 0}
+
+        def create_and_delete_account():
+            counter["n"] += 1
+            created = cc.create_account(100000000000 + counter["n"], "benchmark-{}".format(counter["n"]), "testing", "external-id")
+            cc.delete_account(created["data"]["id"])
+
+        benchmarks = [
+            ("get_organisation_external_id", cc.get_organisation_external_id, 1),
+            ("list_accounts", cc.list_accounts, 1),
+            ("list_accounts (filtered)", lambda: cc.list_accounts(aws_account_names=["alias-1", "alias-2"]), 1),
+            ("update_account", lambda: cc.update_account(account_id, "alias-0", "production", "abc"), 1),
+            ("create_account + delete_account", create_and_delete_account, 2),
+            ("list_communication_settings", lambda: cc.list_communication_settings(channel="email"), 1),
+            ("list_profiles", cc.list_profiles, 1),
+            ("get_profile", lambda: cc.get_profile(profile_id), 1),
+            ("apply_profile_to_accounts", lambda: cc.apply_profile_to_accounts(profile_id, account_ids[:10]), 1),
+            ("create_report_configuration", lambda: cc.create_report_configuration(account_id, "alias-0", ["a@example.com"]), 1),
+            ("update_account_bot_settings", lambda: cc.update_account_bot_settings(account_id, disabled_regions=DISABLED_REGIONS), 1),
+        ]
+
+        for name, function, calls in benchmarks:
+            results.append(measure(name, function, iterations, calls))
+
+    return(results)
+
+
+def set_bot_settings_benchmarks(url, accounts, workers, iterations):
+    """
+    Benchmark the samples/set_bot_settings.py pattern: resolve account IDs, then update the bot settings of every account.
+    """
+
+    results = []
+    names = ["alias-{}".format(i) for i in range(accounts)]
+
+    def serial(cc):
+        account_ids = [x["id"] for x in cc.list_accounts(aws_account_names=names)["data"]]
+        for account_id in account_ids:
+            cc.update_account_bot_settings(account_id=account_id, scan_interval_hour=6, disabled_regions=DISABLED_REGIONS)
+
+    def bulk(cc):
+        account_ids = [x["id"] for x in cc.list_accounts(aws_account_names=names)["data"]]
+        cc.bulk_update_account_bot_settings(account_ids, scan_interval_hour=6, disabled_regions=DISABLED_REGIONS, max_workers=workers)
+
+    with CloudConformity(api_key="benchmark", api_endpoint=url, keep_alive=False) as cc:
+        results.append(measure("set_bot_settings: serial, no keep-alive", lambda: serial(cc), iterations, accounts + 1))
+
+    with CloudConformity(api_key="benchmark", api_endpoint=url) as cc:
+        results.append(measure("set_bot_settings: serial, pooled", lambda: serial(cc), iterations, accounts + 1))
+
+    with CloudConformity(api_key="benchmark", api_endpoint=url, pool_maxsize=workers) as cc:
+        results.append(measure("set_bot_settings: bulk, {} threads".format(workers), lambda: bulk(cc), iterations, accounts + 1))
+
+    try:
+        from cloud_conformity import HTTP2Transport
+
+        with CloudConformity(api_key="benchmark", api_endpoint=url, transport=HTTP2Transport(max_connections=workers)) as cc:
+            results.append(measure("set_bot_settings: bulk, httpx transport", lambda: bulk(cc), iterations, accounts + 1))
+    except ImportError:
+        pass
+
+    try:
+        from cloud_conformity import AsyncCloudConformity
+
+        async def run_async():
+            async with AsyncCloudConformity(api_key="benchmark", api_endpoint=url, concurrency=workers) as acc:
+                account_ids = [x["id"] for x in (await acc.list_accounts(aws_account_names=names))["data"]]
+                await acc.gather(*[
+                    acc.update_account_bot_settings(account_id, scan_interval_hour=6, disabled_regions=DISABLED_REGIONS)
+                    for account_id in account_ids
+                ])
+
+        results.append(measure("set_bot_settings: asyncio, {} in flight".format(workers), lambda: asyncio.run(run_async()), iterations, accounts + 1))
+    except ImportError:
+        pass
+
+    return(results)
+
+
+def import_benchmarks(repeat):
+    """
+    Benchmark the import time of the package, each import running in a fresh interpreter.
+
+    Returns:
+        list: [{"name", "repeat", "best", "median"}]. Times are in milliseconds.
+    """
+
+    results = []
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+    for statement in ("import cloud_conformity", "from cloud_conformity import CloudConformity", "from cloud_conformity import AsyncCloudConformity"):
+        code = "import time; start = time.perf_counter(); {}; print(time.perf_counter() - start)".format(statement)
+        timings = []
+
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, "-c", code], cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False).stdout
+            if output.strip():
+                timings.append(float(output) * 1000)
+
+        if timings:
+            results.append({"name": statement, "repeat": len(timings), "best": min(timings), "median": percentile(timings, 50)})
+
+    return(results)
+
+
+def cpu_benchmarks(url, iterations):
+    """
+    Benchmark the CPU time spent by the calling thread per call, i.e. building, serialising and parsing
+    the bodies and going through the transport, with each available JSON codec. The mock API runs on other threads.
+
+    Returns:
+        list: [{"name", "codec", "iterations", "cpu"}]. CPU times are in microseconds per call.
+    """
+
+    results = []
+    codecs = [JSONCodec()]
+
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        pass
+
+    for codec in codecs:
+        with CloudConformity(api_key="benchmark", api_endpoint=url, codec=codec, single_flight=False) as cc:
+            account_id = cc.list_accounts()["data"][0]["id"]
+
+            benchmarks = [
+                ("list_accounts", cc.list_accounts),
+                ("create_report_configuration", lambda: cc.create_report_configuration(account_id, "alias-0", ["a@example.com"])),
+                ("update_account_bot_settings", lambda: cc.update_account_bot_settings(account_id, scan_interval_hour=6, disabled_regions=DISABLED_REGIONS)),
+            ]
+
+            for name, function in benchmarks:
+                function()
+                start = time.thread_time()
+                for _ in range(iterations):
+                    function()
+                results.append({"name": name, "codec": codec.name, "iterations": iterations, "cpu": (time.thread_time() - start) / iterations * 1e6})
+
+    return(results)
+
+
+def print_table(title, results):
+    print(title)
+    print("{:<45} {:>10} {:>12} {:>10} {:>10} {:>12}".format("benchmark", "iterations", "calls/s", "p50 ms", "p99 ms", "peak KiB"))
+    for r in results:
+        print("{:<45} {:>10} {:>12.1f} {:>10.2f} {:>10.2f} {:>12.1f}".format(
+            r["name"], r["iterations"], r["calls_per_second"], r["p50"], r["p99"], r["peak_memory"] / 1024.0
+        ))
+    print("")
+
+
+def print_import_table(results):
+    print("Import time")
+    print("{:<55} {:>10} {:>10} {:>10}".format("statement", "repeat", "best ms", "median ms"))
+    for r in results:
+        print("{:<55} {:>10} {:>10.1f} {:>10.1f}".format(r["name"], r["repeat"], r["best"], r["median"]))
+    print("")
+
+
+def print_cpu_table(results):
+    print("Client CPU time per call")
+    print("{:<45} {:>10} {:>10} {:>12}".format("benchmark", "codec", "iterations", "cpu us/call"))
+    for r in results:
+        print("{:<45} {:>10} {:>10} {:>12.1f}".format(r["name"], r["codec"], r["iterations"], r["cpu"]))
+    print("")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CloudConformity against a local mock API.")
+    parser.add_argument("--accounts", type=int, default=1000, help="Number of accounts of the mock organisation.")
+    parser.add_argument("--rules-per-profile", type=int, default=100, help="Number of rule settings of each mock profile.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added by the mock API to every response.")
+    parser.add_argument("--max-requests-per-second", type=float, default=None, help="Throttle the mock API with 429 above this rate.")
+    parser.add_argument("--iterations", type=int, default=20, help="Iterations of each public method benchmark.")
+    parser.add_argument("--bulk-accounts", type=int, default=100, help="Accounts updated by the set_bot_settings benchmarks.")
+    parser.add_argument("--bulk-iterations", type=int, default=3, help="Iterations of the set_bot_settings benchmarks.")
+    parser.add_argument("--workers", type=int, default=20, help="Threads or in-flight requests of the concurrent benchmarks.")
+    parser.add_argument("--import-repeat", type=int, default=10, help="Interpreters started by the import time benchmarks.")
+    parser.add_argument("--cpu-iterations", type=int, default=200, help="Calls of each CPU time benchmark.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    with MockCloudConformityServer(
+        accounts=args.accounts,
+        rules_per_profile=args.rules_per_profile,
+        latency=args.latency,
+        max_requests_per_second=args.max_requests_per_second
+    ) as mock:
+        results = {
+            "public_methods": public_method_benchmarks(mock.url, args.iterations),
+            "set_bot_settings": set_bot_settings_benchmarks(mock.url, min(args.bulk_accounts, args.accounts), args.workers, args.bulk_iterations),
+            "cpu": cpu_benchmarks(mock.url, args.cpu_iterations),
+            "server": {"requests": mock.requests, "throttled": mock.throttled}
+        }
+
+    results["import"] = import_benchmarks(args.import_repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table("Public methods", results["public_methods"])
+        print_table("set_bot_settings pattern", results["set_bot_settings"])
+        print_cpu_table(results["cpu"])
+        print_import_table(results["import"])
+        print("Mock API served {requests} requests, throttled {throttled}".format(**results["server"]))
+
+
+if __name__ == "__main__":
+    main()
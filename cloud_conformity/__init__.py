@@ -1 +1,61 @@
-from .cloud_conformity import CloudConformity
+"""
+Python library to interact with Cloud Conformity API.
+
+The classes below are imported on first use rather than with the package, so `import cloud_conformity` stays cheap
+and only the modules actually used (requests, aiohttp, httpx, sqlite3...) are loaded.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "CloudConformity": ".cloud_conformity",
+    "AsyncCloudConformity": ".async_cloud_conformity",
+    "AccountIndex": ".account_index",
+    "HTTPCache": ".http_cache",
+    "RetryPolicy": ".retry",
+    "RateLimiter": ".retry",
+    "Instrumentation": ".instrumentation",
+    "plan_reconciliation": ".reconcile",
+    "WriteBuffer": ".write_buffer",
+    "CommunicationSettingsIndex": ".communication_index",
+    "Account": ".models",
+    "CommunicationSetting": ".models",
+    "Profile": ".models",
+    "ReportConfig": ".models",
+    "DiskCache": ".disk_cache",
+    "SingleFlight": ".single_flight",
+    "MultiRegionCloudConformity": ".multi_region",
+    "Transport": ".transport",
+    "RequestsTransport": ".transport",
+    "HTTP2Transport": ".transport",
+    "Deadline": ".deadline",
+    "DeadlineExceeded": ".deadline",
+    "ClientPool": ".client_pool",
+    "FairScheduler": ".client_pool",
+    "Watcher": ".watch",
+    "JSONCodec": ".codec",
+    "OrjsonCodec": ".codec",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    else:
+        # Submodules, e.g. cloud_conformity.payloads, were attributes of the package when it imported them eagerly.
+        try:
+            value = importlib.import_module("." + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != "{}.{}".format(__name__, name):
+                raise
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name)) from None
+
+    globals()[name] = value
+
+    return(value)
+
+
+def __dir__():
+    return(sorted(list(globals()) + __all__))
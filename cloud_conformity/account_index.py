@@ -0,0 +1,224 @@
+import threading
+import time
+
+
+class AccountIndex:
+    """
+    In-memory index of the organisation's accounts.
+
+    The accounts are fetched once and kept for `ttl` seconds. Lookups by name, Cloud Conformity ID,
+    AWS account ID and environment are dictionary lookups. The index is safe to share between threads.
+
+    CloudConformity keeps its index consistent with create_account, update_account and delete_account,
+    so it only needs to be invalidated when accounts are changed by someone else.
+
+    Args:
+        fetch (callable): Function returning the list of account records, e.g. lambda: cc.list_accounts()["data"].
+        ttl (float): Number of seconds the fetched accounts are kept before being fetched again.
+                     Set it to None to keep them until invalidate() is called. (default 300)
+    """
+
+    def __init__(self, fetch, ttl=300):
+        self.ttl = ttl
+        self.__fetch = fetch
+        self.__lock = threading.RLock()
+        self.__loaded_at = None
+        self.__by_id = {}
+        self.__by_name = {}
+        self.__by_aws_account_id = {}
+        self.__by_environment = {}
+
+    @staticmethod
+    def aws_account_id(account):
+        """
+        Get the AWS account ID of an account record, parsed from its role ARN.
+
+        Args:
+            account (dict): An account record of the List Accounts API.
+
+        Returns:
+            str: The 12-digit AWS account ID, or None when the account has no role ARN.
+        """
+
+        try:
+            role_arn = account["attributes"]["access"]["keys"]["roleArn"]
+        except (KeyError, TypeError):
+            return(None)
+
+        parts = role_arn.split(":")
+
+        return(parts[4].zfill(12) if len(parts) > 4 and parts[4] else None)
+
+    def __is_fresh(self):
+        """
+        Helper method to check whether the loaded accounts can still be used.
+
+        Returns:
+            bool: True when the accounts are loaded and not older than the TTL.
+        """
+
+        if self.__loaded_at is None:
+            return(False)
+
+        return(self.ttl is None or time.monotonic() - self.__loaded_at < self.ttl)
+
+    def __add(self, account):
+        """
+        Helper method to add one account record to every lookup table.
+        """
+
+        self.__by_id[account["id"]] = account
+        self.__by_name[account["attributes"]["name"]] = account
+        self.__by_environment.setdefault(account["attributes"].get("environment"), {})[account["id"]] = account
+
+        aws_account_id = self.aws_account_id(account)
+        if aws_account_id is not None:
+            self.__by_aws_account_id[aws_account_id] = account
+
+    def __remove(self, account_id):
+        """
+        Helper method to remove one account record from every lookup table.
+        """
+
+        account = self.__by_id.pop(account_id, None)
+        if account is None:
+            return
+
+        if self.__by_name.get(account["attributes"]["name"]) is account:
+            del self.__by_name[account["attributes"]["name"]]
+
+        self.__by_environment.get(account["attributes"].get("environment"), {}).pop(account_id, None)
+
+        aws_account_id = self.aws_account_id(account)
+        if self.__by_aws_account_id.get(aws_account_id) is account:
+            del self.__by_aws_account_id[aws_account_id]
+
+    def __ensure_fresh(self):
+        """
+        Helper method to (re)load the accounts when they are missing or expired.
+        """
+
+        with self.__lock:
+            if not self.__is_fresh():
+                self.refresh()
+
+    def refresh(self):
+        """
+        Fetch the accounts now and rebuild the index.
+        """
+
+        accounts = self.__fetch()
+
+        with self.__lock:
+            self.__by_id = {}
+            self.__by_name = {}
+            self.__by_aws_account_id = {}
+            self.__by_environment = {}
+
+            for account in accounts:
+                self.__add(account)
+
+            self.__loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Drop the loaded accounts, so the next lookup fetches them again.
+        """
+
+        with self.__lock:
+            self.__loaded_at = None
+
+    def upsert(self, account):
+        """
+        Add an account record to the index or replace the existing record with the same ID.
+
+        Nothing is done when the index is not loaded, because the next lookup fetches every account anyway.
+
+        Args:
+            account (dict): An account record, e.g. the "data" of the Create Account API response.
+        """
+
+        with self.__lock:
+            if self.__loaded_at is None:
+                return
+
+            self.__remove(account["id"])
+            self.__add(account)
+
+    def remove(self, account_id):
+        """
+        Remove an account from the index.
+
+        Args:
+            account_id (str): Cloud Conformity ID of the account.
+        """
+
+        with self.__lock:
+            self.__remove(account_id)
+
+    def by_id(self, account_id):
+        """
+        Args:
+            account_id (str): Cloud Conformity ID of the account.
+
+        Returns:
+            dict: The account record, or None when there is no such account.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(self.__by_id.get(account_id))
+
+    def by_name(self, aws_account_name):
+        """
+        Args:
+            aws_account_name (str): The name of the account in the Cloud Conformity.
+
+        Returns:
+            dict: The account record, or None when there is no such account.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(self.__by_name.get(aws_account_name))
+
+    def by_aws_account_id(self, aws_account_id):
+        """
+        Args:
+            aws_account_id (str or int): The 12-digit AWS account ID.
+
+        Returns:
+            dict: The account record, or None when there is no such account.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(self.__by_aws_account_id.get(str(aws_account_id).zfill(12)))
+
+    def by_environment(self, aws_tag_environment):
+        """
+        Args:
+            aws_tag_environment (str): The name of the environment, e.g. production.
+
+        Returns:
+            list: The account records of the environment.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(list(self.__by_environment.get(aws_tag_environment, {}).values()))
+
+    def accounts(self):
+        """
+        Returns:
+            list: Every account record in the index.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(list(self.__by_id.values()))
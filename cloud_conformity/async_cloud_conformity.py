@@ -0,0 +1,386 @@
+import asyncio
+
+import requests
+
+from requests.structures import CaseInsensitiveDict
+
+from . import payloads
+from .codec import default_codec
+from .retry import RetryPolicy, THROTTLING_STATUS_CODES
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncCloudConformity:
+    """
+    Asynchronous Cloud Conformity API Client.
+
+    The asyncio counterpart of CloudConformity. It covers the same endpoints, builds the same payloads
+    and raises the same requests.exceptions.HTTPError on error status codes, but every method is a coroutine
+    sent through one aiohttp.ClientSession, so a single event loop can keep many requests in flight.
+    Use gather() to run many calls with bounded concurrency.
+
+    The aiohttp package is required: pip install cloud-conformity[async]
+
+    Args:
+        api_key (str): A secure 64-bit strong key randomly generated by Cloud Conformity on behalf of a user.
+        api_endpoint (str): One of the Cloud Conformity API endpoints. (default "https://eu-west-1-api.cloudconformity.com")
+        concurrency (int): Default maximum number of requests gather() keeps in flight. (default 20)
+        pool_maxsize (int): Maximum number of connections kept open to the API endpoint. (default 100)
+        timeout (float): Total timeout in seconds applied to every request. (default None)
+        retry_policy (bool or RetryPolicy): See CloudConformity. (default False)
+        rate_limiter (RateLimiter): See CloudConformity. (default None)
+        codec (JSONCodec): See CloudConformity. (default orjson when installed, json otherwise)
+    """
+
+    def __init__(self, api_key, api_endpoint="https://eu-west-1-api.cloudconformity.com", concurrency=20, pool_maxsize=100, timeout=None, retry_policy=False, rate_limiter=None, codec=None):
+        if aiohttp is None:
+            raise ImportError("AsyncCloudConformity requires aiohttp: pip install cloud-conformity[async]")
+
+        self.api_endpoint = api_endpoint
+        self.concurrency = concurrency
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.codec = codec or default_codec()
+        self.retry_policy = RetryPolicy() if retry_policy is True else (retry_policy or None)
+        self.rate_limiter = rate_limiter
+        self.headers = {
+            "Content-Type": "application/vnd.api+json",
+            "Authorization": "ApiKey {api_key}".format(api_key=api_key)
+        }
+        self.session = None
+        self.__profile_metadata = {}
+
+    async def __aenter__(self):
+        return(self)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the underlying session and every pooled connection.
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def __get_session(self):
+        """
+        Helper method to create the aiohttp session on first use, inside the running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The session shared by every call of this client.
+        """
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+        return(self.session)
+
+    async def __request(self, method, endpoint, payload=None, data=None):
+        """
+        Helper method to send a request and process its response.
+
+        Args:
+            method (str): HTTP method, e.g. "GET" or "PATCH".
+            endpoint (str): Resource endpoint defined on Cloud Conformity documentation.
+            payload (dict): Request body, serialised to JSON when provided. (default None)
+            data (str or bytes): Request body already serialised to JSON. Used instead of payload. (default None)
+
+        Returns:
+            dict: Response of the API
+
+        Raises:
+            requests.exceptions.HTTPError: If the status code is one CloudConformity treats as an error.
+        """
+
+        url = "{api_endpoint}{resource_endpoint}".format(
+            api_endpoint=self.api_endpoint,
+            resource_endpoint=endpoint
+        )
+        attempt = 0
+
+        if data is None and payload is not None:
+            data = self.codec.dumps(payload)
+
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            try:
+                async with self.__get_session().request(method, url, data=data) as response:
+                    if self.rate_limiter is not None:
+                        if response.status in THROTTLING_STATUS_CODES:
+                            self.rate_limiter.on_throttle()
+                        else:
+                            self.rate_limiter.on_success()
+
+                    if self.retry_policy is not None and self.retry_policy.should_retry_status(method, response.status, attempt):
+                        attempt += 1
+                        delay = self.retry_policy.backoff(attempt, response.headers.get("Retry-After"))
+                    else:
+                        message = payloads.status_message(response.status)
+
+                        if message:
+                            raise requests.exceptions.HTTPError(message, response=await self.__requests_response(response))
+
+                        return(self.codec.loads(await response.read()))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if self.retry_policy is None or not self.retry_policy.should_retry_error(method, attempt):
+                    raise
+                attempt += 1
+                delay = self.retry_policy.backoff(attempt)
+
+            await asyncio.sleep(delay)
+
+    async def __requests_response(self, response):
+        """
+        Helper method to copy an aiohttp response into a requests.Response, read before the aiohttp one is released,
+        so the HTTPError raised is the same as the one of CloudConformity.
+
+        Args:
+            response (aiohttp.ClientResponse): The response of the API.
+
+        Returns:
+            requests.Response: The same status, headers, URL and body.
+        """
+
+        copy = requests.Response()
+        copy.status_code = response.status
+        copy.reason = response.reason
+        copy.headers = CaseInsensitiveDict(response.headers.items())
+        copy.url = str(response.url)
+        copy.encoding = response.get_encoding() if response.charset else None
+        copy._content = await response.read()
+
+        return(copy)
+
+    async def gather(self, *coroutines, concurrency=None, return_exceptions=False):
+        """
+        Run coroutines concurrently, keeping at most `concurrency` of them in flight.
+
+        Args:
+            coroutines (coroutine): Calls of this client, e.g. cc.update_account_bot_settings(account_id).
+            concurrency (int): Maximum number of coroutines running at the same time. (default self.concurrency)
+            return_exceptions (bool): True to return exceptions in place of the results instead of raising the first one. (default False)
+
+        Returns:
+            list: Results in the same order as the coroutines.
+        """
+
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def bounded(coroutine):
+            async with semaphore:
+                return(await coroutine)
+
+        return(await asyncio.gather(
+            *[bounded(coroutine) for coroutine in coroutines],
+            return_exceptions=return_exceptions
+        ))
+
+    async def get_organisation_external_id(self):
+        """
+        Get the organisation's external ID.
+
+        See CloudConformity.get_organisation_external_id.
+        """
+
+        return(await self.__request("GET", "/v1/organisation/external-id"))
+
+    async def create_account(self, aws_account_id, aws_account_name, aws_tag_environment, external_id, cost_package=False, subscriptionType="advanced"):
+        """
+        Create a new account to Cloud Conformity organisation.
+
+        See CloudConformity.create_account.
+        """
+
+        payload = payloads.create_account_payload(
+            aws_account_id=aws_account_id,
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            external_id=external_id,
+            cost_package=cost_package,
+            subscriptionType=subscriptionType
+        )
+
+        return(await self.__request("POST", "/v1/accounts", payload=payload))
+
+    async def delete_account(self, account_id):
+        """
+        Delete existing account.
+
+        See CloudConformity.delete_account.
+        """
+
+        return(await self.__request("DELETE", "/v1/accounts/{}".format(account_id)))
+
+    async def update_account(self, account_id, aws_account_name, aws_tag_environment, aws_tag_product_domain):
+        """
+        Update the account name, environment, and code.
+
+        See CloudConformity.update_account.
+        """
+
+        payload = payloads.update_account_payload(
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            aws_tag_product_domain=aws_tag_product_domain
+        )
+
+        return(await self.__request("PATCH", "/v1/accounts/{}".format(account_id), payload=payload))
+
+    async def list_accounts(self, aws_account_names=[]):
+        """
+        Query all accounts that you have access to
+
+        See CloudConformity.list_accounts.
+        """
+
+        response = await self.__request("GET", "/v1/accounts")
+
+        return(payloads.filter_accounts(response, aws_account_names))
+
+    async def list_communication_settings(self, channel=None, account_id=None, include_parents=False):
+        """
+        List communication settings.
+
+        See CloudConformity.list_communication_settings.
+        """
+
+        endpoint = payloads.communication_settings_endpoint(
+            channel=channel,
+            account_id=account_id,
+            include_parents=include_parents
+        )
+
+        response = await self.__request("GET", endpoint)
+
+        return(payloads.filter_communication_settings(response, channel))
+
+    async def delete_communication_setting(self, setting_id):
+        """
+        Delete a communication setting.
+
+        See CloudConformity.delete_communication_setting.
+        """
+
+        return(await self.__request("DELETE", "/v1/settings/{}".format(setting_id)))
+
+    async def list_profiles(self):
+        """
+        List profiles associated to the organisation.
+
+        See CloudConformity.list_profiles.
+        """
+
+        response = await self.__request("GET", "/v1/profiles")
+
+        for profile in response.get("data", []):
+            self.__remember_profile(profile)
+
+        return(response)
+
+    async def get_profile(self, profile_id):
+        """
+        Get a profile associated to organisation.
+
+        See CloudConformity.get_profile.
+        """
+
+        response = await self.__request("GET", "/v1/profiles/{}".format(profile_id))
+
+        self.__remember_profile(response.get("data"))
+
+        return(response)
+
+    def __remember_profile(self, profile):
+        """
+        Helper method to keep the metadata of a profile, without its rule settings.
+        """
+
+        if isinstance(profile, dict) and "id" in profile:
+            metadata = self.__profile_metadata[profile["id"]] = {
+                "type": profile.get("type"),
+                "id": profile["id"],
+                "attributes": dict(profile.get("attributes", {}))
+            }
+            return(metadata)
+
+        return(None)
+
+    async def get_profile_metadata(self, profile_id):
+        """
+        Get the metadata (name, description, ...) of a profile, without its rule settings.
+
+        See CloudConformity.get_profile_metadata.
+        """
+
+        metadata = self.__profile_metadata.get(profile_id)
+
+        if metadata is None:
+            metadata = self.__remember_profile((await self.get_profile(profile_id=profile_id)).get("data"))
+
+        return(metadata)
+
+    async def apply_profile_to_accounts(self, profile_id, account_ids, mode="replace"):
+        """
+        Apply profile to a set of accounts under the organisation.
+
+        See CloudConformity.apply_profile_to_accounts.
+        """
+
+        profile_name = (await self.get_profile_metadata(
+            profile_id=profile_id
+        ))["attributes"]["name"]
+
+        payload = payloads.apply_profile_payload(
+            profile_name=profile_name,
+            account_ids=account_ids,
+            mode=mode
+        )
+
+        return(await self.__request("POST", "/v1/profiles/{}/apply".format(profile_id), payload=payload))
+
+    async def create_report_configuration(self, account_id, aws_account_name, recipient_email_addresses):
+        """
+        Create a new report config for an account.
+
+        See CloudConformity.create_report_configuration.
+        """
+
+        data = payloads.REPORT_CONFIGURATION_TEMPLATE.render(
+            self.codec,
+            account_id=account_id,
+            aws_account_name=aws_account_name,
+            recipient_email_addresses=recipient_email_addresses
+        )
+
+        return(await self.__request("POST", "/v1/report-configs", data=data))
+
+    async def update_account_bot_settings(self, account_id, is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
+        """
+        Update Conformity Bot settings for an account.
+
+        See CloudConformity.update_account_bot_settings.
+        """
+
+        data = payloads.BOT_SETTINGS_TEMPLATE.render(self.codec, bot=payloads.bot_settings(
+            is_disabled=is_disabled,
+            disabled_until=disabled_until,
+            scan_interval_hour=scan_interval_hour,
+            disabled_regions=disabled_regions
+        ))
+
+        return(await self.__request("PATCH", "/v1/accounts/{}/settings/bot".format(account_id), data=data))
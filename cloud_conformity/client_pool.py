@@ -0,0 +1,257 @@
+import collections
+import hashlib
+import threading
+
+import requests
+
+from .cloud_conformity import CloudConformity
+from .retry import RateLimiter
+from .transport import RequestsTransport, Transport
+
+
+class FairScheduler:
+    """
+    Round-robin scheduler of a fixed number of request slots between tenants.
+
+    When every slot is in use, waiting requests are queued per tenant and freed slots are handed to the tenants
+    in turn, one request each. A tenant queuing thousands of requests therefore delays another tenant's request
+    by at most one request per other waiting tenant, instead of by its whole backlog.
+    It is safe to share between threads.
+
+    Args:
+        max_concurrency (int): Number of requests in flight at the same time, across every tenant.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.__lock = threading.Lock()
+        self.__available = max_concurrency
+        self.__queues = collections.OrderedDict()
+        self.__in_flight = collections.Counter()
+
+    def acquire(self, tenant, timeout=None):
+        """
+        Wait for a slot.
+
+        Args:
+            tenant (str): The tenant sending the request.
+            timeout (float): Maximum number of seconds to wait. (default None)
+
+        Returns:
+            bool: True when a slot was acquired, False on timeout.
+        """
+
+        with self.__lock:
+            if self.__available > 0 and not self.__queues:
+                self.__available -= 1
+                self.__in_flight[tenant] += 1
+                return(True)
+
+            waiter = threading.Event()
+            self.__queues.setdefault(tenant, collections.deque()).append(waiter)
+
+        if waiter.wait(timeout):
+            return(True)
+
+        with self.__lock:
+            queue = self.__queues.get(tenant)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self.__queues[tenant]
+                return(False)
+
+        # The slot was handed over between the timeout and the lock.
+        return(True)
+
+    def release(self, tenant):
+        """
+        Free the slot of a completed request, handing it to the next tenant in turn.
+
+        Args:
+            tenant (str): The tenant whose request completed.
+        """
+
+        with self.__lock:
+            self.__in_flight[tenant] -= 1
+            if not self.__in_flight[tenant]:
+                del self.__in_flight[tenant]
+
+            if not self.__queues:
+                self.__available += 1
+                return
+
+            next_tenant, queue = next(iter(self.__queues.items()))
+            waiter = queue.popleft()
+
+            if queue:
+                self.__queues.move_to_end(next_tenant)
+            else:
+                del self.__queues[next_tenant]
+
+            self.__in_flight[next_tenant] += 1
+            waiter.set()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {"available": free slots, "in_flight": {tenant: requests}, "queued": {tenant: requests}}
+        """
+
+        with self.__lock:
+            return({
+                "available": self.__available,
+                "in_flight": dict(self.__in_flight),
+                "queued": {tenant: len(queue) for tenant, queue in self.__queues.items()}
+            })
+
+
+class ScheduledTransport(Transport):
+    """
+    Transport of one tenant of a ClientPool, sending its requests through the shared transport
+    once the scheduler grants them a slot.
+
+    Waiting for a slot counts towards the connect timeout of the request.
+    close() does nothing: the shared transport belongs to the pool.
+
+    Args:
+        transport (Transport): The shared transport.
+        scheduler (FairScheduler): The shared scheduler.
+        tenant (str): Name of the tenant.
+    """
+
+    def __init__(self, transport, scheduler, tenant):
+        super().__init__()
+        self.transport = transport
+        self.scheduler = scheduler
+        self.tenant = tenant
+
+    def request(self, method, url, data=None, headers=None, timeout=None, stream=False):
+        wait = timeout[0] if isinstance(timeout, tuple) else timeout
+
+        if not self.scheduler.acquire(self.tenant, timeout=wait):
+            raise requests.exceptions.ConnectTimeout("No connection slot freed within {}s".format(wait))
+
+        try:
+            response = self.transport.request(method, url, data=data, headers=headers, timeout=timeout, stream=stream)
+        except BaseException:
+            self.scheduler.release(self.tenant)
+            raise
+
+        if not stream:
+            self.scheduler.release(self.tenant)
+            return(response)
+
+        # A streamed response holds its connection until it is closed.
+        close = response.close
+        released = []
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                if not released:
+                    released.append(True)
+                    self.scheduler.release(self.tenant)
+
+        response.close = close_and_release
+
+        return(response)
+
+
+class ClientPool:
+    """
+    Pool of CloudConformity clients, one per API key, sharing one transport.
+
+    Every client of the pool sends its requests through the same connections, so serving many organisations costs
+    max_concurrency sockets rather than a connection pool per API key. Requests are scheduled fairly between the
+    API keys (see FairScheduler), and every API key has its own adaptive rate limiter, so one organisation's
+    bulk job neither starves the others nor eats their rate limit. Caches and indexes are per client, hence
+    isolated between API keys. The pool is safe to share between threads.
+
+    Close the pool, not its clients, to release the connections.
+
+        with ClientPool(max_concurrency=20) as pool:
+            pool.client(api_key_a).bulk_update_account_bot_settings(account_ids, scan_interval_hour=6)
+            pool.client(api_key_b).list_accounts()
+
+    Args:
+        api_endpoint (str): Default API endpoint of the clients. (default "https://eu-west-1-api.cloudconformity.com")
+        api_endpoints (list): Other API endpoints the clients may use. The default transport keeps one connection
+                              pool per endpoint, so clients of different regions do not evict each other's connections.
+                              (default None)
+        max_concurrency (int): Number of requests in flight at the same time, across every API key. (default 20)
+        transport (Transport): The shared transport. (default a RequestsTransport of max_concurrency connections per endpoint)
+        rate (float): Initial requests per second of each API key's RateLimiter, None for no rate limiter. (default 10)
+        max_rate (float): Maximum requests per second of each API key's RateLimiter. (default rate * 4)
+        **client_kwargs: Keyword arguments of every CloudConformity client, e.g. retry_policy or http_cache.
+    """
+
+    def __init__(self, api_endpoint="https://eu-west-1-api.cloudconformity.com", max_concurrency=20, transport=None, rate=10, max_rate=None, api_endpoints=None, **client_kwargs):
+        self.api_endpoint = api_endpoint
+        self.api_endpoints = tuple(dict.fromkeys([api_endpoint] + list(api_endpoints or [])))
+        self.rate = rate
+        self.max_rate = max_rate
+        self.client_kwargs = client_kwargs
+        self.transport = transport or RequestsTransport(pool_maxsize=max_concurrency, pool_connections=len(self.api_endpoints))
+        self.scheduler = FairScheduler(max_concurrency)
+        self.__lock = threading.Lock()
+        self.__clients = {}
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close the shared transport. The clients of the pool must not be used afterwards.
+        """
+
+        self.transport.close()
+
+    def client(self, api_key, api_endpoint=None, name=None):
+        """
+        Get the client of an API key, creating it on first use.
+
+        Args:
+            api_key (str): The API key of the organisation.
+            api_endpoint (str): API endpoint of the client, when it differs from the pool's.
+                                It must be one of api_endpoints. (default None)
+            name (str): Name of the tenant in the scheduler snapshot. (default a hash of the API key)
+
+        Returns:
+            CloudConformity: The client of the API key.
+
+        Raises:
+            ValueError: When api_endpoint is not one of the endpoints of the pool.
+        """
+
+        api_endpoint = api_endpoint or self.api_endpoint
+
+        if api_endpoint not in self.api_endpoints:
+            raise ValueError("{} is not one of the API endpoints of the pool, add it to api_endpoints".format(api_endpoint))
+        key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), api_endpoint)
+
+        with self.__lock:
+            client = self.__clients.get(key)
+
+            if client is None:
+                client = self.__clients[key] = CloudConformity(
+                    api_key=api_key,
+                    api_endpoint=api_endpoint,
+                    transport=ScheduledTransport(self.transport, self.scheduler, name or key[0][:12]),
+                    rate_limiter=RateLimiter(rate=self.rate, max_rate=self.max_rate) if self.rate is not None else None,
+                    **self.client_kwargs
+                )
+
+        return(client)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: The scheduler snapshot, see FairScheduler.snapshot.
+        """
+
+        return(self.scheduler.snapshot())
@@ -1,7 +1,22 @@
 # Built using Python 3.8.1 on March 16, 2020
 
 import requests
-import json
+import contextlib
+import hashlib
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from . import payloads
+from .codec import default_codec
+from .account_index import AccountIndex
+from .communication_index import CommunicationSettingsIndex
+from .single_flight import SingleFlight
+from .instrumentation import Instrumentation, take_pool_wait
+from .transport import RequestsTransport
+from .deadline import Deadline, DeadlineExceeded
+from .retry import RetryPolicy, THROTTLING_STATUS_CODES
 
 
 class CloudConformity:
@@ -11,18 +26,166 @@ class CloudConformity:
     A class to interact with Cloud Conformity API.
     Mostly what it does is making API call to Cloud Conformity endpoint using a Python library named requests.
 
+    All calls go through a transport holding the connections to the API endpoint, so TCP and TLS connections
+    are reused between calls instead of being opened for every request. The default RequestsTransport uses
+    one requests.Session backed by a urllib3 connection pool; HTTP2Transport multiplexes concurrent calls over
+    one HTTP/2 connection.
+    Call close() (or use the client as a context manager) to release the pooled connections.
+
+    Thread safety: one client can be shared by any number of threads, and every method can be called concurrently.
+    The transport is configured once in __init__ and never mutated afterwards, and hands out a separate connection
+    (or HTTP/2 stream) to each concurrent request. The indexes, caches, rate limiter and instrumentation
+    are guarded by their own locks. Concurrent identical GET requests are coalesced: one request is sent and
+    every caller gets its result (see SingleFlight). The callers share the response body and each decodes it into
+    its own result, so results may be modified freely. Calls are not ordered between threads: a GET racing a write may return the state from before
+    the write. Attributes must not be reassigned, and close() must not be called, while other threads use the client.
+
     Args:
         api_key (str): A secure 64-bit strong key randomly generated by Cloud Conformity on behalf of a user.
         api_endpoint (str): One of the Cloud Conformity API endpoints. (default "https://eu-west-1-api.cloudconformity.com")
+        pool_maxsize (int): Maximum number of connections kept open to the API endpoint.
+                            Set it to the number of threads sharing the client. (default 10)
+        pool_block (bool): True to make requests wait for a free connection once pool_maxsize connections are in use,
+                           False to open extra, non-pooled connections instead. (default False)
+        keep_alive (bool): True to keep connections open between calls, False to close them after every response. (default True)
+        timeout (float or tuple): Timeout in seconds applied to every request, either one value or a
+                                  (connect timeout, read timeout) tuple. None waits forever. (default (10, 60))
+        account_index_ttl (float): Number of seconds account_index keeps the fetched accounts. (default 300)
+        communication_settings_index_ttl (float): Number of seconds communication_settings_index keeps the fetched settings. (default 300)
+        http_cache (bool or HTTPCache): True, or an HTTPCache instance, to send conditional GET requests
+                                        and reuse the cached body when the API answers 304 Not Modified. (default False)
+        retry_policy (bool or RetryPolicy): True, or a RetryPolicy instance, to retry throttled, failed
+                                            and unreachable requests with exponential backoff. (default False)
+        rate_limiter (RateLimiter): Adaptive rate limiter every request waits for. Share one instance between
+                                    the clients and threads using the same API key. (default None)
+        instrumentation (bool or Instrumentation): True, or an Instrumentation instance, to record per-endpoint
+                                                   metrics and call request hooks. (default False)
+        disk_cache (bool or DiskCache): True, or a DiskCache instance, to serve GET requests from a cache on disk
+                                        shared with other processes. Writes invalidate the cached responses
+                                        of the resource they change. (default False)
+        single_flight (bool): True to coalesce concurrent identical GET requests into one request. (default True)
+        transport (Transport): Transport sending the requests, e.g. HTTP2Transport(). pool_maxsize and pool_block
+                               only apply to the default RequestsTransport. (default None)
+        codec (JSONCodec): Codec serialising request bodies and parsing response bodies, see the
+                           cloud_conformity.codec module. (default orjson when installed, json otherwise)
     """
 
-    def __init__(self, api_key, api_endpoint="https://eu-west-1-api.cloudconformity.com"):
+    def __init__(self, api_key, api_endpoint="https://eu-west-1-api.cloudconformity.com", pool_maxsize=10, pool_block=False, keep_alive=True, timeout=(10, 60), account_index_ttl=300, communication_settings_index_ttl=300, http_cache=False, retry_policy=False, rate_limiter=None, instrumentation=False, disk_cache=False, single_flight=True, transport=None, codec=None):
         self.api_endpoint = api_endpoint
+        self.timeout = timeout
+        self.codec = codec or default_codec()
+        self.retry_policy = RetryPolicy() if retry_policy is True else (retry_policy or None)
+        self.rate_limiter = rate_limiter
+        self.instrumentation = Instrumentation() if instrumentation is True else (instrumentation or None)
+        self.http_cache = http_cache or None
+        self.disk_cache = disk_cache or None
+
+        # The modules of optional features are imported when a client uses them, not with this module.
+        if http_cache is True:
+            from .http_cache import HTTPCache
+            self.http_cache = HTTPCache()
+
+        if disk_cache is True:
+            from .disk_cache import DiskCache
+            self.disk_cache = DiskCache()
+
+        self.__api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        self.single_flight = SingleFlight() if single_flight else None
+        self.__profile_metadata = {}
+        self.__local = threading.local()
+        self.account_index = AccountIndex(
+            fetch=lambda: self.list_accounts()["data"],
+            ttl=account_index_ttl
+        )
+        self.communication_settings_index = CommunicationSettingsIndex(
+            fetch=lambda: self.__request("GET", "/v1/settings/communication")["data"],
+            ttl=communication_settings_index_ttl
+        )
         self.headers = {
             "Content-Type": "application/vnd.api+json",
             "Authorization": "ApiKey {api_key}".format(api_key=api_key)
         }
 
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+        self.transport = transport or RequestsTransport(
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            instrumented=self.instrumentation is not None
+        )
+        self.session = getattr(self.transport, "session", None)
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close the transport and every pooled connection.
+
+        The client must not be used after it has been closed.
+        """
+
+        self.transport.close()
+
+    def typed(self):
+        """
+        Get a view of this client returning typed models instead of dicts.
+
+        The view shares the transport, caches and settings of this client. See cloud_conformity.models.
+
+        Returns:
+            TypedCloudConformity: e.g. cc.typed().list_accounts() returns a list of Account.
+        """
+
+        from .models import TypedCloudConformity
+
+        return(TypedCloudConformity(self))
+
+    @contextlib.contextmanager
+    def deadline(self, budget):
+        """
+        Bound every request sent by the current thread in a block by one time budget.
+
+        The budget flows through multi-step methods (e.g. apply_profile_to_accounts, which may send two requests)
+        and into the worker threads of bulk methods. Once it is spent, no further request is started: bulk methods
+        skip their remaining items and report them under "skipped", and other calls raise DeadlineExceeded.
+        Timeouts, rate limiter waits and retry backoffs are shortened to the remaining budget. Nested deadlines
+        never extend the enclosing one.
+
+            with cc.deadline(30):
+                cc.apply_profile_to_accounts(profile_id, account_ids)
+
+        Args:
+            budget (float or Deadline): Budget in seconds, or a Deadline to share. None keeps the current deadline.
+
+        Returns:
+            Deadline: The deadline in effect in the block, or None when there is none.
+        """
+
+        previous = self.current_deadline()
+        deadline = budget if budget is None or isinstance(budget, Deadline) else Deadline(budget)
+
+        if deadline is None or (previous is not None and previous.expires_at <= deadline.expires_at):
+            deadline = previous
+
+        self.__local.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            self.__local.deadline = previous
+
+    def current_deadline(self):
+        """
+        Returns:
+            Deadline: The deadline in effect in the current thread, or None when there is none.
+        """
+
+        return(getattr(self.__local, "deadline", None))
+
     def __generate_resource_endpoint(self, resource_endpoint):
         """
         Helper method to generate resource endpoint."
@@ -60,34 +223,324 @@ class CloudConformity:
             requests.exceptions.HTTPError: If response.status_code != 200
         """
 
-        message = ""
-        if response.status_code == 201:
-            message = "201 Created"
-        elif response.status_code == 202:
-            message = "202 Accepted"
-        elif response.status_code == 204:
-            message = "204 No Content"
-        elif response.status_code == 301:
-            message = "301 Moved Permanently"
-        elif response.status_code == 304:
-            message = "304 Not Modified"
-        elif response.status_code == 400:
-            message = "400 Bad Request"
-        elif response.status_code == 401:
-            message = "401 Unauthorized"
-        elif response.status_code == 403:
-            message = "403 Forbidden"
-        elif response.status_code == 404:
-            message = "404 Not Found"
-        elif response.status_code == 422:
-            message = "422 Unprocessable Entity"
-        elif response.status_code == 500:
-            message = "500 Internal Server Error"
+        return(self.codec.loads(self.__response_content(response)))
+
+    def __response_content(self, response):
+        """
+        Helper method to get the body of a successful response, before it is decoded.
+
+        Args:
+            response (requests.Response): The response received.
+
+        Returns:
+            bytes: The body of the response.
+
+        Raises:
+            requests.exceptions.HTTPError: If response.status_code != 200
+        """
+
+        message = payloads.status_message(response.status_code)
 
         if message:
             raise requests.exceptions.HTTPError(message, response=response)
 
-        return (response.json())
+        return(response.content)
+
+    def __send(self, method, url, data, headers, stats, stream=False):
+        """
+        Helper method to send a request, waiting for the rate limiter and retrying as the retry policy allows.
+
+        Args:
+            method (str): HTTP method, e.g. "GET" or "PATCH".
+            url (str): Full URL of the request.
+            data (str): Request body already serialised to JSON, or None.
+            headers (dict): Headers added to the client headers, or None.
+            stats (dict): Receives the number of retries made under "retries".
+            stream (bool): True to return before the body is read, see Transport.request. (default False)
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            DeadlineExceeded: When the deadline has passed, or cut the request short.
+        """
+
+        attempt = 0
+        headers = dict(self.headers, **headers) if headers else self.headers
+        deadline = self.current_deadline()
+
+        while True:
+            if deadline is not None:
+                deadline.check()
+
+            if self.rate_limiter is not None:
+                if not self.rate_limiter.acquire(timeout=None if deadline is None else deadline.remaining()):
+                    raise DeadlineExceeded("Rate limiter wait exceeds the deadline of {}s".format(deadline.seconds))
+
+            try:
+                response = self.transport.request(
+                    method,
+                    url,
+                    data=data,
+                    headers=headers,
+                    timeout=self.timeout if deadline is None else deadline.timeout(self.timeout),
+                    stream=stream
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if isinstance(e, requests.exceptions.Timeout) and deadline is not None and deadline.expired():
+                    raise DeadlineExceeded("Request cut short by the deadline of {}s: {}".format(deadline.seconds, e)) from e
+                if self.retry_policy is None or not self.retry_policy.should_retry_error(method, attempt):
+                    raise
+                delay = self.retry_policy.backoff(attempt + 1)
+                if deadline is not None and delay >= deadline.remaining():
+                    raise
+                attempt += 1
+                stats["retries"] = attempt
+                time.sleep(delay)
+                continue
+
+            if self.rate_limiter is not None:
+                if response.status_code in THROTTLING_STATUS_CODES:
+                    self.rate_limiter.on_throttle()
+                else:
+                    self.rate_limiter.on_success()
+
+            if self.retry_policy is None or not self.retry_policy.should_retry_status(method, response.status_code, attempt):
+                return(response)
+
+            delay = self.retry_policy.backoff(attempt + 1, response.headers.get("Retry-After"))
+            if deadline is not None and delay >= deadline.remaining():
+                return(response)
+            response.close()
+            attempt += 1
+            stats["retries"] = attempt
+            time.sleep(delay)
+
+    def __request(self, method, endpoint, payload=None, data=None, template=None):
+        """
+        Helper method to send a request through the transport.
+
+        Concurrent identical GET requests share one response body, which each caller decodes into its own result.
+
+        Args:
+            method (str): HTTP method, e.g. "GET" or "PATCH".
+            endpoint (str): Resource endpoint defined on Cloud Conformity documentation.
+            payload (dict): Request body, serialised to JSON when provided. (default None)
+            data (str or bytes): Request body already serialised to JSON. Used instead of payload. (default None)
+            template (str): Endpoint template the request is recorded under by the instrumentation,
+                            e.g. "/v1/accounts/{id}". (default endpoint without its query string)
+
+        Returns:
+            dict: Response of the API
+        """
+
+        if data is None and payload is not None:
+            data = self.codec.dumps(payload)
+
+        url = self.__generate_resource_endpoint(endpoint)
+
+        if method == "GET" and self.disk_cache is not None:
+            body = self.disk_cache.get(self.__api_key_hash, url)
+            if body is not None:
+                return(body)
+
+        if method == "GET" and self.single_flight is not None:
+            deadline = self.current_deadline()
+            try:
+                content = self.single_flight.do(
+                    url,
+                    lambda: self.__perform(method, endpoint, url, data, template),
+                    timeout=None if deadline is None else deadline.remaining()
+                )
+            except TimeoutError as e:
+                raise DeadlineExceeded(str(e)) from e
+        else:
+            content = self.__perform(method, endpoint, url, data, template)
+
+        return(self.codec.loads(content))
+
+    def __perform(self, method, endpoint, url, data, template):
+        """
+        Helper method to send a request and receive its response, recording it when instrumentation is enabled.
+
+        Args:
+            method (str): HTTP method.
+            endpoint (str): Resource endpoint of the request.
+            url (str): Full URL of the request.
+            data (str): Request body serialised to JSON, or None.
+            template (str): Endpoint template the request is recorded under, or None.
+
+        Returns:
+            bytes: Body of the response of the API, not decoded yet.
+        """
+
+        headers = None
+        cached = None
+
+        if method == "GET" and self.http_cache is not None:
+            headers, cached = self.http_cache.lookup(url)
+
+        if self.instrumentation is None:
+            return(self.__receive(method, endpoint, url, self.__send(method, url, data, headers, {}), cached))
+
+        template = template or endpoint.split("?")[0]
+        record = {
+            "method": method,
+            "template": template,
+            "url": url,
+            "status_code": None,
+            "error": None,
+            "elapsed": 0.0,
+            "bytes_sent": len(data) if data is not None else 0,
+            "bytes_received": 0,
+            "retries": 0,
+            "pool_wait": 0.0
+        }
+
+        self.instrumentation.before_request(method, template, url)
+        take_pool_wait()
+        start = time.perf_counter()
+
+        try:
+            response = self.__send(method, url, data, headers, record)
+            record["status_code"] = response.status_code
+            record["bytes_received"] = len(response.content)
+            return(self.__receive(method, endpoint, url, response, cached))
+        except Exception as e:
+            record["error"] = e
+            raise
+        finally:
+            record["elapsed"] = time.perf_counter() - start
+            record["pool_wait"] = take_pool_wait()
+            self.instrumentation.after_request(record)
+
+    def __receive(self, method, endpoint, url, response, cached):
+        """
+        Helper method to get the body of a response, going through the caches when they are enabled.
+
+        Args:
+            method (str): HTTP method of the request.
+            endpoint (str): Resource endpoint of the request.
+            url (str): Full URL of the request.
+            response (requests.Response): The response received.
+            cached (bytes): Cached body the conditional request headers sent with the request validate, or None.
+
+        Returns:
+            bytes: Body of the response of the API, not decoded yet.
+        """
+
+        if response.status_code == 304 and cached is not None:
+            return(cached)
+
+        body = self.__response_content(response)
+
+        if method == "GET" and self.http_cache is not None:
+            self.http_cache.store(url, response.headers, body)
+
+        if self.disk_cache is not None:
+            if method == "GET":
+                self.disk_cache.set(self.__api_key_hash, url, body)
+            else:
+                self.disk_cache.invalidate(
+                    self.__api_key_hash,
+                    self.__generate_resource_endpoint("/".join(endpoint.split("?")[0].split("/")[:3]))
+                )
+
+        return(body)
+
+    def __run_bulk(self, function, items, max_workers):
+        """
+        Helper method to call a function for many items on a thread pool.
+
+        Every item is processed even if some of them fail, so the caller gets the result of each item.
+        The deadline of the calling thread applies to the workers: once it has passed, the items not started yet
+        are skipped. Items cut short by the deadline fail with DeadlineExceeded.
+
+        Args:
+            function (callable): Function called with one item, usually a method of this client.
+            items (list): Hashable items, e.g. account IDs. Duplicates are processed once.
+            max_workers (int): Number of threads sending requests at the same time.
+
+        Returns:
+            dict: {
+                "data": {item: result of the function},
+                "errors": {item: exception raised by the function},
+                "skipped": list of the items not started before the deadline,
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
+            }
+            Times are in seconds.
+        """
+
+        items = list(dict.fromkeys(items))
+        data = {}
+        errors = {}
+        skipped = []
+        latencies = []
+        deadline = self.current_deadline()
+        not_started = object()
+
+        def timed(item):
+            if deadline is not None and deadline.expired():
+                return(not_started)
+
+            start = time.perf_counter()
+            try:
+                with self.deadline(deadline):
+                    return(function(item))
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items) or 1))) as executor:
+            futures = [(item, executor.submit(timed, item)) for item in items]
+
+            for item, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors[item] = e
+                    continue
+
+                if result is not_started:
+                    skipped.append(item)
+                else:
+                    data[item] = result
+
+        return({
+            "data": data,
+            "errors": errors,
+            "skipped": skipped,
+            "meta": {
+                "total": len(items),
+                "succeeded": len(data),
+                "failed": len(errors),
+                "skipped": len(skipped),
+                "elapsed": time.perf_counter() - start,
+                "latency": {
+                    "min": min(latencies) if latencies else 0.0,
+                    "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                    "max": max(latencies) if latencies else 0.0
+                }
+            }
+        })
+
+    def __update_account_index(self, response):
+        """
+        Helper method to put the account returned by a write into account_index.
+
+        The index is invalidated instead when the response does not carry a full account record.
+
+        Args:
+            response (dict): Response of the Create Account or Update Account API.
+        """
+
+        account = response.get("data") if isinstance(response, dict) else None
+
+        if isinstance(account, dict) and "id" in account and "name" in account.get("attributes", {}):
+            self.account_index.upsert(account)
+        else:
+            self.account_index.invalidate()
 
     def get_organisation_external_id(self):
         """
@@ -101,12 +554,7 @@ class CloudConformity:
 
         endpoint = "/v1/organisation/external-id"
 
-        response = requests.get(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers
-        )
-
-        return(self.__process_response(response))
+        return(self.__request("GET", endpoint))
 
     def create_account(self, aws_account_id, aws_account_name, aws_tag_environment, external_id, cost_package=False, subscriptionType="advanced"):
         """Create a new account to Cloud Conformity organisation.
@@ -127,31 +575,20 @@ class CloudConformity:
 
         endpoint = "/v1/accounts"
 
-        payload = {
-            "data": {
-                "type": "account",
-                "attributes": {
-                    "name": aws_account_name,
-                    "environment": aws_tag_environment,
-                    "access": {
-                        "keys": {
-                            "roleArn": "arn:aws:iam::{}:role/CloudConformity".format(aws_account_id),
-                            "externalId": external_id
-                        }
-                    },
-                    "costPackage": cost_package,
-                    "subscriptionType": subscriptionType
-                }
-            }
-        }
-
-        response = requests.post(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-            data=json.dumps(payload)
+        payload = payloads.create_account_payload(
+            aws_account_id=aws_account_id,
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            external_id=external_id,
+            cost_package=cost_package,
+            subscriptionType=subscriptionType
         )
 
-        return(self.__process_response(response))
+        response = self.__request("POST", endpoint, payload=payload)
+
+        self.__update_account_index(response)
+
+        return(response)
 
     def delete_account(self, account_id):
         """
@@ -168,12 +605,11 @@ class CloudConformity:
 
         endpoint = "/v1/accounts/{}".format(account_id)
 
-        response = requests.delete(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-        )
+        response = self.__request("DELETE", endpoint, template="/v1/accounts/{id}")
 
-        return(self.__process_response(response))
+        self.account_index.remove(account_id)
+
+        return(response)
 
     def update_account(self, account_id, aws_account_name, aws_tag_environment, aws_tag_product_domain):
         """
@@ -193,26 +629,17 @@ class CloudConformity:
 
         endpoint = "/v1/accounts/{}".format(account_id)
 
-        payload = {
-            "data": {
-                "attributes": {
-                    "name": aws_account_name,
-                    "environment": aws_tag_environment,
-                    "tags": [
-                        aws_tag_environment,
-                        aws_tag_product_domain
-                    ]
-                }
-            }
-        }
-
-        response = requests.patch(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-            data=json.dumps(payload)
+        payload = payloads.update_account_payload(
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            aws_tag_product_domain=aws_tag_product_domain
         )
 
-        return(self.__process_response(response))
+        response = self.__request("PATCH", endpoint, payload=payload, template="/v1/accounts/{id}")
+
+        self.__update_account_index(response)
+
+        return(response)
 
     def list_accounts(self, aws_account_names=[]):
         """
@@ -229,26 +656,17 @@ class CloudConformity:
 
         endpoint = "/v1/accounts"
 
-        response = requests.get(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-        )
+        response = self.__request("GET", endpoint)
 
-        response = self.__process_response(response)
-
-        if len(aws_account_names) > 0:
-            response = {
-                "data": [
-                    x for x in response["data"] if x["attributes"]["name"] in aws_account_names
-                ]
-            }
-
-        return(response)
+        return(payloads.filter_accounts(response, aws_account_names))
 
     def list_communication_settings(self, channel=None, account_id=None, include_parents=False):
         """
         List communication settings.
 
+        Every call downloads the settings again. To query many channels or accounts, use communication_settings_index,
+        which downloads them once.
+
         API Docs: https://github.com/cloudconformity/documentation-api/blob/master/Settings.md
 
         Args:
@@ -260,40 +678,15 @@ class CloudConformity:
             dict: To see a sample response, you can access the API Docs link above.
         """
 
-        endpoint = "/v1/settings/communication"
-
-        if ((channel is not None) or (account_id is not None)):
-            endpoint = "{endpoint}?".format(endpoint=endpoint)
-
-            endpoint = "{endpoint}&accountId={account_id}".format(
-                endpoint=endpoint,
-                account_id=account_id,
-            ) if account_id is not None else endpoint
-
-            endpoint = "{endpoint}&channel={channel}".format(
-                endpoint=endpoint,
-                channel=channel
-            ) if channel is not None else endpoint
-
-            endpoint = "{endpoint}&includeParents={include_parents}".format(
-                endpoint=endpoint,
-                include_parents="true" if include_parents else "false"
-            ) if account_id is not None else endpoint
-
-            endpoint = endpoint.replace("?&", "?")
-
-        response = requests.get(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers
+        endpoint = payloads.communication_settings_endpoint(
+            channel=channel,
+            account_id=account_id,
+            include_parents=include_parents
         )
 
-        # There is a bug in the API that `channel` query string doesn't work.
-        # This additional processing is to handle the issue.
-        response = {
-            "data": [x for x in self.__process_response(response)["data"] if x["attributes"]["channel"] == channel]
-        }
+        response = self.__request("GET", endpoint)
 
-        return(response)
+        return(payloads.filter_communication_settings(response, channel))
 
     def delete_communication_setting(self, setting_id):
         """
@@ -310,12 +703,11 @@ class CloudConformity:
 
         endpoint = "/v1/settings/{}".format(setting_id)
 
-        response = requests.delete(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers
-        )
+        response = self.__request("DELETE", endpoint, template="/v1/settings/{id}")
 
-        return(self.__process_response(response))
+        self.communication_settings_index.remove(setting_id)
+
+        return(response)
 
     def list_profiles(self):
         """
@@ -329,12 +721,12 @@ class CloudConformity:
 
         endpoint = "/v1/profiles"
 
-        response = requests.get(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers
-        )
+        response = self.__request("GET", endpoint)
 
-        return(self.__process_response(response))
+        for profile in response.get("data", []):
+            self.__remember_profile(profile)
+
+        return(response)
 
     def get_profile(self, profile_id):
         """
@@ -351,12 +743,66 @@ class CloudConformity:
 
         endpoint = "/v1/profiles/{}".format(profile_id)
 
-        response = requests.get(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers
-        )
+        response = self.__request("GET", endpoint, template="/v1/profiles/{id}")
+
+        self.__remember_profile(response.get("data"))
+
+        return(response)
+
+    def __remember_profile(self, profile):
+        """
+        Helper method to keep the metadata of a profile, without its rule settings.
+
+        Args:
+            profile (dict): A profile record of the List Profiles or Get Profile API.
+
+        Returns:
+            dict: The metadata kept, or None when the record is not a profile.
+        """
+
+        if isinstance(profile, dict) and "id" in profile:
+            metadata = self.__profile_metadata[profile["id"]] = {
+                "type": profile.get("type"),
+                "id": profile["id"],
+                "attributes": dict(profile.get("attributes", {}))
+            }
+            return(metadata)
+
+        return(None)
 
-        return(self.__process_response(response))
+    def get_profile_metadata(self, profile_id):
+        """
+        Get the metadata (name, description, ...) of a profile, without its rule settings.
+
+        The metadata is remembered from every list_profiles and get_profile call,
+        so the profile is only downloaded when it has not been seen before.
+
+        Args:
+            profile_id (str): The Cloud Conformity ID of the profile.
+
+        Returns:
+            dict: {"type", "id", "attributes"} of the profile.
+        """
+
+        metadata = self.__profile_metadata.get(profile_id)
+
+        if metadata is None:
+            metadata = self.__remember_profile(self.get_profile(profile_id=profile_id).get("data"))
+
+        return(metadata)
+
+    def forget_profile_metadata(self, profile_id=None):
+        """
+        Drop remembered profile metadata, e.g. after a profile has been renamed.
+
+        Args:
+            profile_id (str): The Cloud Conformity ID of the profile. Set it to None to drop every profile. (default None)
+        """
+
+        if profile_id is None:
+            self.__profile_metadata.clear()
+        else:
+            self.__profile_metadata.pop(profile_id, None)
 
     def apply_profile_to_accounts(self, profile_id, account_ids, mode="replace"):
         """
@@ -378,26 +824,64 @@ class CloudConformity:
 
         endpoint = "/v1/profiles/{}/apply".format(profile_id)
 
-        profile_name = self.get_profile(
+        profile_name = self.get_profile_metadata(
             profile_id=profile_id
-        )["data"]["attributes"]["name"]
+        )["attributes"]["name"]
 
-        payload = {
-            "meta": {
-                "accountIds": account_ids,
-                "types": ["rule"],
-                "mode": mode,
-                "notes": "Applied from Profile: {profile_name}".format(profile_name=profile_name)
+        payload = payloads.apply_profile_payload(
+            profile_name=profile_name,
+            account_ids=account_ids,
+            mode=mode
+        )
+
+        return(self.__request("POST", endpoint, payload=payload, template="/v1/profiles/{id}/apply"))
+
+    def bulk_apply_profile_to_accounts(self, profile_id, account_ids, mode="replace", chunk_size=100, max_workers=4, deadline=None):
+        """
+        Apply profile to a large set of accounts, split into chunks applied concurrently.
+
+        The profile name is resolved once, then one apply request is sent per chunk of account_ids.
+        A failing chunk does not stop the others.
+
+        API Docs: https://github.com/cloudconformity/documentation-api/blob/master/Profiles.md
+
+        Args:
+            profile_id (str): The Cloud Conformity ID of the profile.
+            account_ids (list): An Array of account Id's that will be configured by the profile.
+            mode (str): See apply_profile_to_accounts. (default 'replace')
+            chunk_size (int): Maximum number of accounts per apply request. (default 100)
+            max_workers (int): Number of apply requests sent at the same time. (default 4)
+            deadline (float or Deadline): Time budget of the whole operation, see deadline(). (default None)
+
+        Returns:
+            dict: {
+                "data": {tuple of account IDs of a chunk: response of the API},
+                "errors": {tuple of account IDs of a chunk: exception raised for the chunk},
+                "skipped": list of the chunks not sent before the deadline,
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
             }
-        }
+            The counts in "meta" are numbers of chunks.
+        """
 
-        response = requests.post(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-            data=json.dumps(payload)
-        )
+        with self.deadline(deadline):
+            endpoint = "/v1/profiles/{}/apply".format(profile_id)
+
+            profile_name = self.get_profile_metadata(
+                profile_id=profile_id
+            )["attributes"]["name"]
 
-        return(self.__process_response(response))
+            account_ids = list(dict.fromkeys(account_ids))
+            chunks = [tuple(account_ids[i:i + chunk_size]) for i in range(0, len(account_ids), chunk_size)]
+
+            return(self.__run_bulk(
+                lambda chunk: self.__request("POST", endpoint, payload=payloads.apply_profile_payload(
+                    profile_name=profile_name,
+                    account_ids=list(chunk),
+                    mode=mode
+                ), template="/v1/profiles/{id}/apply"),
+                chunks,
+                max_workers
+            ))
 
     def create_report_configuration(self, account_id, aws_account_name, recipient_email_addresses):
         """
@@ -416,41 +900,14 @@ class CloudConformity:
 
         endpoint = "/v1/report-configs"
 
-        payload = {
-            "data": {
-                "type": "report-config",
-                "attributes": {
-                    "accountId": account_id,
-                    "configuration": {
-                        "title": "Cloud Conformity Report for {}".format(aws_account_name),
-                        "scheduled": True,
-                        "frequency": "* * MON",
-                        "tz": "Asia/Jakarta",
-                        "sendEmail": True,
-                        "emails": recipient_email_addresses,
-                        "filter": {
-                            "statuses": [
-                                "FAILURE"
-                            ],
-                            "riskLevels": [
-                                "EXTREME",
-                                "VERY_HIGH",
-                                "HIGH"
-                            ],
-                            "suppressed": False
-                        }
-                    }
-                }
-            }
-        }
-
-        response = requests.post(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-            data=json.dumps(payload)
+        data = payloads.REPORT_CONFIGURATION_TEMPLATE.render(
+            self.codec,
+            account_id=account_id,
+            aws_account_name=aws_account_name,
+            recipient_email_addresses=recipient_email_addresses
         )
 
-        return(self.__process_response(response))
+        return(self.__request("POST", endpoint, data=data))
 
     def update_account_bot_settings(self, account_id, is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
         """
@@ -476,37 +933,336 @@ class CloudConformity:
 
         endpoint = "/v1/accounts/{}/settings/bot".format(account_id)
 
-        bot_settings = {}
+        data = payloads.BOT_SETTINGS_TEMPLATE.render(self.codec, bot=payloads.bot_settings(
+            is_disabled=is_disabled,
+            disabled_until=disabled_until,
+            scan_interval_hour=scan_interval_hour,
+            disabled_regions=disabled_regions
+        ))
 
-        bot_settings["disabled"] = is_disabled
+        return(self.__request("PATCH", endpoint, data=data, template="/v1/accounts/{id}/settings/bot"))
 
-        if disabled_until is not None:
-            bot_settings["disabledUntil"] = int(disabled_until)
+    def bulk_update_account_bot_settings(self, account_ids, is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None, max_workers=10, deadline=None):
+        """
+        Update Conformity Bot settings for many accounts at once.
 
-        if scan_interval_hour is not None:
-            bot_settings["delay"] = int(scan_interval_hour)
+        The same settings are applied to every account. The payload is built and serialised once,
+        and the requests are sent concurrently on a thread pool. A failing account does not stop the others.
 
-        if disabled_regions is not None and isinstance(disabled_regions, list):
-            bot_settings["disabledRegions"] = {}
-            if len(disabled_regions) > 0:
-                for region in disabled_regions:
-                    bot_settings["disabledRegions"][region] = True
+        API Docs: https://github.com/cloudconformity/documentation-api/blob/master/Accounts.md
 
-        payload = {
-            "data": {
-                "type": "accounts",
-                "attributes": {
-                    "settings": {
-                        "bot": bot_settings
-                    }
-                }
+        Args:
+            account_ids (list): The Cloud Conformity IDs of the accounts.
+            is_disabled (bool): See update_account_bot_settings. (default False)
+            disabled_until (int): See update_account_bot_settings. (default None)
+            scan_interval_hour (int): See update_account_bot_settings. (default None)
+            disabled_regions (list): See update_account_bot_settings. (default None)
+            max_workers (int): Number of requests sent at the same time. Keep it at or below pool_maxsize. (default 10)
+            deadline (float or Deadline): Time budget of the whole operation, see deadline(). (default None)
+
+        Returns:
+            dict: {
+                "data": {account_id: response of the API},
+                "errors": {account_id: exception raised for the account},
+                "skipped": list of the account IDs not started before the deadline,
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
             }
-        }
+        """
 
-        response = requests.patch(
-            self.__generate_resource_endpoint(endpoint),
-            headers=self.headers,
-            data=json.dumps(payload)
-        )
+        with self.deadline(deadline):
+            data = payloads.BOT_SETTINGS_TEMPLATE.render(self.codec, bot=payloads.bot_settings(
+                is_disabled=is_disabled,
+                disabled_until=disabled_until,
+                scan_interval_hour=scan_interval_hour,
+                disabled_regions=disabled_regions
+            ))
+
+            return(self.__run_bulk(
+                lambda account_id: self.__request("PATCH", "/v1/accounts/{}/settings/bot".format(account_id), data=data, template="/v1/accounts/{id}/settings/bot"),
+                account_ids,
+                max_workers
+            ))
+
+    def reconcile(self, desired, dry_run=False, prune_accounts=False, max_workers=10, deadline=None):
+        """
+        Bring accounts, environments, tags, bot settings and communication settings to a desired state.
+
+        The current accounts and communication settings are fetched with one request each and compared with
+        the desired state, so only the calls that change something are sent. The calls of one account run in order,
+        different accounts are reconciled concurrently.
+
+        Args:
+            desired (dict): The desired state. See the cloud_conformity.reconcile module for its format.
+            dry_run (bool): True to only compute the plan, without sending any write. (default False)
+            prune_accounts (bool): True to delete the accounts missing from the desired state. (default False)
+            max_workers (int): Number of accounts reconciled at the same time. (default 10)
+            deadline (float or Deadline): Time budget of the whole operation, see deadline(). (default None)
+
+        Returns:
+            dict: {
+                "plan": list of planned calls {"account_name", "account_id", "method", "kwargs"},
+                "data": {account name: list of responses of the API},
+                "errors": {account name: exception raised for the account},
+                "skipped": list of the account names not started before the deadline,
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
+            }
+            "data", "errors", "skipped" and "meta" are empty when dry_run is True.
+        """
+
+        with self.deadline(deadline):
+            accounts = self.list_accounts()["data"]
+
+            self.communication_settings_index.refresh()
+            settings = self.communication_settings_index.account_level()
+
+            from .reconcile import plan_reconciliation
+
+            plan = plan_reconciliation(desired, accounts, settings, prune_accounts=prune_accounts)
+
+            if dry_run:
+                return({"plan": plan, "data": {}, "errors": {}, "skipped": [], "meta": {}})
+
+            external_id = {}
+            if any(call["method"] == "create_account" for call in plan):
+                external_id["id"] = self.get_organisation_external_id()["data"]["id"]
+
+            calls_by_account = {}
+            for call in plan:
+                calls_by_account.setdefault(call["account_name"], []).append(call)
+
+            def reconcile_account(name):
+                responses = []
+                account_id = None
+
+                for call in calls_by_account[name]:
+                    kwargs = dict(call["kwargs"])
+                    account_id = call["account_id"] or account_id
+
+                    if call["method"] == "create_account":
+                        kwargs["external_id"] = external_id["id"]
+                    elif call["method"] != "delete_communication_setting":
+                        kwargs["account_id"] = account_id
+
+                    response = getattr(self, call["method"])(**kwargs)
+
+                    if call["method"] == "create_account":
+                        account_id = response["data"]["id"]
+
+                    responses.append(response)
+
+                return(responses)
+
+            result = self.__run_bulk(reconcile_account, list(calls_by_account), max_workers)
+            result["plan"] = plan
+
+            return(result)
+
+    def onboard_accounts(self, specs, profile_id=None, profile_mode="replace", chunk_size=100, max_workers=10, progress=None, deadline=None):
+        """
+        Onboard many AWS accounts: create them, then create their report configuration, update their bot settings
+        and apply their profile.
+
+        The steps run as a concurrent pipeline. The organisation's external ID is fetched once, accounts are created
+        concurrently, and profiles are applied in batches of chunk_size accounts as soon as they are created.
+        A failing account does not stop the others, and a failed onboarding can be resumed by passing its
+        "progress" back. Accounts whose AWS account ID already exists in account_index are not created again.
+
+        Args:
+            specs (list): Specs of the accounts. See the cloud_conformity.onboarding module for their format.
+            profile_id (str): The profile applied to accounts whose spec has no profile_id, None to apply no profile. (default None)
+            profile_mode (str): Mode of the profile applies, see apply_profile_to_accounts. (default 'replace')
+            chunk_size (int): Maximum number of accounts per profile apply request. (default 100)
+            max_workers (int): Number of requests sent at the same time. (default 10)
+            progress (dict): The "progress" of a previous call with the same specs, to resume it. (default None)
+            deadline (float or Deadline): Time budget of the whole operation, see deadline(). (default None)
+
+        Returns:
+            dict: {
+                "data": {account name: {"account_id", "responses": {step: response of the API}}},
+                "errors": {account name: exception raised by the first failing step of the account},
+                "skipped": list of the account names not started before the deadline,
+                "progress": {account name: {"account_id", "completed": list of completed steps}},
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
+            }
+            "data" holds the fully onboarded accounts. Steps completed by a previous call have no response.
+        """
+
+        from .onboarding import onboard_accounts
+
+        with self.deadline(deadline):
+            return(onboard_accounts(
+                self,
+                specs,
+                profile_id=profile_id,
+                profile_mode=profile_mode,
+                chunk_size=chunk_size,
+                max_workers=max_workers,
+                progress=progress
+            ))
+
+    def stream_records(self, endpoint, keys=("data", "included")):
+        """
+        Stream the records of a GET endpoint, parsing the response while it is received.
+
+        Unlike the other methods, the body is never held in memory as a whole: records are yielded one at a time.
+        The caches, request coalescing and instrumentation are bypassed; the deadline, rate limiter and
+        retry policy apply to the request.
+
+        Args:
+            endpoint (str): Resource endpoint, e.g. "/v1/accounts".
+            keys (tuple): Top-level members whose array items are yielded one by one. See cloud_conformity.streaming.
+                          (default ("data", "included"))
+
+        Yields:
+            tuple: (top-level member, record), e.g. ("data", account record).
+
+        Raises:
+            requests.exceptions.HTTPError: If the status code is not 200.
+        """
+
+        from .streaming import iter_records
+
+        response = self.__send("GET", self.__generate_resource_endpoint(endpoint), None, None, {}, stream=True)
+
+        try:
+            if payloads.status_message(response.status_code):
+                self.__process_response(response)
+
+            for key, record in iter_records(response.iter_content(chunk_size=65536), keys=keys):
+                yield(key, record)
+        finally:
+            response.close()
+
+    def export_inventory(self, path, resume=True):
+        """
+        Export the accounts, communication settings, profiles and rule settings of the organisation to an NDJSON file.
+
+        Responses are streamed and written record by record, so memory stays bounded for any organisation size.
+        The progress is checkpointed after the accounts, the communication settings and each profile, so an
+        interrupted export resumes where it stopped. See the cloud_conformity.export module for the file format.
+
+        Args:
+            path (str): Path of the NDJSON file to write.
+            resume (bool): True to resume an interrupted export of the same path, False to start over. (default True)
+
+        Returns:
+            dict: {
+                "path": path of the file,
+                "records": {section: number of records written},
+                "units": number of units exported (accounts, communication settings, one per profile),
+                "resumed": True when an interrupted export was resumed,
+                "elapsed": seconds
+            }
+        """
+
+        from .export import export_inventory
+
+        return(export_inventory(self, path, resume=resume))
+
+    def watcher(self, resources=("accounts", "communication_settings"), min_interval=5, max_interval=300, emit_initial=False):
+        """
+        Get a watcher emitting the accounts and communication settings added, changed and removed between polls.
+
+        Polls are conditional requests: when the API answers 304 Not Modified, nothing is downloaded or compared.
+        Otherwise records are compared by hash with the previous snapshot, and the changed fields of changed records
+        are named. The polling interval shrinks towards min_interval while changes are seen, and grows towards
+        max_interval while nothing changes. See the cloud_conformity.watch module for the events.
+
+        Args:
+            resources (tuple): "accounts" and/or "communication_settings". (default both)
+            min_interval (float): Shortest number of seconds between two polls. (default 5)
+            max_interval (float): Longest number of seconds between two polls. (default 300)
+            emit_initial (bool): True to emit an "added" event for every record of the first poll. (default False)
+
+        Returns:
+            Watcher: The watcher. Call poll() for one round of events, or iterate watch() to poll forever.
+        """
+
+        from .watch import Watcher
+
+        endpoints = {"accounts": "/v1/accounts", "communication_settings": "/v1/settings/communication"}
+        validators = {}
+
+        def fetch(resource):
+            url = self.__generate_resource_endpoint(endpoints[resource])
+            response = self.__send("GET", url, None, validators.get(resource), {})
+
+            if response.status_code == 304 and validators.get(resource):
+                return(None)
+
+            body = self.__process_response(response)
+            validators[resource] = {
+                header: response.headers[name]
+                for header, name in (("If-None-Match", "ETag"), ("If-Modified-Since", "Last-Modified"))
+                if response.headers.get(name)
+            }
+
+            return(body["data"])
+
+        return(Watcher(
+            fetch=fetch,
+            resources=resources,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            emit_initial=emit_initial
+        ))
+
+    def write_buffer(self, max_pending=100, flush_interval=None, max_workers=10):
+        """
+        Get a buffer that merges update_account and update_account_bot_settings calls per account.
+
+        A flush sends at most one PATCH /v1/accounts/{id} and one PATCH /v1/accounts/{id}/settings/bot per account,
+        whatever the number of buffered calls. The API keeps the account attributes and the bot settings behind two
+        different endpoints, so they cannot be merged into a single request.
+
+        Args:
+            max_pending (int): Number of pending accounts that triggers a flush. (default 100)
+            flush_interval (float): Seconds between two automatic flushes, None to disable them. (default None)
+            max_workers (int): Number of accounts flushed at the same time. (default 10)
+
+        Returns:
+            WriteBuffer: The buffer. Its flush() returns {
+                "data": {account_id: list of responses of the API},
+                "errors": {account_id: exception raised for the account},
+                "skipped": list of the account IDs not started before the deadline,
+                "meta": {"total", "succeeded", "failed", "skipped", "elapsed", "latency": {"min", "mean", "max"}}
+            }
+        """
 
-        return(self.__process_response(response))
+        from .write_buffer import WriteBuffer
+
+        def flush_account(account_id, writes):
+            responses = []
+
+            if writes["attributes"] is not None:
+                response = self.__request(
+                    "PATCH",
+                    "/v1/accounts/{}".format(account_id),
+                    payload={"data": {"attributes": writes["attributes"]}},
+                    template="/v1/accounts/{id}"
+                )
+                self.__update_account_index(response)
+                responses.append(response)
+
+            if writes["bot"] is not None:
+                responses.append(self.__request(
+                    "PATCH",
+                    "/v1/accounts/{}/settings/bot".format(account_id),
+                    data=payloads.BOT_SETTINGS_TEMPLATE.render(self.codec, bot=writes["bot"]),
+                    template="/v1/accounts/{id}/settings/bot"
+                ))
+
+            return(responses)
+
+        def flush(pending):
+            return(self.__run_bulk(
+                lambda account_id: flush_account(account_id, pending[account_id]),
+                list(pending),
+                max_workers
+            ))
+
+        return(WriteBuffer(
+            flush=flush,
+            max_pending=max_pending,
+            flush_interval=flush_interval
+        ))
@@ -0,0 +1,91 @@
+"""
+JSON codecs serialising request bodies and parsing response bodies.
+
+CloudConformity and AsyncCloudConformity encode and decode every body through a codec. default_codec() picks
+orjson when it is installed, which is faster than the standard library at both, and falls back to the json module
+otherwise. Any object with the dumps and loads methods of JSONCodec can be passed as the codec of a client,
+e.g. to use another JSON library.
+"""
+
+import json
+
+_default_codec = None
+
+
+class JSONCodec:
+    """
+    Codec of the standard library json module. Bodies are encoded without insignificant whitespace.
+    """
+
+    name = "json"
+
+    def __init__(self):
+        self.__encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def dumps(self, value):
+        """
+        Args:
+            value (object): A JSON value.
+
+        Returns:
+            str or bytes: The value serialised to JSON.
+        """
+
+        return(self.__encode(value))
+
+    def loads(self, data):
+        """
+        Args:
+            data (bytes or str): A JSON document.
+
+        Returns:
+            object: The decoded value.
+
+        Raises:
+            ValueError: When the document is not valid JSON.
+        """
+
+        return(json.loads(data))
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Codec of the orjson package. dumps() returns bytes.
+
+    Raises:
+        ImportError: When orjson is not installed.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        super().__init__()
+
+        import orjson
+
+        self.__orjson = orjson
+
+    def dumps(self, value):
+        return(self.__orjson.dumps(value))
+
+    def loads(self, data):
+        return(self.__orjson.loads(data))
+
+
+def default_codec():
+    """
+    Get the codec shared by the clients created without one.
+
+    Returns:
+        JSONCodec: An OrjsonCodec when orjson is installed, a JSONCodec otherwise.
+    """
+
+    global _default_codec
+
+    if _default_codec is None:
+        try:
+            _default_codec = OrjsonCodec()
+        except ImportError:
+            _default_codec = JSONCodec()
+
+    return(_default_codec)
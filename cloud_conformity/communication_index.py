@@ -0,0 +1,186 @@
+import threading
+import time
+
+
+class CommunicationSettingsIndex:
+    """
+    In-memory index of the organisation's communication settings.
+
+    Every communication setting, organisation level and account level, is fetched with one request and kept
+    for `ttl` seconds. Queries by channel, account and level are then answered from memory.
+    The index is safe to share between threads.
+
+    CloudConformity keeps its index consistent with delete_communication_setting.
+
+    Args:
+        fetch (callable): Function returning the list of every communication setting record.
+        ttl (float): Number of seconds the fetched settings are kept before being fetched again.
+                     Set it to None to keep them until invalidate() is called. (default 300)
+    """
+
+    def __init__(self, fetch, ttl=300):
+        self.ttl = ttl
+        self.__fetch = fetch
+        self.__lock = threading.RLock()
+        self.__loaded_at = None
+        self.__by_id = {}
+        self.__by_account = {}
+        self.__by_channel = {}
+
+    @staticmethod
+    def account_id(setting):
+        """
+        Get the account a communication setting belongs to.
+
+        Args:
+            setting (dict): A communication setting record.
+
+        Returns:
+            str: Cloud Conformity ID of the account, or None for an organisation level setting.
+        """
+
+        account = ((setting.get("relationships") or {}).get("account") or {}).get("data")
+
+        return(account["id"] if account else None)
+
+    def __ensure_fresh(self):
+        """
+        Helper method to (re)load the settings when they are missing or expired. Must be called with the lock held.
+        """
+
+        if self.__loaded_at is None or (self.ttl is not None and time.monotonic() - self.__loaded_at >= self.ttl):
+            self.refresh()
+
+    def refresh(self):
+        """
+        Fetch the settings now and rebuild the index.
+        """
+
+        settings = self.__fetch()
+
+        with self.__lock:
+            self.__by_id = {}
+            self.__by_account = {}
+            self.__by_channel = {}
+
+            for setting in settings:
+                self.__by_id[setting["id"]] = setting
+                self.__by_account.setdefault(self.account_id(setting), {})[setting["id"]] = setting
+                self.__by_channel.setdefault(setting["attributes"]["channel"], {})[setting["id"]] = setting
+
+            self.__loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Drop the loaded settings, so the next query fetches them again.
+        """
+
+        with self.__lock:
+            self.__loaded_at = None
+
+    def remove(self, setting_id):
+        """
+        Remove a communication setting from the index.
+
+        Args:
+            setting_id (str): The Cloud Conformity ID of the communication setting.
+        """
+
+        with self.__lock:
+            setting = self.__by_id.pop(setting_id, None)
+            if setting is None:
+                return
+
+            self.__by_account.get(self.account_id(setting), {}).pop(setting_id, None)
+            self.__by_channel.get(setting["attributes"]["channel"], {}).pop(setting_id, None)
+
+    def by_id(self, setting_id):
+        """
+        Args:
+            setting_id (str): The Cloud Conformity ID of the communication setting.
+
+        Returns:
+            dict: The communication setting record, or None when there is no such setting.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(self.__by_id.get(setting_id))
+
+    def by_channel(self, channel):
+        """
+        Args:
+            channel (str): email, sms, slack, pager-duty, or sns.
+
+        Returns:
+            list: The communication settings of the channel, at every level.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(list(self.__by_channel.get(channel, {}).values()))
+
+    def by_account(self, account_id, channel=None, include_parents=False):
+        """
+        Args:
+            account_id (str): Cloud Conformity ID of the account.
+            channel (str): Provide to only get the settings of one channel. (default None)
+            include_parents (bool): True to also get the organisation level settings. (default False)
+
+        Returns:
+            list: The communication settings of the account.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            settings = list(self.__by_account.get(account_id, {}).values())
+            if include_parents:
+                settings += list(self.__by_account.get(None, {}).values())
+
+        return([s for s in settings if channel is None or s["attributes"]["channel"] == channel])
+
+    def organisation_level(self, channel=None):
+        """
+        Args:
+            channel (str): Provide to only get the settings of one channel. (default None)
+
+        Returns:
+            list: The organisation level communication settings.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            settings = list(self.__by_account.get(None, {}).values())
+
+        return([s for s in settings if channel is None or s["attributes"]["channel"] == channel])
+
+    def account_level(self, channel=None):
+        """
+        Args:
+            channel (str): Provide to only get the settings of one channel. (default None)
+
+        Returns:
+            list: The account level communication settings of every account.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            settings = [s for account_id, by_id in self.__by_account.items() if account_id is not None for s in by_id.values()]
+
+        return([s for s in settings if channel is None or s["attributes"]["channel"] == channel])
+
+    def settings(self):
+        """
+        Returns:
+            list: Every communication setting in the index.
+        """
+
+        with self.__lock:
+            self.__ensure_fresh()
+
+            return(list(self.__by_id.values()))
@@ -0,0 +1,77 @@
+import time
+
+import requests
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when a request cannot be sent, or retried, within the remaining deadline budget.
+    """
+
+
+class Deadline:
+    """
+    Time budget shared by every request of an operation.
+
+    Use it through CloudConformity.deadline(): every request sent in the block, including the requests of
+    bulk and multi-step methods and of their worker threads, is bounded by the remaining budget.
+    No request is started once the budget is spent, timeouts are shortened to the remaining budget,
+    and retries whose backoff would outlast it are given up.
+
+    Args:
+        seconds (float): The budget, in seconds from now.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def __repr__(self):
+        return("Deadline(remaining={:.3f})".format(self.remaining()))
+
+    def remaining(self):
+        """
+        Returns:
+            float: Seconds left, 0 once the deadline has passed.
+        """
+
+        return(max(0.0, self.expires_at - time.monotonic()))
+
+    def expired(self):
+        """
+        Returns:
+            bool: True once the deadline has passed.
+        """
+
+        return(time.monotonic() >= self.expires_at)
+
+    def check(self):
+        """
+        Raises:
+            DeadlineExceeded: When the deadline has passed.
+        """
+
+        if self.expired():
+            raise DeadlineExceeded("Deadline of {}s exceeded".format(self.seconds))
+
+    def timeout(self, timeout):
+        """
+        Shorten a request timeout to the remaining budget.
+
+        Args:
+            timeout (float or tuple): Timeout in seconds, a (connect timeout, read timeout) tuple, or None.
+
+        Returns:
+            float or tuple: The timeout, none of its values exceeding the remaining budget.
+        """
+
+        # Transports reject a zero timeout, and the deadline may pass between check() and this call.
+        remaining = max(self.remaining(), 0.001)
+
+        if timeout is None:
+            return(remaining)
+
+        if isinstance(timeout, tuple):
+            return(tuple(remaining if t is None else min(t, remaining) for t in timeout))
+
+        return(min(timeout, remaining))
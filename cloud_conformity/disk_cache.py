@@ -0,0 +1,234 @@
+import getpass
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+
+
+def default_directory():
+    """
+    Returns:
+        str: The per-user default directory of DiskCache.
+    """
+
+    return(os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "cloud-conformity"))
+
+
+def fallback_directory():
+    """
+    Returns:
+        str: The per-user directory DiskCache uses when the default one cannot be written, e.g. on AWS Lambda
+             where only /tmp is writable.
+    """
+
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+
+    return(os.path.join(tempfile.gettempdir(), "cloud-conformity-{}".format(user)))
+
+
+def writable_directory(directory):
+    """
+    Create a directory, private to the current user, unless it exists.
+
+    Args:
+        directory (str): Path of the directory.
+
+    Returns:
+        bool: True when the directory exists and can be written.
+    """
+
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    except OSError:
+        return(False)
+
+    return(os.access(directory, os.W_OK))
+
+
+def secure_directory(directory):
+    """
+    Make sure only the current user can access a cache directory.
+
+    Args:
+        directory (str): An existing directory.
+
+    Raises:
+        PermissionError: When the directory is a symbolic link or is owned by another user.
+    """
+
+    status = os.lstat(directory)
+
+    if stat.S_ISLNK(status.st_mode):
+        raise PermissionError("Cache directory {} is a symbolic link".format(directory))
+
+    if hasattr(os, "getuid"):
+        if status.st_uid != os.getuid():
+            raise PermissionError("Cache directory {} is owned by another user".format(directory))
+
+        if stat.S_IMODE(status.st_mode) & 0o077:
+            os.chmod(directory, 0o700)
+
+
+class DiskCache:
+    """
+    Persistent response cache shared between processes.
+
+    GET responses are stored in a SQLite database, keyed by a hash of the API key and the full URL
+    (endpoint and query string), and served for `ttl` seconds. Short-lived processes such as cron jobs or
+    Lambda invocations pointing to the same directory therefore start warm. SQLite's write-ahead log and busy
+    timeout let concurrent processes and threads read and write the cache safely. The least recently used
+    entries are evicted once the cache holds more than `max_entries` entries or `max_bytes` bytes.
+
+    The cache holds organisation data, so its directory must be private: it is created with mode 0700, its group
+    and other permissions are removed, and a directory owned by another user is refused.
+    When the default directory cannot be written, e.g. on AWS Lambda where only /tmp is writable, the cache falls back
+    to "cloud-conformity-<uid>" in the temporary directory, with the same checks.
+
+    Args:
+        directory (str): Directory of the cache database.
+                         (default "$XDG_CACHE_HOME/cloud-conformity", i.e. "~/.cache/cloud-conformity")
+        ttl (float): Number of seconds a response is served from the cache. (default 300)
+        max_entries (int): Maximum number of responses kept. (default 1000)
+        max_bytes (int): Maximum total size of the responses kept, in bytes. (default 64 MiB)
+    """
+
+    def __init__(self, directory=None, ttl=300, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        if directory is None:
+            directory = default_directory()
+            if not writable_directory(directory):
+                directory = fallback_directory()
+
+        self.directory = directory
+        self.path = os.path.join(self.directory, "responses.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.__local = threading.local()
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        secure_directory(self.directory)
+
+        # Created private before SQLite opens it; its -wal and -shm files inherit its mode.
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(self.path, 0o600)
+
+        with self.__connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "namespace TEXT NOT NULL, url TEXT NOT NULL, body TEXT NOT NULL, size INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, url))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def __connection(self):
+        """
+        Helper method to get the SQLite connection of the current thread.
+
+        Returns:
+            sqlite3.Connection: The connection, usable as a transaction context manager.
+        """
+
+        connection = getattr(self.__local, "connection", None)
+
+        if connection is None:
+            # Imported on first use: most clients never enable the disk cache.
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.__local.connection = connection
+
+        return(connection)
+
+    def get(self, namespace, url):
+        """
+        Get a cached response.
+
+        Args:
+            namespace (str): Hash of the API key the response belongs to.
+            url (str): Full URL of the GET request.
+
+        Returns:
+            dict: The cached body, or None when it is missing or older than the TTL.
+        """
+
+        now = time.time()
+
+        with self.__connection() as connection:
+            row = connection.execute(
+                "SELECT body, stored_at FROM responses WHERE namespace = ? AND url = ?",
+                (namespace, url)
+            ).fetchone()
+
+            if row is None:
+                return(None)
+
+            if self.ttl is not None and now - row[1] >= self.ttl:
+                connection.execute("DELETE FROM responses WHERE namespace = ? AND url = ?", (namespace, url))
+                return(None)
+
+            connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE namespace = ? AND url = ?",
+                (now, namespace, url)
+            )
+
+        return(json.loads(row[0]))
+
+    def set(self, namespace, url, body):
+        """
+        Store a response, then evict the least recently used responses above the size limits.
+
+        Args:
+            namespace (str): Hash of the API key the response belongs to.
+            url (str): Full URL of the GET request.
+            body (dict or bytes): Parsed body of the response, or the response content as received.
+        """
+
+        content = body.decode("utf-8") if isinstance(body, bytes) else json.dumps(body)
+        now = time.time()
+
+        with self.__connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (namespace, url, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, url, content, len(content), now, now)
+            )
+
+            count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+            while count > self.max_entries or size > self.max_bytes:
+                row = connection.execute(
+                    "SELECT namespace, url, size FROM responses ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                connection.execute("DELETE FROM responses WHERE namespace = ? AND url = ?", (row[0], row[1]))
+                count -= 1
+                size -= row[2]
+
+    def invalidate(self, namespace, url_prefix=""):
+        """
+        Remove the cached responses whose URL starts with a prefix.
+
+        Args:
+            namespace (str): Hash of the API key the responses belong to.
+            url_prefix (str): Prefix of the URLs to remove. (default "", i.e. every response of the namespace)
+        """
+
+        escaped = url_prefix.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+        with self.__connection() as connection:
+            connection.execute(
+                "DELETE FROM responses WHERE namespace = ? AND url LIKE ? ESCAPE '!'",
+                (namespace, escaped + "%")
+            )
+
+    def clear(self):
+        """
+        Remove every cached response, of every API key.
+        """
+
+        with self.__connection() as connection:
+            connection.execute("DELETE FROM responses")
@@ -0,0 +1,132 @@
+"""
+Streaming export of the organisation inventory to NDJSON.
+
+The export writes one JSON object per line:
+
+    {"section": "accounts", "record": {...}}
+    {"section": "communication_settings", "record": {...}}
+    {"section": "profiles", "record": {...}}
+    {"section": "rule_settings", "profile_id": "profile-id", "record": {...}}
+
+Responses are streamed and parsed incrementally (see cloud_conformity.streaming), and every record is written as soon
+as it is parsed, so memory stays bounded by the largest record whatever the size of the organisation.
+
+The export is made of units: the accounts, the communication settings, then each profile with its rule settings.
+After each unit the file is flushed to disk and a "<path>.progress" file records the units written and the size of
+the file. An interrupted export resumes from there: the partial unit is truncated and written again.
+The progress file is removed once the export completes.
+"""
+
+import json
+import os
+import time
+
+SECTIONS = ("accounts", "communication_settings", "profiles", "rule_settings")
+
+
+def load_progress(path):
+    """
+    Read the progress file of an export.
+
+    Args:
+        path (str): Path of the NDJSON export.
+
+    Returns:
+        dict: {"completed": list of units, "offset": size of the file after them, "records": {section: count}},
+              or None when there is no progress to resume from.
+    """
+
+    if not os.path.exists(path) or not os.path.exists(path + ".progress"):
+        return(None)
+
+    with open(path + ".progress") as f:
+        return(json.load(f))
+
+
+def save_progress(path, progress):
+    """
+    Atomically replace the progress file of an export.
+
+    Args:
+        path (str): Path of the NDJSON export.
+        progress (dict): See load_progress.
+    """
+
+    with open(path + ".progress.tmp", "w") as f:
+        json.dump(progress, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(path + ".progress.tmp", path + ".progress")
+
+
+def export_inventory(client, path, resume=True):
+    """
+    Export the accounts, communication settings, profiles and rule settings of the organisation. See CloudConformity.export_inventory.
+
+    Args:
+        client (CloudConformity): The client sending the requests.
+        path (str): Path of the NDJSON file to write.
+        resume (bool): True to resume an interrupted export of the same path, False to start over. (default True)
+
+    Returns:
+        dict: See CloudConformity.export_inventory.
+    """
+
+    start = time.perf_counter()
+    progress = load_progress(path) if resume else None
+    resumed = progress is not None
+
+    if progress is None:
+        progress = {"completed": [], "offset": 0, "records": {section: 0 for section in SECTIONS}}
+
+    completed = set(progress["completed"])
+    units = ["accounts", "communication_settings"]
+    units += ["profile:{}".format(record["id"]) for key, record in client.stream_records("/v1/profiles", keys=("data",)) if key == "data"]
+
+    with open(path, "ab") as f:
+        f.truncate(progress["offset"])
+
+        for unit in units:
+            if unit in completed:
+                continue
+
+            counts = {section: 0 for section in SECTIONS}
+
+            if unit == "accounts":
+                lines = (("accounts", None, r) for k, r in client.stream_records("/v1/accounts", keys=("data",)) if k == "data")
+            elif unit == "communication_settings":
+                lines = (("communication_settings", None, r) for k, r in client.stream_records("/v1/settings/communication", keys=("data",)) if k == "data")
+            else:
+                profile_id = unit.split(":", 1)[1]
+                lines = (
+                    ("profiles" if k == "data" else "rule_settings", None if k == "data" else profile_id, r)
+                    for k, r in client.stream_records("/v1/profiles/{}".format(profile_id))
+                    if k in ("data", "included")
+                )
+
+            for section, profile_id, record in lines:
+                line = {"section": section, "record": record}
+                if profile_id is not None:
+                    line = {"section": section, "profile_id": profile_id, "record": record}
+                f.write(json.dumps(line, separators=(",", ":")).encode("utf-8") + b"\n")
+                counts[section] += 1
+
+            f.flush()
+            os.fsync(f.fileno())
+
+            progress["completed"].append(unit)
+            progress["offset"] = f.seek(0, os.SEEK_END)
+            for section, count in counts.items():
+                progress["records"][section] += count
+            save_progress(path, progress)
+
+    os.remove(path + ".progress")
+
+    return({
+        "path": path,
+        "records": progress["records"],
+        "units": len(units),
+        "resumed": resumed,
+        "elapsed": time.perf_counter() - start
+    })
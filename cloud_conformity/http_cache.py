@@ -0,0 +1,113 @@
+import threading
+
+from collections import OrderedDict
+
+
+class HTTPCache:
+    """
+    In-memory cache of GET responses for conditional requests.
+
+    The cache stores the ETag and Last-Modified validators of every GET response together with its body, as received.
+    CloudConformity sends them back as If-None-Match and If-Modified-Since, and when the API answers
+    304 Not Modified the cached body is decoded instead of downloading it again. Bodies are kept encoded, so storing
+    and reusing them costs no copy of the parsed response.
+    The cache is safe to share between threads.
+
+    Args:
+        max_entries (int): Maximum number of URLs kept. The least recently used one is dropped first. (default 1000)
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def lookup(self, url):
+        """
+        Get the conditional request headers of a URL together with the body they validate.
+
+        Both come from the same entry, so the body is still at hand when the API answers 304 Not Modified,
+        even if the entry is evicted or replaced meanwhile.
+
+        Args:
+            url (str): Full URL of the GET request.
+
+        Returns:
+            tuple: (If-None-Match and/or If-Modified-Since headers, cached body as bytes),
+                   or ({}, None) when the URL is not cached.
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(url)
+            if entry is None:
+                return({}, None)
+            self.__entries.move_to_end(url)
+
+        headers = {}
+        if entry["etag"] is not None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return(headers, entry["body"])
+
+    def validators(self, url):
+        """
+        Get the conditional request headers of a URL.
+
+        Args:
+            url (str): Full URL of the GET request.
+
+        Returns:
+            dict: If-None-Match and/or If-Modified-Since headers, or an empty dict when the URL is not cached.
+        """
+
+        return(self.lookup(url)[0])
+
+    def get(self, url):
+        """
+        Get the cached body of a URL.
+
+        Args:
+            url (str): Full URL of the GET request.
+
+        Returns:
+            bytes: The cached body, as received, or None when the URL is not cached.
+        """
+
+        return(self.lookup(url)[1])
+
+    def store(self, url, headers, body):
+        """
+        Store the body of a GET response that carries an ETag or Last-Modified header.
+
+        Args:
+            url (str): Full URL of the GET request.
+            headers (dict): Headers of the response.
+            body (bytes): Body of the response, as received.
+        """
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+
+        if etag is None and last_modified is None:
+            return
+
+        with self.__lock:
+            self.__entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": body
+            }
+            self.__entries.move_to_end(url)
+
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every cached response.
+        """
+
+        with self.__lock:
+            self.__entries.clear()
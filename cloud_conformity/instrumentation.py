@@ -0,0 +1,199 @@
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_pool_wait = threading.local()
+
+
+class Instrumentation:
+    """
+    Per-endpoint request metrics and request hooks.
+
+    Every request is recorded under its method and endpoint template, e.g. "PATCH /v1/accounts/{id}/settings/bot":
+    number of requests and errors, status codes, bytes sent and received, retries, time spent waiting
+    for a pooled connection, and a latency histogram. Recording a request only takes a lock and a few
+    additions, so it can stay enabled in production. snapshot() exports everything as a plain dict.
+
+    Pre-request hooks are called with {"method", "template", "url"} before a request is sent.
+    Post-request hooks are called with the record of the request once it is done:
+    {"method", "template", "url", "status_code", "error", "elapsed", "bytes_sent", "bytes_received", "retries", "pool_wait"}.
+    Exceptions raised by hooks are not caught.
+
+    Args:
+        latency_buckets (tuple): Upper bounds in seconds of the latency histogram buckets. (default DEFAULT_LATENCY_BUCKETS)
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS):
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self.pre_request_hooks = []
+        self.post_request_hooks = []
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    def add_pre_request_hook(self, hook):
+        """
+        Args:
+            hook (callable): Function called with {"method", "template", "url"} before every request.
+        """
+
+        self.pre_request_hooks.append(hook)
+
+    def add_post_request_hook(self, hook):
+        """
+        Args:
+            hook (callable): Function called with the record of every request once it is done.
+        """
+
+        self.post_request_hooks.append(hook)
+
+    def before_request(self, method, template, url):
+        """
+        Call the pre-request hooks.
+        """
+
+        if self.pre_request_hooks:
+            request = {"method": method, "template": template, "url": url}
+            for hook in self.pre_request_hooks:
+                hook(request)
+
+    def after_request(self, record):
+        """
+        Add the record of a finished request to the metrics, then call the post-request hooks.
+
+        Args:
+            record (dict): See the class documentation.
+        """
+
+        key = "{} {}".format(record["method"], record["template"])
+
+        with self.__lock:
+            stats = self.__endpoints.get(key)
+            if stats is None:
+                stats = self.__endpoints[key] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "status_codes": {},
+                    "bytes_sent": 0,
+                    "bytes_received": 0,
+                    "retries": 0,
+                    "pool_wait": 0.0,
+                    "latency": {
+                        "sum": 0.0,
+                        "min": None,
+                        "max": None,
+                        "buckets": [0] * (len(self.latency_buckets) + 1)
+                    }
+                }
+
+            stats["requests"] += 1
+            if record["error"] is not None:
+                stats["errors"] += 1
+            if record["status_code"] is not None:
+                stats["status_codes"][record["status_code"]] = stats["status_codes"].get(record["status_code"], 0) + 1
+            stats["bytes_sent"] += record["bytes_sent"]
+            stats["bytes_received"] += record["bytes_received"]
+            stats["retries"] += record["retries"]
+            stats["pool_wait"] += record["pool_wait"]
+
+            latency = stats["latency"]
+            elapsed = record["elapsed"]
+            latency["sum"] += elapsed
+            latency["min"] = elapsed if latency["min"] is None else min(latency["min"], elapsed)
+            latency["max"] = elapsed if latency["max"] is None else max(latency["max"], elapsed)
+
+            bucket = 0
+            while bucket < len(self.latency_buckets) and elapsed > self.latency_buckets[bucket]:
+                bucket += 1
+            latency["buckets"][bucket] += 1
+
+        for hook in self.post_request_hooks:
+            hook(record)
+
+    def snapshot(self):
+        """
+        Export the metrics.
+
+        Returns:
+            dict: {
+                "latency_buckets": upper bounds of the histogram buckets, the last bucket being unbounded,
+                "endpoints": {"METHOD template": {
+                    "requests", "errors", "status_codes", "bytes_sent", "bytes_received", "retries", "pool_wait",
+                    "latency": {"sum", "min", "max", "mean", "buckets"}
+                }}
+            }
+        """
+
+        with self.__lock:
+            endpoints = {}
+            for key, stats in self.__endpoints.items():
+                endpoints[key] = dict(stats)
+                endpoints[key]["status_codes"] = dict(stats["status_codes"])
+                endpoints[key]["latency"] = dict(stats["latency"])
+                endpoints[key]["latency"]["buckets"] = list(stats["latency"]["buckets"])
+                endpoints[key]["latency"]["mean"] = stats["latency"]["sum"] / stats["requests"]
+
+        return({
+            "latency_buckets": list(self.latency_buckets),
+            "endpoints": endpoints
+        })
+
+    def reset(self):
+        """
+        Clear the metrics. The hooks are kept.
+        """
+
+        with self.__lock:
+            self.__endpoints = {}
+
+
+def take_pool_wait():
+    """
+    Get and reset the time the current thread spent waiting for pooled connections.
+
+    Returns:
+        float: Seconds waited since the last call.
+    """
+
+    seconds = getattr(_pool_wait, "seconds", 0.0)
+    _pool_wait.seconds = 0.0
+
+    return(seconds)
+
+
+class _TimedConnectionPoolMixin:
+    """
+    Connection pool that adds the time spent waiting for a connection to the current thread's total.
+    """
+
+    def _get_conn(self, timeout=None):
+        start = time.perf_counter()
+        try:
+            return(super()._get_conn(timeout=timeout))
+        finally:
+            _pool_wait.seconds = getattr(_pool_wait, "seconds", 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnectionPool(_TimedConnectionPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class TimedHTTPSConnectionPool(_TimedConnectionPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools measure the time spent waiting for a connection. See take_pool_wait().
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
@@ -0,0 +1,289 @@
+"""
+Lightweight typed views of Cloud Conformity API records.
+
+Each model is a __slots__ class: the fields it exposes are decoded once into slots, and the rest of the JSON:API
+record is kept encoded as compact JSON bytes rather than as nested dicts. Once the response is dropped, a model
+therefore holds a fraction of the memory of its parsed record. `attributes` and `related_id()` decode the record on
+first use and keep its attributes and relationships, so repeated access costs a lookup. The whole record is decoded
+on demand by `raw`. Records are encoded and decoded with the codec of the client.
+
+Use CloudConformity.typed() to get results as models instead of dicts.
+"""
+
+from .codec import default_codec
+
+
+def encode_record(record, codec=None):
+    """
+    Args:
+        record (object): A JSON value.
+        codec (JSONCodec): Codec serialising the value. (default orjson when installed, json otherwise)
+
+    Returns:
+        bytes: The value serialised to compact JSON.
+    """
+
+    data = (codec or default_codec()).dumps(record)
+
+    return(data.encode("utf-8") if isinstance(data, str) else data)
+
+
+def decode_record(data, codec=None):
+    """
+    Args:
+        data (bytes): A value encoded by encode_record.
+        codec (JSONCodec): Codec parsing the value. (default orjson when installed, json otherwise)
+
+    Returns:
+        object: The decoded value.
+    """
+
+    return((codec or default_codec()).loads(data))
+
+
+def related_id(record, relationship):
+    """
+    Get the ID of a related resource of a record.
+
+    Args:
+        record (dict): A JSON:API record.
+        relationship (str): Name of the relationship, e.g. "account".
+
+    Returns:
+        str: The ID of the related resource, or None when there is none.
+    """
+
+    data = ((record.get("relationships") or {}).get(relationship) or {}).get("data")
+
+    return(data.get("id") if isinstance(data, dict) else None)
+
+
+class Model:
+    """
+    Base class of the models.
+
+    Args:
+        raw (dict): The JSON:API record, i.e. an item of the "data" of a response.
+        codec (JSONCodec): Codec the record is kept encoded with, usually the one of the client.
+                           (default orjson when installed, json otherwise)
+    """
+
+    __slots__ = ("id", "type", "codec", "__encoded", "__attributes", "__relationships")
+
+    def __init__(self, raw, codec=None):
+        self.id = raw.get("id")
+        self.type = raw.get("type")
+        self.codec = codec or default_codec()
+        self.__encoded = encode_record(raw, self.codec)
+        self.__attributes = None
+        self.__relationships = None
+
+    @property
+    def raw(self):
+        """
+        Returns:
+            dict: The JSON:API record, decoded again on every access.
+        """
+
+        return(decode_record(self.__encoded, self.codec))
+
+    def __decode_members(self):
+        """
+        Helper method to decode the record once and keep its attributes and relationships.
+        """
+
+        raw = self.raw
+        self.__attributes = raw.get("attributes") or {}
+        self.__relationships = raw.get("relationships") or {}
+
+    @property
+    def attributes(self):
+        """
+        Returns:
+            dict: Every attribute of the record, decoded on first access and kept.
+        """
+
+        if self.__attributes is None:
+            self.__decode_members()
+
+        return(self.__attributes)
+
+    def related_id(self, relationship):
+        """
+        Get the ID of a related resource.
+
+        Args:
+            relationship (str): Name of the relationship, e.g. "account".
+
+        Returns:
+            str: The ID of the related resource, or None when there is none.
+        """
+
+        if self.__relationships is None:
+            self.__decode_members()
+
+        return(related_id({"relationships": self.__relationships}, relationship))
+
+    def __repr__(self):
+        return("{}(id={!r})".format(type(self).__name__, self.id))
+
+
+class Account(Model):
+    """
+    An account of the organisation.
+    """
+
+    __slots__ = ("name", "environment", "tags", "role_arn", "bot_settings", "cost_package", "subscription_type")
+
+    def __init__(self, raw, codec=None):
+        super().__init__(raw, codec)
+        attributes = raw.get("attributes") or {}
+        self.name = attributes.get("name")
+        self.environment = attributes.get("environment")
+        self.tags = attributes.get("tags") or []
+        self.role_arn = ((attributes.get("access") or {}).get("keys") or {}).get("roleArn")
+        self.bot_settings = (attributes.get("settings") or {}).get("bot")
+        self.cost_package = attributes.get("costPackage", attributes.get("cost-package"))
+        self.subscription_type = attributes.get("subscriptionType", attributes.get("subscription-type"))
+
+    @property
+    def aws_account_id(self):
+        parts = (self.role_arn or "").split(":")
+        return(parts[4].zfill(12) if len(parts) > 4 and parts[4] else None)
+
+
+class CommunicationSetting(Model):
+    """
+    A communication setting, at the organisation level or at the account level.
+    """
+
+    __slots__ = ("channel", "enabled", "configuration", "account_id")
+
+    def __init__(self, raw, codec=None):
+        super().__init__(raw, codec)
+        attributes = raw.get("attributes") or {}
+        self.channel = attributes.get("channel")
+        self.enabled = attributes.get("enabled")
+        self.configuration = attributes.get("configuration")
+        self.account_id = related_id(raw, "account")
+
+    @property
+    def is_organisation_level(self):
+        return(self.account_id is None)
+
+
+class Profile(Model):
+    """
+    A profile. Profiles returned by get_profile also carry their rule settings, kept encoded like the record.
+
+    Args:
+        raw (dict): The JSON:API record of the profile.
+        included (list): The "included" records of the Get Profile response. (default None)
+        codec (JSONCodec): See Model. (default orjson when installed, json otherwise)
+    """
+
+    __slots__ = ("name", "description", "__rule_settings")
+
+    def __init__(self, raw, included=None, codec=None):
+        super().__init__(raw, codec)
+        attributes = raw.get("attributes") or {}
+        self.name = attributes.get("name")
+        self.description = attributes.get("description")
+        rules = [r for r in included or [] if r.get("type") == "rules"]
+        self.__rule_settings = encode_record(rules, self.codec) if rules else None
+
+    @property
+    def rule_settings(self):
+        """
+        Returns:
+            list: The rule setting records of the profile, empty when the profile was listed rather than fetched.
+        """
+
+        return(decode_record(self.__rule_settings, self.codec) if self.__rule_settings is not None else [])
+
+
+class ReportConfig(Model):
+    """
+    A report configuration.
+    """
+
+    __slots__ = ("account_id", "configuration", "title", "emails", "frequency")
+
+    def __init__(self, raw, codec=None):
+        super().__init__(raw, codec)
+        attributes = raw.get("attributes") or {}
+        self.account_id = attributes.get("accountId") or related_id(raw, "account")
+        self.configuration = attributes.get("configuration") or {}
+        self.title = self.configuration.get("title")
+        self.emails = self.configuration.get("emails") or []
+        self.frequency = self.configuration.get("frequency")
+
+
+def wrap(response, model, codec=None):
+    """
+    Turn the "data" of a response into models.
+
+    Args:
+        response (dict): Response of the API.
+        model (type): The model class of the records.
+        codec (JSONCodec): Codec the records are kept encoded with. (default orjson when installed, json otherwise)
+
+    Returns:
+        Model or list: One model when "data" is a record, a list of models when it is a list of records.
+    """
+
+    data = response.get("data")
+
+    if model is Profile:
+        included = response.get("included")
+        if isinstance(data, list):
+            return([Profile(record, codec=codec) for record in data])
+        return(Profile(data, included=included, codec=codec))
+
+    if isinstance(data, list):
+        return([model(record, codec=codec) for record in data])
+
+    return(model(data, codec=codec))
+
+
+class TypedCloudConformity:
+    """
+    View of a CloudConformity client returning models instead of dicts.
+
+    Methods returning accounts, communication settings, profiles or report configurations return the
+    matching model (or list of models). Every other method and attribute is the one of the client.
+
+    Args:
+        client (CloudConformity): The client to wrap.
+    """
+
+    MODELS = {
+        "create_account": Account,
+        "update_account": Account,
+        "list_accounts": Account,
+        "update_account_bot_settings": Account,
+        "list_communication_settings": CommunicationSetting,
+        "list_profiles": Profile,
+        "get_profile": Profile,
+        "create_report_configuration": ReportConfig,
+    }
+
+    __slots__ = ("client",)
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        model = self.MODELS.get(name)
+
+        if model is None:
+            return(attribute)
+
+        def typed(*args, **kwargs):
+            return(wrap(attribute(*args, **kwargs), model, codec=self.client.codec))
+
+        typed.__name__ = name
+        typed.__doc__ = attribute.__doc__
+
+        return(typed)
@@ -0,0 +1,333 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .cloud_conformity import CloudConformity
+from .single_flight import SingleFlight
+
+
+class MultiRegionCloudConformity:
+    """
+    Cloud Conformity API client spanning several regional endpoints.
+
+    Reads (list_accounts, list_profiles, list_communication_settings) are sent to every region concurrently,
+    and their records are merged and deduplicated by type and ID. Writes are routed to the region owning the
+    account, profile or communication setting, found in a map of resource ID to region. The map is filled by every
+    read and kept for `owner_ttl` seconds; a write to an unknown resource refreshes it with one concurrent read
+    of every region. create_account takes the region to create the account in.
+
+    The client is safe to share between threads, like the regional clients it holds.
+
+    Args:
+        api_key (str): A secure 64-bit strong key randomly generated by Cloud Conformity on behalf of a user.
+        api_endpoints (dict or list): {region name: API endpoint}, or a list of regions
+                                      (e.g. ["eu-west-1", "us-west-2"]) whose public endpoint is used.
+        owner_ttl (float): Number of seconds the resource to region map is kept. (default 300)
+        **client_kwargs: Keyword arguments of the CloudConformity client of every region,
+                         e.g. pool_maxsize or retry_policy.
+    """
+
+    def __init__(self, api_key, api_endpoints, owner_ttl=300, **client_kwargs):
+        if not isinstance(api_endpoints, dict):
+            api_endpoints = {
+                region: "https://{}-api.cloudconformity.com".format(region)
+                for region in api_endpoints
+            }
+
+        self.owner_ttl = owner_ttl
+        self.clients = {
+            region: CloudConformity(api_key=api_key, api_endpoint=api_endpoint, **client_kwargs)
+            for region, api_endpoint in api_endpoints.items()
+        }
+        self.__lock = threading.Lock()
+        self.__owners = {}
+        self.__owners_loaded_at = None
+        self.__refresh = SingleFlight()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close the clients of every region.
+        """
+
+        for client in self.clients.values():
+            client.close()
+
+    def client(self, region):
+        """
+        Args:
+            region (str): Name of the region.
+
+        Returns:
+            CloudConformity: The client of the region, to call it directly.
+        """
+
+        return(self.clients[region])
+
+    def __fan_out(self, method, *args, **kwargs):
+        """
+        Helper method to call a read method of every regional client concurrently and merge the results.
+
+        Args:
+            method (str): Name of the CloudConformity method.
+
+        Returns:
+            dict: {
+                "data": list of the records of every region, without duplicates,
+                "errors": {region: exception raised by the region}
+            }
+        """
+
+        with ThreadPoolExecutor(max_workers=len(self.clients) or 1) as executor:
+            futures = [
+                (region, executor.submit(getattr(client, method), *args, **kwargs))
+                for region, client in self.clients.items()
+            ]
+
+        data = []
+        errors = {}
+        seen = set()
+        owners = {}
+
+        for region, future in futures:
+            try:
+                records = future.result().get("data") or []
+            except Exception as e:
+                errors[region] = e
+                continue
+
+            for record in records:
+                key = (record.get("type"), record.get("id"))
+                owners.setdefault(record.get("id"), region)
+                if key not in seen:
+                    seen.add(key)
+                    data.append(record)
+
+        with self.__lock:
+            self.__owners.update(owners)
+
+        return({"data": data, "errors": errors})
+
+    def refresh_owners(self):
+        """
+        Update the resource to region map with one concurrent read of the accounts, profiles and
+        communication settings of every region. Concurrent refreshes are coalesced into one.
+
+        Returns:
+            dict: {region: exception} of the regions that could not be read.
+        """
+
+        errors = {}
+        for method in ("list_accounts", "list_profiles", "list_communication_settings"):
+            errors.update(self.__fan_out(method)["errors"])
+
+        with self.__lock:
+            self.__owners_loaded_at = time.monotonic()
+
+        return(errors)
+
+    def region_of(self, resource_id):
+        """
+        Get the region owning an account, profile or communication setting.
+
+        Args:
+            resource_id (str): The Cloud Conformity ID of the resource.
+
+        Returns:
+            str: Name of the region.
+
+        Raises:
+            ValueError: When no region owns the resource.
+        """
+
+        with self.__lock:
+            expired = self.__owners_loaded_at is None or (
+                self.owner_ttl is not None and time.monotonic() - self.__owners_loaded_at >= self.owner_ttl
+            )
+            region = None if expired else self.__owners.get(resource_id)
+
+        if region is None:
+            self.__refresh.do("owners", self.refresh_owners)
+            with self.__lock:
+                region = self.__owners.get(resource_id)
+
+        if region is None:
+            raise ValueError("No region owns {}".format(resource_id))
+
+        return(region)
+
+    def __owner(self, resource_id):
+        """
+        Helper method to get the client of the region owning a resource.
+        """
+
+        return(self.clients[self.region_of(resource_id)])
+
+    def list_accounts(self, aws_account_names=[]):
+        """
+        List the accounts of every region. See CloudConformity.list_accounts.
+
+        Returns:
+            dict: {"data": account records of every region, "errors": {region: exception}}
+        """
+
+        return(self.__fan_out("list_accounts", aws_account_names))
+
+    def list_profiles(self):
+        """
+        List the profiles of every region. See CloudConformity.list_profiles.
+
+        Returns:
+            dict: {"data": profile records of every region, "errors": {region: exception}}
+        """
+
+        return(self.__fan_out("list_profiles"))
+
+    def list_communication_settings(self, channel=None, account_id=None, include_parents=False):
+        """
+        List the communication settings of every region. See CloudConformity.list_communication_settings.
+
+        The settings of an account are only read from the region owning it.
+
+        Returns:
+            dict: {"data": communication setting records of every region, "errors": {region: exception}}
+        """
+
+        if account_id is not None:
+            region = self.region_of(account_id)
+
+            try:
+                response = self.clients[region].list_communication_settings(
+                    channel=channel,
+                    account_id=account_id,
+                    include_parents=include_parents
+                )
+            except Exception as e:
+                return({"data": [], "errors": {region: e}})
+
+            return({"data": response.get("data") or [], "errors": {}})
+
+        return(self.__fan_out("list_communication_settings", channel=channel, include_parents=include_parents))
+
+    def create_account(self, region, aws_account_id, aws_account_name, aws_tag_environment, external_id=None, cost_package=False, subscriptionType="advanced"):
+        """
+        Create a new account in a region. See CloudConformity.create_account.
+
+        Args:
+            region (str): Name of the region to create the account in.
+            external_id (str): The organisation's external ID, fetched from the region when None. (default None)
+        """
+
+        client = self.clients[region]
+
+        if external_id is None:
+            external_id = client.get_organisation_external_id()["data"]["id"]
+
+        response = client.create_account(
+            aws_account_id=aws_account_id,
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            external_id=external_id,
+            cost_package=cost_package,
+            subscriptionType=subscriptionType
+        )
+
+        account = response.get("data")
+        if isinstance(account, dict) and "id" in account:
+            with self.__lock:
+                self.__owners[account["id"]] = region
+
+        return(response)
+
+    def delete_account(self, account_id):
+        """
+        Delete an account in the region owning it. See CloudConformity.delete_account.
+        """
+
+        response = self.__owner(account_id).delete_account(account_id=account_id)
+
+        with self.__lock:
+            self.__owners.pop(account_id, None)
+
+        return(response)
+
+    def update_account(self, account_id, aws_account_name, aws_tag_environment, aws_tag_product_domain):
+        """
+        Update an account in the region owning it. See CloudConformity.update_account.
+        """
+
+        return(self.__owner(account_id).update_account(
+            account_id=account_id,
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            aws_tag_product_domain=aws_tag_product_domain
+        ))
+
+    def update_account_bot_settings(self, account_id, is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
+        """
+        Update the bot settings of an account in the region owning it. See CloudConformity.update_account_bot_settings.
+        """
+
+        return(self.__owner(account_id).update_account_bot_settings(
+            account_id=account_id,
+            is_disabled=is_disabled,
+            disabled_until=disabled_until,
+            scan_interval_hour=scan_interval_hour,
+            disabled_regions=disabled_regions
+        ))
+
+    def create_report_configuration(self, account_id, aws_account_name, recipient_email_addresses):
+        """
+        Create a report configuration in the region owning the account. See CloudConformity.create_report_configuration.
+        """
+
+        return(self.__owner(account_id).create_report_configuration(
+            account_id=account_id,
+            aws_account_name=aws_account_name,
+            recipient_email_addresses=recipient_email_addresses
+        ))
+
+    def delete_communication_setting(self, setting_id):
+        """
+        Delete a communication setting in the region owning it. See CloudConformity.delete_communication_setting.
+        """
+
+        response = self.__owner(setting_id).delete_communication_setting(setting_id=setting_id)
+
+        with self.__lock:
+            self.__owners.pop(setting_id, None)
+
+        return(response)
+
+    def get_profile(self, profile_id):
+        """
+        Get a profile from the region owning it. See CloudConformity.get_profile.
+        """
+
+        return(self.__owner(profile_id).get_profile(profile_id=profile_id))
+
+    def apply_profile_to_accounts(self, profile_id, account_ids, mode="replace"):
+        """
+        Apply a profile to accounts, in the region owning the profile. See CloudConformity.apply_profile_to_accounts.
+
+        Raises:
+            ValueError: When an account is not owned by the region of the profile.
+        """
+
+        region = self.region_of(profile_id)
+
+        for account_id in account_ids:
+            if self.region_of(account_id) != region:
+                raise ValueError("Account {} is not in region {} of profile {}".format(account_id, region, profile_id))
+
+        return(self.clients[region].apply_profile_to_accounts(
+            profile_id=profile_id,
+            account_ids=account_ids,
+            mode=mode
+        ))
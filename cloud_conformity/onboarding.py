@@ -0,0 +1,226 @@
+"""
+Pipelined bulk onboarding of AWS accounts.
+
+Each account is described by a spec:
+
+    {
+        "aws_account_id": "123456789000",
+        "aws_account_name": "aws_alias_1",                  # identifies the account in the results
+        "aws_tag_environment": "production",
+        "cost_package": False,                              # optional, see create_account
+        "subscriptionType": "advanced",                     # optional, see create_account
+        "report_recipients": ["security@example.com"],      # optional, creates a report configuration
+        "bot_settings": {"scan_interval_hour": 6},          # optional, keyword arguments of update_account_bot_settings
+        "profile_id": "profile-id"                          # optional, overrides the profile_id of onboard_accounts
+    }
+
+The steps of an account run in order: create_account, create_report_configuration, update_account_bot_settings.
+Different accounts run concurrently, and the organisation's external ID is fetched once for all of them.
+Profiles are applied in batches: as soon as `chunk_size` accounts using the same profile are created,
+one apply_profile_to_accounts request is sent for all of them, while the other accounts are still being created.
+
+Every completed step is recorded in the returned "progress". Passing it back to onboard_accounts resumes
+the onboarding: completed steps are skipped, and accounts that already exist are not created again.
+The deadline of the calling thread (see CloudConformity.deadline) bounds the whole pipeline: accounts not started
+before it has passed are reported under "skipped", and no profile batch is sent after it.
+"""
+
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+STEPS = ("create_account", "create_report_configuration", "update_account_bot_settings", "apply_profile_to_accounts")
+
+
+def steps_of(spec, profile_id):
+    """
+    Get the steps needed to onboard an account.
+
+    Args:
+        spec (dict): The spec of the account, see the module documentation.
+        profile_id (str): The profile applied to accounts whose spec has no profile_id.
+
+    Returns:
+        list: Names of the steps, in STEPS order.
+    """
+
+    steps = ["create_account"]
+
+    if spec.get("report_recipients"):
+        steps.append("create_report_configuration")
+
+    if spec.get("bot_settings") is not None:
+        steps.append("update_account_bot_settings")
+
+    if spec.get("profile_id", profile_id) is not None:
+        steps.append("apply_profile_to_accounts")
+
+    return(steps)
+
+
+def onboard_accounts(client, specs, profile_id=None, profile_mode="replace", chunk_size=100, max_workers=10, progress=None):
+    """
+    Onboard accounts as a concurrent pipeline. See CloudConformity.onboard_accounts.
+
+    Args:
+        client (CloudConformity): The client sending the requests.
+        specs (list): Specs of the accounts, see the module documentation.
+        profile_id (str): The profile applied to accounts whose spec has no profile_id. (default None)
+        profile_mode (str): Mode of the profile applies, see apply_profile_to_accounts. (default 'replace')
+        chunk_size (int): Maximum number of accounts per profile apply request. (default 100)
+        max_workers (int): Number of requests sent at the same time. (default 10)
+        progress (dict): The "progress" of a previous onboarding of the same specs, to resume it. (default None)
+
+    Returns:
+        dict: See CloudConformity.onboard_accounts.
+    """
+
+    specs = {spec["aws_account_name"]: spec for spec in specs}
+    progress = {
+        name: {
+            "account_id": (progress or {}).get(name, {}).get("account_id"),
+            "completed": list((progress or {}).get(name, {}).get("completed", []))
+        }
+        for name in specs
+    }
+    steps = {name: steps_of(spec, profile_id) for name, spec in specs.items()}
+    pending = [name for name in specs if any(step not in progress[name]["completed"] for step in steps[name])]
+
+    lock = threading.Lock()
+    data = {name: {"account_id": progress[name]["account_id"], "responses": {}} for name in specs}
+    errors = {}
+    skipped = []
+    deadline = client.current_deadline()
+    started_at = {}
+    finished_at = {}
+    batches = {}
+    apply_futures = []
+    external_id = {}
+
+    def complete(name, step, response):
+        with lock:
+            data[name]["responses"][step] = response
+            progress[name]["completed"].append(step)
+            finished_at[name] = time.perf_counter()
+
+    def fail(name, error):
+        with lock:
+            errors.setdefault(name, error)
+            finished_at[name] = time.perf_counter()
+
+    def apply_batch(key, names):
+        try:
+            with client.deadline(deadline):
+                response = client.apply_profile_to_accounts(
+                    profile_id=key[0],
+                    account_ids=[progress[name]["account_id"] for name in names],
+                    mode=key[1]
+                )
+        except Exception as e:
+            for name in names:
+                fail(name, e)
+        else:
+            for name in names:
+                complete(name, "apply_profile_to_accounts", response)
+
+    def submit_batch(key, flush=False):
+        with lock:
+            names = batches.get(key, [])
+            if not names or (not flush and len(names) < chunk_size):
+                return
+            batches[key] = names[chunk_size:]
+            apply_futures.append(executor.submit(apply_batch, key, names[:chunk_size]))
+
+    def onboard_account(name):
+        if deadline is not None and deadline.expired():
+            with lock:
+                skipped.append(name)
+            return
+
+        with client.deadline(deadline):
+            run_account(name)
+
+    def run_account(name):
+        spec = specs[name]
+        completed = progress[name]["completed"]
+        started_at[name] = time.perf_counter()
+
+        try:
+            if "create_account" not in completed:
+                existing = client.account_index.by_aws_account_id(spec["aws_account_id"])
+
+                if existing is not None:
+                    response = {"data": existing}
+                else:
+                    response = client.create_account(
+                        aws_account_id=spec["aws_account_id"],
+                        aws_account_name=name,
+                        aws_tag_environment=spec["aws_tag_environment"],
+                        external_id=external_id["id"],
+                        cost_package=spec.get("cost_package", False),
+                        subscriptionType=spec.get("subscriptionType", "advanced")
+                    )
+
+                with lock:
+                    progress[name]["account_id"] = data[name]["account_id"] = response["data"]["id"]
+                complete(name, "create_account", response)
+
+            account_id = progress[name]["account_id"]
+
+            if "apply_profile_to_accounts" in steps[name] and "apply_profile_to_accounts" not in completed:
+                key = (spec.get("profile_id", profile_id), profile_mode)
+                with lock:
+                    batches.setdefault(key, []).append(name)
+                submit_batch(key)
+
+            if "create_report_configuration" in steps[name] and "create_report_configuration" not in completed:
+                complete(name, "create_report_configuration", client.create_report_configuration(
+                    account_id=account_id,
+                    aws_account_name=name,
+                    recipient_email_addresses=spec["report_recipients"]
+                ))
+
+            if "update_account_bot_settings" in steps[name] and "update_account_bot_settings" not in completed:
+                complete(name, "update_account_bot_settings", client.update_account_bot_settings(
+                    account_id=account_id,
+                    **spec["bot_settings"]
+                ))
+        except Exception as e:
+            fail(name, e)
+
+    start = time.perf_counter()
+
+    if any("create_account" not in progress[name]["completed"] for name in pending):
+        external_id["id"] = client.get_organisation_external_id()["data"]["id"]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        wait([executor.submit(onboard_account, name) for name in pending])
+
+        for key in list(batches):
+            while batches[key]:
+                submit_batch(key, flush=True)
+
+        wait(list(apply_futures))
+
+    latencies = [finished_at[name] - started_at[name] for name in pending if name in finished_at]
+    succeeded = [name for name in specs if name not in errors and all(step in progress[name]["completed"] for step in steps[name])]
+
+    return({
+        "data": {name: data[name] for name in succeeded},
+        "errors": errors,
+        "skipped": skipped,
+        "progress": progress,
+        "meta": {
+            "total": len(specs),
+            "succeeded": len(succeeded),
+            "failed": len(errors),
+            "skipped": len(skipped),
+            "elapsed": time.perf_counter() - start,
+            "latency": {
+                "min": min(latencies) if latencies else 0.0,
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max": max(latencies) if latencies else 0.0
+            }
+        }
+    })
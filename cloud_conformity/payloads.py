@@ -0,0 +1,383 @@
+"""
+Request and response helpers shared by CloudConformity and AsyncCloudConformity.
+
+Every function in this module is free of I/O, so both clients build exactly the same
+endpoints and payloads and shape the responses in exactly the same way.
+"""
+
+import json
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+_encode_string = json.encoder.encode_basestring_ascii
+
+STATUS_MESSAGES = {
+    201: "201 Created",
+    202: "202 Accepted",
+    204: "204 No Content",
+    301: "301 Moved Permanently",
+    304: "304 Not Modified",
+    400: "400 Bad Request",
+    401: "401 Unauthorized",
+    403: "403 Forbidden",
+    404: "404 Not Found",
+    422: "422 Unprocessable Entity",
+    429: "429 Too Many Requests",
+    500: "500 Internal Server Error",
+    502: "502 Bad Gateway",
+    503: "503 Service Unavailable",
+    504: "504 Gateway Timeout",
+}
+
+
+def status_message(status_code):
+    """
+    Get the error message of a status code that the clients treat as a failure.
+
+    Status Code Docs: https://github.com/cloudconformity/documentation-api
+
+    Args:
+        status_code (int): HTTP status code of the response.
+
+    Returns:
+        str: The error message, or an empty string when the status code is not an error.
+    """
+
+    return(STATUS_MESSAGES.get(status_code, ""))
+
+
+def create_account_payload(aws_account_id, aws_account_name, aws_tag_environment, external_id, cost_package=False, subscriptionType="advanced"):
+    """
+    Build the payload of the Create Account API.
+
+    Returns:
+        dict: Request body of POST /v1/accounts.
+    """
+
+    return({
+        "data": {
+            "type": "account",
+            "attributes": {
+                "name": aws_account_name,
+                "environment": aws_tag_environment,
+                "access": {
+                    "keys": {
+                        "roleArn": "arn:aws:iam::{}:role/CloudConformity".format(aws_account_id),
+                        "externalId": external_id
+                    }
+                },
+                "costPackage": cost_package,
+                "subscriptionType": subscriptionType
+            }
+        }
+    })
+
+
+def update_account_payload(aws_account_name, aws_tag_environment, aws_tag_product_domain):
+    """
+    Build the payload of the Update Account API.
+
+    The product domain tag is left out when aws_tag_product_domain is None.
+
+    Returns:
+        dict: Request body of PATCH /v1/accounts/{id}.
+    """
+
+    tags = [aws_tag_environment]
+
+    if aws_tag_product_domain is not None:
+        tags.append(aws_tag_product_domain)
+
+    return({
+        "data": {
+            "attributes": {
+                "name": aws_account_name,
+                "environment": aws_tag_environment,
+                "tags": tags
+            }
+        }
+    })
+
+
+def filter_accounts(response, aws_account_names):
+    """
+    Keep only the accounts whose name is one of aws_account_names.
+
+    Args:
+        response (dict): Response of the List Accounts API.
+        aws_account_names (list): Names to keep. An empty list keeps every account.
+
+    Returns:
+        dict: The filtered response.
+    """
+
+    if len(aws_account_names) == 0:
+        return(response)
+
+    names = set(aws_account_names)
+
+    return({
+        "data": [
+            x for x in response["data"] if x["attributes"]["name"] in names
+        ]
+    })
+
+
+def communication_settings_endpoint(channel=None, account_id=None, include_parents=False):
+    """
+    Build the endpoint of the Get Communication Settings API, including its query string.
+
+    Returns:
+        str: Resource endpoint.
+    """
+
+    endpoint = "/v1/settings/communication"
+
+    if ((channel is not None) or (account_id is not None)):
+        endpoint = "{endpoint}?".format(endpoint=endpoint)
+
+        endpoint = "{endpoint}&accountId={account_id}".format(
+            endpoint=endpoint,
+            account_id=account_id,
+        ) if account_id is not None else endpoint
+
+        endpoint = "{endpoint}&channel={channel}".format(
+            endpoint=endpoint,
+            channel=channel
+        ) if channel is not None else endpoint
+
+        endpoint = "{endpoint}&includeParents={include_parents}".format(
+            endpoint=endpoint,
+            include_parents="true" if include_parents else "false"
+        ) if account_id is not None else endpoint
+
+        endpoint = endpoint.replace("?&", "?")
+
+    return(endpoint)
+
+
+def filter_communication_settings(response, channel):
+    """
+    Keep only the communication settings of a channel.
+
+    There is a bug in the API that `channel` query string doesn't work.
+    This additional processing is to handle the issue.
+
+    Args:
+        response (dict): Response of the Get Communication Settings API.
+        channel (str): The channel to keep. None keeps every setting.
+
+    Returns:
+        dict: The filtered response.
+    """
+
+    if channel is None:
+        return(response)
+
+    return({
+        "data": [x for x in response["data"] if x["attributes"]["channel"] == channel]
+    })
+
+
+def apply_profile_payload(profile_name, account_ids, mode="replace"):
+    """
+    Build the payload of the Apply Profile to Accounts API.
+
+    Returns:
+        dict: Request body of POST /v1/profiles/{id}/apply.
+    """
+
+    return({
+        "meta": {
+            "accountIds": account_ids,
+            "types": ["rule"],
+            "mode": mode,
+            "notes": "Applied from Profile: {profile_name}".format(profile_name=profile_name)
+        }
+    })
+
+
+def report_configuration_payload(account_id, aws_account_name, recipient_email_addresses):
+    """
+    Build the payload of the Create Report Config API.
+
+    Returns:
+        dict: Request body of POST /v1/report-configs.
+    """
+
+    return({
+        "data": {
+            "type": "report-config",
+            "attributes": {
+                "accountId": account_id,
+                "configuration": {
+                    "title": "Cloud Conformity Report for {}".format(aws_account_name),
+                    "scheduled": True,
+                    "frequency": "* * MON",
+                    "tz": "Asia/Jakarta",
+                    "sendEmail": True,
+                    "emails": recipient_email_addresses,
+                    "filter": {
+                        "statuses": [
+                            "FAILURE"
+                        ],
+                        "riskLevels": [
+                            "EXTREME",
+                            "VERY_HIGH",
+                            "HIGH"
+                        ],
+                        "suppressed": False
+                    }
+                }
+            }
+        }
+    })
+
+
+def bot_settings(is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
+    """
+    Build the Conformity Bot settings of the Update Account Bot Setting API.
+
+    Returns:
+        dict: The "bot" member of the request body of PATCH /v1/accounts/{id}/settings/bot.
+    """
+
+    bot_settings = {}
+
+    bot_settings["disabled"] = is_disabled
+
+    if disabled_until is not None:
+        bot_settings["disabledUntil"] = int(disabled_until)
+
+    if scan_interval_hour is not None:
+        bot_settings["delay"] = int(scan_interval_hour)
+
+    if disabled_regions is not None and isinstance(disabled_regions, list):
+        bot_settings["disabledRegions"] = {}
+        if len(disabled_regions) > 0:
+            for region in disabled_regions:
+                bot_settings["disabledRegions"][region] = True
+
+    return(bot_settings)
+
+
+def bot_settings_payload(is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
+    """
+    Build the payload of the Update Account Bot Setting API.
+
+    Returns:
+        dict: Request body of PATCH /v1/accounts/{id}/settings/bot.
+    """
+
+    return({
+        "data": {
+            "type": "accounts",
+            "attributes": {
+                "settings": {
+                    "bot": bot_settings(
+                        is_disabled=is_disabled,
+                        disabled_until=disabled_until,
+                        scan_interval_hour=scan_interval_hour,
+                        disabled_regions=disabled_regions
+                    )
+                }
+            }
+        }
+    })
+
+
+class PayloadTemplate:
+    """
+    Request body of a fixed shape, serialised to JSON once.
+
+    The payload function is called once with a marker for every field, and its JSON is split around the markers.
+    render() then only encodes the values of the fields, with the codec of the client, and joins them with the
+    precomputed text instead of building and serialising the whole payload on every request.
+    A field may be a whole value of the payload, or be formatted into one of its strings.
+
+        template = PayloadTemplate(report_configuration_payload, ("account_id", "aws_account_name", "recipient_email_addresses"))
+        data = template.render(codec, account_id="id", aws_account_name="name", recipient_email_addresses=["a@example.com"])
+
+    Args:
+        build (callable): Payload function, called with the fields as keyword arguments.
+        fields (tuple): Names of the fields that vary between requests.
+    """
+
+    def __init__(self, build, fields):
+        markers = {field: "\x00{}\x00".format(field) for field in fields}
+        text = _encode(build(**markers))
+
+        self.fields = tuple(fields)
+        self.__parts = []
+        self.__slots = []
+
+        while True:
+            found = [(text.find(_encode(marker)[1:-1]), field) for field, marker in markers.items()]
+            found = [(index, field) for index, field in found if index >= 0]
+            if not found:
+                break
+
+            index, field = min(found)
+            token = _encode(markers[field])[1:-1]
+            whole = text[index - 1:index + len(token) + 1] == '"{}"'.format(token)
+
+            if whole:
+                self.__parts.append(text[:index - 1])
+                text = text[index + len(token) + 1:]
+            else:
+                self.__parts.append(text[:index])
+                text = text[index + len(token):]
+
+            self.__slots.append((field, whole))
+
+        self.__parts.append(text)
+        self.__binary_parts = [part.encode("utf-8") for part in self.__parts]
+
+    def render(self, codec=None, **values):
+        """
+        Serialise the payload of a request.
+
+        Args:
+            codec (JSONCodec): Codec encoding the values of the fields, see cloud_conformity.codec.
+                               (default the standard library encoder)
+            **values: The value of every field.
+
+        Returns:
+            str or bytes: The request body, the same JSON as the payload function called with the same values.
+                          It is bytes when the codec encodes to bytes, e.g. OrjsonCodec.
+        """
+
+        if codec is None:
+            pieces = [self.__parts[0]]
+
+            for (field, whole), part in zip(self.__slots, self.__parts[1:]):
+                value = values[field]
+
+                if not whole:
+                    pieces.append(_encode_string(str(value))[1:-1])
+                elif isinstance(value, str):
+                    pieces.append(_encode_string(value))
+                else:
+                    pieces.append(_encode(value))
+
+                pieces.append(part)
+
+            return("".join(pieces))
+
+        encoded = [codec.dumps(values[field]) if whole else codec.dumps(str(values[field]))[1:-1] for field, whole in self.__slots]
+        binary = bool(encoded) and isinstance(encoded[0], bytes)
+        parts = self.__binary_parts if binary else self.__parts
+        pieces = [parts[0]]
+
+        for value, part in zip(encoded, parts[1:]):
+            pieces.append(value)
+            pieces.append(part)
+
+        return((b"" if binary else "").join(pieces))
+
+
+REPORT_CONFIGURATION_TEMPLATE = PayloadTemplate(report_configuration_payload, ("account_id", "aws_account_name", "recipient_email_addresses"))
+
+BOT_SETTINGS_TEMPLATE = PayloadTemplate(
+    lambda bot: {"data": {"type": "accounts", "attributes": {"settings": {"bot": bot}}}},
+    ("bot",)
+)
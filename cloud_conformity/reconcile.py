@@ -0,0 +1,176 @@
+"""
+Desired-state reconciliation of Cloud Conformity accounts.
+
+A desired state describes the accounts of the organisation by name:
+
+    {
+        "accounts": {
+            "aws_alias_1": {
+                "aws_account_id": "123456789000",          # only needed to create a missing account
+                "environment": "production",
+                "product_domain": "abc",
+                "bot_settings": {                          # keyword arguments of update_account_bot_settings
+                    "is_disabled": False,
+                    "scan_interval_hour": 6,
+                    "disabled_regions": ["ap-south-1"]
+                },
+                "communication_channels": ["email"]        # account level settings on other channels are deleted
+            }
+        }
+    }
+
+Every key of an account is optional; missing keys are left as they are.
+plan_reconciliation() compares it with the current state and returns only the calls needed to converge.
+"""
+
+from . import payloads
+
+
+def product_domain(account):
+    """
+    Get the product domain of an account, i.e. its tag which is not its environment.
+
+    Args:
+        account (dict): An account record of the List Accounts API.
+
+    Returns:
+        str: The product domain, or None when the account has no such tag.
+    """
+
+    environment = account["attributes"].get("environment")
+
+    for tag in account["attributes"].get("tags") or []:
+        if tag != environment:
+            return(tag)
+
+    return(None)
+
+
+def bot_settings_differ(current, bot_settings):
+    """
+    Check whether update_account_bot_settings(**bot_settings) would change the current bot settings.
+
+    Args:
+        current (dict): The "settings.bot" attribute of an account record, or None when unknown.
+        bot_settings (dict): Keyword arguments of update_account_bot_settings.
+
+    Returns:
+        bool: True when an update is needed.
+    """
+
+    if not current:
+        return(True)
+
+    desired = payloads.bot_settings(**bot_settings)
+
+    for key, value in desired.items():
+        if key == "disabledRegions":
+            current_regions = set(r for r, disabled in (current.get(key) or {}).items() if disabled)
+            if current_regions != set(value):
+                return(True)
+        elif current.get(key) != value:
+            return(True)
+
+    return(False)
+
+
+def plan_reconciliation(desired, accounts, communication_settings, prune_accounts=False):
+    """
+    Compute the calls needed to bring the current state to the desired state.
+
+    Args:
+        desired (dict): The desired state, see the module documentation.
+        accounts (list): Current account records of the List Accounts API.
+        communication_settings (list): Current communication setting records of every account.
+        prune_accounts (bool): True to delete the accounts missing from the desired state. (default False)
+
+    Returns:
+        list: Planned calls in execution order, each being {"account_name", "account_id", "method", "kwargs"}.
+              "method" is the name of the CloudConformity method to call. "account_id" is None for an account
+              that does not exist yet; it is filled in when the account is created.
+    """
+
+    desired_accounts = desired.get("accounts", {})
+    current_by_name = {account["attributes"]["name"]: account for account in accounts}
+    settings_by_account = {}
+
+    for setting in communication_settings:
+        account = ((setting.get("relationships") or {}).get("account") or {}).get("data")
+        if account:
+            settings_by_account.setdefault(account["id"], []).append(setting)
+
+    plan = []
+
+    for name, spec in desired_accounts.items():
+        current = current_by_name.get(name)
+        account_id = current["id"] if current is not None else None
+
+        if current is None:
+            if spec.get("aws_account_id") is None:
+                raise ValueError("Account {} does not exist and has no aws_account_id to create it".format(name))
+
+            plan.append({
+                "account_name": name,
+                "account_id": None,
+                "method": "create_account",
+                "kwargs": {
+                    "aws_account_id": spec["aws_account_id"],
+                    "aws_account_name": name,
+                    "aws_tag_environment": spec.get("environment"),
+                    "external_id": None
+                }
+            })
+            current = {"attributes": {"name": name, "environment": spec.get("environment"), "tags": []}}
+
+        environment = spec.get("environment", current["attributes"].get("environment"))
+        domain = spec.get("product_domain", product_domain(current))
+        tags = set([environment]) if domain is None else set([environment, domain])
+
+        if ("environment" in spec or "product_domain" in spec) and (
+            environment != current["attributes"].get("environment")
+            or set(current["attributes"].get("tags") or []) != tags
+        ):
+            plan.append({
+                "account_name": name,
+                "account_id": account_id,
+                "method": "update_account",
+                "kwargs": {
+                    "aws_account_name": name,
+                    "aws_tag_environment": environment,
+                    "aws_tag_product_domain": domain
+                }
+            })
+
+        if "bot_settings" in spec and bot_settings_differ(
+            ((current["attributes"].get("settings") or {}).get("bot")),
+            spec["bot_settings"]
+        ):
+            plan.append({
+                "account_name": name,
+                "account_id": account_id,
+                "method": "update_account_bot_settings",
+                "kwargs": dict(spec["bot_settings"])
+            })
+
+        if "communication_channels" in spec and account_id is not None:
+            channels = set(spec["communication_channels"])
+            for setting in settings_by_account.get(account_id, []):
+                if setting["attributes"]["channel"] not in channels:
+                    plan.append({
+                        "account_name": name,
+                        "account_id": account_id,
+                        "method": "delete_communication_setting",
+                        "kwargs": {"setting_id": setting["id"]}
+                    })
+
+    if prune_accounts:
+        for name, account in current_by_name.items():
+            if name not in desired_accounts:
+                plan.append({
+                    "account_name": name,
+                    "account_id": account["id"],
+                    "method": "delete_account",
+                    "kwargs": {}
+                })
+
+    return(plan)
@@ -0,0 +1,219 @@
+import random
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+THROTTLING_STATUS_CODES = (429, 503)
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff and jitter.
+
+    A request is retried when the API answers with one of `retry_statuses`, or when the connection fails.
+    Only idempotent methods are retried on server errors and connection errors, while 429 Too Many Requests
+    is retried for every method because the API did not process the throttled request.
+    The delay before retry n is a random value between 0 and min(max_backoff, backoff_factor * 2 ** (n - 1)),
+    unless the response carries a Retry-After header, which is honoured instead.
+
+    Args:
+        max_retries (int): Maximum number of retries of one request. (default 3)
+        backoff_factor (float): Base delay in seconds of the exponential backoff. (default 0.5)
+        max_backoff (float): Maximum delay in seconds between two attempts, including Retry-After. (default 30)
+        jitter (bool): True to randomise the delay ("full jitter"), False to use the exponential delay as is. (default True)
+        retry_statuses (tuple): Status codes that are retried. (default (429, 500, 502, 503, 504))
+        idempotent_methods (tuple): Methods that are retried on server errors and connection errors.
+                                    (default ("GET", "PATCH", "DELETE"))
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30, jitter=True, retry_statuses=(429, 500, 502, 503, 504), idempotent_methods=("GET", "PATCH", "DELETE")):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = tuple(retry_statuses)
+        self.idempotent_methods = tuple(idempotent_methods)
+
+    def should_retry_status(self, method, status_code, attempt):
+        """
+        Args:
+            method (str): HTTP method of the request.
+            status_code (int): Status code of the response.
+            attempt (int): Number of retries already made.
+
+        Returns:
+            bool: True when the request should be sent again.
+        """
+
+        if attempt >= self.max_retries or status_code not in self.retry_statuses:
+            return(False)
+
+        return(status_code == 429 or method.upper() in self.idempotent_methods)
+
+    def should_retry_error(self, method, attempt):
+        """
+        Args:
+            method (str): HTTP method of the request that failed to connect.
+            attempt (int): Number of retries already made.
+
+        Returns:
+            bool: True when the request should be sent again.
+        """
+
+        return(attempt < self.max_retries and method.upper() in self.idempotent_methods)
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Get the delay before a retry.
+
+        Args:
+            attempt (int): Number of the retry about to be made, starting from 1.
+            retry_after (str): Value of the Retry-After header of the response, if any. (default None)
+
+        Returns:
+            float: Delay in seconds.
+        """
+
+        delay = parse_retry_after(retry_after)
+
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+            if self.jitter:
+                delay = random.uniform(0, delay)
+
+        return(max(0.0, min(self.max_backoff, delay)))
+
+
+def parse_retry_after(retry_after):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        retry_after (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float: Number of seconds to wait, or None when the header is missing or invalid.
+    """
+
+    if not retry_after:
+        return(None)
+
+    try:
+        return(float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        return(parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return(None)
+
+
+class RateLimiter:
+    """
+    Adaptive client-side token bucket rate limiter.
+
+    Every request takes one token. Tokens are refilled at `rate` per second, up to `burst` tokens.
+    The rate adapts to the API: it is halved (multiplicative decrease) when the API throttles a request,
+    and grows back slowly (additive increase) with every successful request, so the callers settle
+    around the highest throughput the API accepts.
+    One instance can be shared by many threads and many clients using the same API key.
+
+    Args:
+        rate (float): Initial number of requests per second. (default 10)
+        burst (float): Maximum number of tokens, i.e. requests that can be sent at once. (default rate)
+        min_rate (float): The rate is never decreased below this value. (default 0.5)
+        max_rate (float): The rate is never increased above this value. (default rate * 4)
+        increase (float): Requests per second added to the rate for every second of successful requests. (default 1)
+        decrease_factor (float): Factor applied to the rate when a request is throttled. (default 0.5)
+        cooldown (float): Throttling signals received within this many seconds after a decrease are ignored,
+                          so a burst of concurrent 429s only decreases the rate once. (default 1)
+    """
+
+    def __init__(self, rate=10, burst=None, min_rate=0.5, max_rate=None, increase=1, decrease_factor=0.5, cooldown=1):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate * 4)
+        self.increase = float(increase)
+        self.decrease_factor = float(decrease_factor)
+        self.cooldown = float(cooldown)
+        self.__tokens = self.burst
+        self.__updated_at = time.monotonic()
+        self.__decreased_at = None
+        self.__lock = threading.Lock()
+
+    def __refill(self, now):
+        """
+        Helper method to add the tokens earned since the last update. Must be called with the lock held.
+        """
+
+        self.__tokens = min(self.burst, self.__tokens + (now - self.__updated_at) * self.rate)
+        self.__updated_at = now
+
+    def reserve(self, timeout=None):
+        """
+        Take one token, borrowing it from the future when the bucket is empty.
+
+        Args:
+            timeout (float): Do not take the token when the caller would have to wait longer than this. (default None)
+
+        Returns:
+            float: Number of seconds the caller must wait before sending its request,
+                   or None when no token was taken because of the timeout.
+        """
+
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+
+            delay = 0.0 if self.__tokens >= 1 else (1 - self.__tokens) / self.rate
+            if timeout is not None and delay > timeout:
+                return(None)
+
+            self.__tokens -= 1
+
+            return(delay)
+
+    def acquire(self, timeout=None):
+        """
+        Take one token, sleeping until it is available.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait. (default None)
+
+        Returns:
+            bool: True when the token was taken, False when it would not have been available in time.
+        """
+
+        delay = self.reserve(timeout=timeout)
+        if delay is None:
+            return(False)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return(True)
+
+    def on_success(self):
+        """
+        Signal a request that was not throttled.
+        """
+
+        with self.__lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        """
+        Signal a request throttled by the API, e.g. 429 Too Many Requests.
+        """
+
+        with self.__lock:
+            now = time.monotonic()
+            if self.__decreased_at is not None and now - self.__decreased_at < self.cooldown:
+                return
+
+            self.__refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.__decreased_at = now
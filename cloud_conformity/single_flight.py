@@ -0,0 +1,67 @@
+import threading
+
+
+class SingleFlight:
+    """
+    Coalescer of concurrent identical calls.
+
+    While a call for a key is in flight, other threads calling do() with the same key do not start their own call:
+    they wait for the one in flight and get its result, or its exception. Once it completes, the next call for
+    the key starts a new one, so nothing is cached beyond the lifetime of a call.
+    Every caller gets the same result object, so the function should return an immutable value: CloudConformity
+    shares the undecoded response body, and each caller decodes its own result from it.
+    It is safe to share between threads.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def do(self, key, function, timeout=None):
+        """
+        Call a function, unless a call for the same key is already in flight.
+
+        Args:
+            key (hashable): Identifies identical calls, e.g. the URL of a GET request.
+            function (callable): Function called without arguments when no call for the key is in flight.
+            timeout (float): Maximum number of seconds to wait for a call in flight. (default None)
+
+        Returns:
+            object: The result of the function.
+
+        Raises:
+            TimeoutError: When the call in flight did not complete within the timeout.
+        """
+
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = {"done": threading.Event(), "result": None, "error": None}
+
+        if not leader:
+            if not call["done"].wait(timeout):
+                raise TimeoutError("Call for {!r} still in flight after {}s".format(key, timeout))
+            if call["error"] is not None:
+                raise call["error"]
+            return(call["result"])
+
+        try:
+            call["result"] = function()
+            return(call["result"])
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call["done"].set()
+
+    def in_flight(self):
+        """
+        Returns:
+            int: Number of calls currently in flight.
+        """
+
+        with self.__lock:
+            return(len(self.__calls))
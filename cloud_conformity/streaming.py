@@ -0,0 +1,219 @@
+"""
+Incremental parsing of JSON:API response bodies.
+
+iter_records() reads a body chunk by chunk and yields the records of its top-level arrays ("data", "included")
+one at a time, so memory is bounded by the largest record rather than by the whole body.
+"""
+
+import codecs
+import json
+import re
+
+WHITESPACE = " \t\n\r"
+
+# Everything but brackets, braces and the opening quote of a string not complete in the buffer.
+# The patterns are unrolled so that they never backtrack, whatever the length of the strings.
+_OUTSIDE_STRINGS = re.compile(r'[^\[\]{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^\[\]{}"]*)*')
+# The rest of a string, up to its closing quote or the end of the buffer.
+_INSIDE_STRING = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+# A number, true, false or null, up to the character following it.
+_SCALAR = re.compile(r'[^,:\]}\s]*')
+
+
+class _Buffer:
+    """
+    Text buffer filled on demand from an iterator of byte chunks.
+
+    Args:
+        chunks (iterable): Byte chunks of a UTF-8 body.
+        compact_size (int): Number of consumed characters above which they are dropped from the buffer.
+    """
+
+    def __init__(self, chunks, compact_size=1 << 16):
+        self.text = ""
+        self.pos = 0
+        self.compact_size = compact_size
+        self.__chunks = iter(chunks)
+        self.__decoder = codecs.getincrementaldecoder("utf-8")()
+        self.__eof = False
+
+    def fill(self):
+        """
+        Append the next chunk to the buffer.
+
+        Returns:
+            bool: False when the body is exhausted.
+        """
+
+        if self.__eof:
+            return(False)
+
+        if self.pos >= self.compact_size:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+        for chunk in self.__chunks:
+            if chunk:
+                self.text += self.__decoder.decode(chunk)
+                return(True)
+
+        self.text += self.__decoder.decode(b"", final=True)
+        self.__eof = True
+
+        return(False)
+
+    def peek(self):
+        """
+        Skip whitespace and get the next character without consuming it.
+
+        Returns:
+            str: The character, or "" at the end of the body.
+        """
+
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return(self.text[self.pos:self.pos + 1])
+
+    def expect(self, characters):
+        """
+        Consume the next non-whitespace character, which must be one of characters.
+
+        Returns:
+            str: The character consumed.
+
+        Raises:
+            ValueError: When the next character is not expected.
+        """
+
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError("Expected one of {!r} at offset {}, got {!r}".format(characters, self.pos, character))
+        self.pos += 1
+
+        return(character)
+
+    def end_of_value(self):
+        """
+        Find the end of the value starting at the current position, reading more chunks until it is complete.
+        Bracket depth and string state are carried over between chunks, so every character is scanned once
+        whatever the size of the value.
+
+        Returns:
+            int: The position following the value, or None when the body ends before the value does.
+        """
+
+        index = self.pos
+        depth = 0
+        in_string = self.text[index] == '"'
+        scalar = self.text[index] not in '{["'
+
+        if in_string:
+            index += 1
+
+        while True:
+            text = self.text
+
+            if scalar:
+                index = _SCALAR.match(text, index).end()
+                if index < len(text):
+                    return(index)
+            elif in_string:
+                index = _INSIDE_STRING.match(text, index).end()
+                if index < len(text) and text[index] == '"':
+                    index += 1
+                    in_string = False
+                    if not depth:
+                        return(index)
+                    continue
+            else:
+                index = _OUTSIDE_STRINGS.match(text, index).end()
+                if index < len(text):
+                    character = text[index]
+                    index += 1
+                    if character == '"':
+                        in_string = True
+                    elif character in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if not depth:
+                            return(index)
+                    continue
+
+            offset = index - self.pos
+            if not self.fill():
+                return(None)
+            index = self.pos + offset
+
+    def value(self, decoder):
+        """
+        Consume and decode the next JSON value, reading more chunks while it is incomplete.
+
+        Returns:
+            object: The decoded value.
+        """
+
+        character = self.peek()
+
+        if character and character in '{["':
+            # Usually complete in the buffer already.
+            try:
+                value, self.pos = decoder.raw_decode(self.text, self.pos)
+                return(value)
+            except json.JSONDecodeError:
+                pass
+
+        # Decoded once complete: decoding again on every chunk would be quadratic in the size of the value.
+        if character:
+            self.end_of_value()
+
+        value, self.pos = decoder.raw_decode(self.text, self.pos)
+
+        return(value)
+
+
+def iter_records(chunks, keys=("data", "included")):
+    """
+    Yield the records of the top-level arrays of a JSON:API body while it is being received.
+
+    Top-level values which are not arrays listed in keys (e.g. "meta", "links", or a single "data" record) are
+    decoded as a whole and yielded as one record.
+
+    Args:
+        chunks (iterable): Byte chunks of the body, e.g. response.iter_content(65536).
+        keys (tuple): Top-level members whose array items are yielded one by one. (default ("data", "included"))
+
+    Yields:
+        tuple: (top-level member, record)
+
+    Raises:
+        ValueError: When the body is not a JSON object, or is truncated.
+    """
+
+    buffer = _Buffer(chunks)
+    decoder = json.JSONDecoder()
+
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+
+    while True:
+        key = buffer.value(decoder)
+        buffer.expect(":")
+
+        if key in keys and buffer.peek() == "[":
+            buffer.expect("[")
+            if buffer.peek() == "]":
+                buffer.expect("]")
+            else:
+                while True:
+                    yield(key, buffer.value(decoder))
+                    if buffer.expect(",]") == "]":
+                        break
+        else:
+            yield(key, buffer.value(decoder))
+
+        if buffer.expect(",}") == "}":
+            return
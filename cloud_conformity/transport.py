@@ -0,0 +1,235 @@
+import gzip
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .instrumentation import InstrumentedHTTPAdapter
+
+HOP_BY_HOP_HEADERS = ("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade")
+
+
+def compress_body(data, headers, min_size):
+    """
+    Gzip a request body when it is large enough to be worth it.
+
+    Args:
+        data (str or bytes): Request body, or None.
+        headers (dict): Request headers. "Content-Encoding" is added to them when the body is compressed.
+        min_size (int): Size in bytes below which the body is sent as it is.
+
+    Returns:
+        bytes or str: The body to send.
+    """
+
+    if data is None:
+        return(data)
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    if len(data) < min_size:
+        return(data)
+
+    headers["Content-Encoding"] = "gzip"
+
+    return(gzip.compress(data, compresslevel=6))
+
+
+class Transport:
+    """
+    Base class of the transports sending the HTTP requests of CloudConformity.
+
+    A transport holds the connections and nothing else: authentication, retries, rate limiting and caching stay
+    in the client, which passes every header with every request. A transport must be safe to share between threads.
+
+    Args:
+        compress_requests (bool): True to gzip request bodies of at least compress_min_size bytes. Responses are
+                                  always requested gzip-compressed and decompressed transparently. (default False)
+        compress_min_size (int): Size in bytes from which request bodies are compressed. (default 1024)
+    """
+
+    def __init__(self, compress_requests=False, compress_min_size=1024):
+        self.compress_requests = compress_requests
+        self.compress_min_size = compress_min_size
+
+    def prepare(self, data, headers):
+        """
+        Get the body and headers to send, compressing the body when enabled.
+
+        Args:
+            data (str or bytes): Request body serialised to JSON, or None.
+            headers (dict): Request headers.
+
+        Returns:
+            tuple: (body, headers)
+        """
+
+        headers = dict(headers)
+        headers.setdefault("Accept-Encoding", "gzip")
+
+        if self.compress_requests:
+            data = compress_body(data, headers, self.compress_min_size)
+
+        return(data, headers)
+
+    def request(self, method, url, data=None, headers=None, timeout=None, stream=False):
+        """
+        Send a request.
+
+        Args:
+            method (str): HTTP method, e.g. "GET" or "PATCH".
+            url (str): Full URL of the request.
+            data (str or bytes): Request body serialised to JSON, or None. (default None)
+            headers (dict): Every header of the request. (default None)
+            timeout (float or tuple): Timeout in seconds, or a (connect timeout, read timeout) tuple. (default None)
+            stream (bool): True to return as soon as the headers are received, the body being read through
+                           response.iter_content(). The response must then be closed. (default False)
+
+        Returns:
+            requests.Response: The response, with its body already read unless stream is True.
+
+        Raises:
+            requests.exceptions.ConnectionError: When the API cannot be reached.
+            requests.exceptions.Timeout: When the request times out.
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Close every connection held by the transport.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 transport sending requests through one requests.Session and its urllib3 connection pool.
+
+    Each connection carries one request at a time, so concurrent requests use up to pool_maxsize connections.
+
+    Args:
+        pool_maxsize (int): Maximum number of connections kept open per host. (default 10)
+        pool_connections (int): Number of hosts whose connection pools are kept. Requests to more hosts evict
+                                the least recently used pool, closing its connections. (default 1)
+        pool_block (bool): True to make requests wait for a free connection once pool_maxsize connections are in use,
+                           False to open extra, non-pooled connections instead. (default False)
+        instrumented (bool): True to measure the time spent waiting for a pooled connection. See Instrumentation. (default False)
+        compress_requests (bool): See Transport. (default False)
+        compress_min_size (int): See Transport. (default 1024)
+    """
+
+    def __init__(self, pool_maxsize=10, pool_block=False, instrumented=False, compress_requests=False, compress_min_size=1024, pool_connections=1):
+        super().__init__(compress_requests=compress_requests, compress_min_size=compress_min_size)
+
+        adapter = (InstrumentedHTTPAdapter if instrumented else HTTPAdapter)(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, data=None, headers=None, timeout=None, stream=False):
+        data, headers = self.prepare(data, headers or {})
+
+        return(self.session.request(method, url, data=data, headers=headers, timeout=timeout, stream=stream))
+
+    def close(self):
+        self.session.close()
+
+
+class _HTTPXStream:
+    """
+    File-like wrapper of a streamed httpx response, read by requests.Response.iter_content().
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+    def stream(self, chunk_size, decode_content=True):
+        import httpx
+
+        try:
+            for chunk in self.response.iter_bytes(chunk_size):
+                yield(chunk)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def close(self):
+        self.response.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 transport sending requests through one httpx.Client.
+
+    HTTP/2 multiplexes concurrent requests over a single connection per host, so a large fan-out needs one socket
+    instead of one per thread. Hosts that do not negotiate HTTP/2 are spoken to in HTTP/1.1.
+    Responses are returned as requests.Response, and errors raised as requests exceptions, so the client behaves
+    the same whatever the transport.
+
+    The httpx and h2 packages are required: pip install cloud-conformity[http2]
+    They are imported when the first HTTP2Transport is created, not with the module.
+
+    Args:
+        max_connections (int): Maximum number of connections kept open. (default 10)
+        compress_requests (bool): See Transport. (default False)
+        compress_min_size (int): See Transport. (default 1024)
+    """
+
+    def __init__(self, max_connections=10, compress_requests=False, compress_min_size=1024):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("HTTP2Transport requires httpx and h2: pip install cloud-conformity[http2]")
+
+        super().__init__(compress_requests=compress_requests, compress_min_size=compress_min_size)
+
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=None
+        )
+
+    def request(self, method, url, data=None, headers=None, timeout=None, stream=False):
+        import httpx
+
+        data, headers = self.prepare(data, headers or {})
+        headers = {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+        try:
+            received = self.client.send(
+                self.client.build_request(method, url, content=data, headers=headers, timeout=timeout),
+                stream=stream
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        response = requests.Response()
+        response.status_code = received.status_code
+        response.reason = received.reason_phrase
+        response.headers = CaseInsensitiveDict(received.headers.items())
+        response.url = str(received.url)
+        response.encoding = received.encoding
+
+        if stream:
+            response.raw = _HTTPXStream(received)
+        else:
+            response.elapsed = received.elapsed
+            response._content = received.content
+
+        return(response)
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,204 @@
+"""
+Change-watch of accounts and communication settings.
+
+A Watcher polls resources and compares each poll with the previous snapshot, emitting one event per record:
+
+    {"resource": "accounts", "type": "added", "id": "account-id", "record": {...}, "previous": None, "fields": []}
+    {"resource": "accounts", "type": "changed", "id": "account-id", "record": {...}, "previous": {...},
+     "fields": ["attributes.name", "attributes.settings"]}
+    {"resource": "accounts", "type": "removed", "id": "account-id", "record": None, "previous": {...}, "fields": []}
+
+The snapshot keeps a hash of every record, so an unchanged record costs one hash comparison. Field hashes are computed
+only for records whose hash changed, to name the changed fields. The polling interval adapts to the change rate:
+it shrinks when changes are seen and grows while nothing changes.
+"""
+
+import hashlib
+import json
+import threading
+
+
+def value_hash(value):
+    """
+    Args:
+        value (object): A JSON value.
+
+    Returns:
+        str: A hash of the value, independent of the order of its keys.
+    """
+
+    return(hashlib.blake2b(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8"), digest_size=16).hexdigest())
+
+
+def field_hashes(record):
+    """
+    Hash every field of a record: each attribute under "attributes.<name>", and each other top-level member.
+
+    Args:
+        record (dict): A JSON:API record.
+
+    Returns:
+        dict: {field: hash}
+    """
+
+    hashes = {}
+
+    for key, value in record.items():
+        if key == "attributes" and isinstance(value, dict):
+            for name, attribute in value.items():
+                hashes["attributes.{}".format(name)] = value_hash(attribute)
+        else:
+            hashes[key] = value_hash(value)
+
+    return(hashes)
+
+
+def diff_snapshot(resource, snapshot, records):
+    """
+    Compare records with a snapshot.
+
+    Args:
+        resource (str): Name of the resource, copied into the events.
+        snapshot (dict): {record id: {"hash", "fields", "record"}} of the previous poll.
+        records (list): Records of the current poll.
+
+    Returns:
+        tuple: (events, new snapshot)
+    """
+
+    events = []
+    current = {}
+
+    for record in records:
+        record_id = record["id"]
+        digest = value_hash(record)
+        previous = snapshot.get(record_id)
+
+        if previous is not None and previous["hash"] == digest:
+            current[record_id] = previous
+            continue
+
+        entry = current[record_id] = {"hash": digest, "fields": None, "record": record}
+
+        if previous is None:
+            events.append({"resource": resource, "type": "added", "id": record_id, "record": record, "previous": None, "fields": []})
+            continue
+
+        entry["fields"] = field_hashes(record)
+        before = previous["fields"] if previous["fields"] is not None else field_hashes(previous["record"])
+
+        events.append({
+            "resource": resource,
+            "type": "changed",
+            "id": record_id,
+            "record": record,
+            "previous": previous["record"],
+            "fields": sorted(field for field in set(entry["fields"]) | set(before) if entry["fields"].get(field) != before.get(field))
+        })
+
+    for record_id, previous in snapshot.items():
+        if record_id not in current:
+            events.append({"resource": resource, "type": "removed", "id": record_id, "record": None, "previous": previous["record"], "fields": []})
+
+    return(events, current)
+
+
+class Watcher:
+    """
+    Poller emitting the changes of resources between polls.
+
+    Get one with CloudConformity.watcher(), then either call poll() from your own loop or iterate watch():
+
+        for event in cc.watcher().watch():
+            print(event["type"], event["resource"], event["id"], event["fields"])
+
+    Args:
+        fetch (callable): Function called with a resource name, returning its records, or None when the resource
+                          did not change since the previous call (e.g. 304 Not Modified).
+        resources (tuple): Names of the resources to watch.
+        min_interval (float): Shortest number of seconds between two polls. (default 5)
+        max_interval (float): Longest number of seconds between two polls. (default 300)
+        backoff (float): Factor applied to the interval after a poll without change. (default 1.5)
+        speedup (float): Factor applied to the interval after a poll with changes. (default 0.5)
+        emit_initial (bool): True to emit an "added" event for every record of the first poll,
+                             False to only take the first poll as the baseline. (default False)
+    """
+
+    def __init__(self, fetch, resources, min_interval=5, max_interval=300, backoff=1.5, speedup=0.5, emit_initial=False):
+        self.resources = tuple(resources)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.speedup = speedup
+        self.emit_initial = emit_initial
+        self.interval = min_interval
+        self.polls = 0
+        self.__fetch = fetch
+        self.__snapshots = {}
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+
+    def poll(self):
+        """
+        Poll every resource once and adapt the interval.
+
+        Returns:
+            list: The events since the previous poll.
+        """
+
+        events = []
+
+        with self.__lock:
+            for resource in self.resources:
+                records = self.__fetch(resource)
+                if records is None:
+                    continue
+
+                resource_events, self.__snapshots[resource] = diff_snapshot(resource, self.__snapshots.get(resource, {}), records)
+
+                if self.polls or self.emit_initial:
+                    events += resource_events
+
+            if events:
+                self.interval = max(self.min_interval, self.interval * self.speedup)
+            elif self.polls:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+            self.polls += 1
+
+        return(events)
+
+    def watch(self):
+        """
+        Poll forever, sleeping the adaptive interval between polls, until stop() is called.
+
+        Yields:
+            dict: Every event, see the cloud_conformity.watch module.
+        """
+
+        self.__stopped.clear()
+
+        while not self.__stopped.is_set():
+            for event in self.poll():
+                yield(event)
+
+            self.__stopped.wait(self.interval)
+
+    def stop(self):
+        """
+        Make watch() return after its current poll.
+        """
+
+        self.__stopped.set()
+
+    def snapshot(self, resource):
+        """
+        Args:
+            resource (str): Name of a watched resource.
+
+        Returns:
+            list: The records of the resource at the last poll.
+        """
+
+        with self.__lock:
+            return([entry["record"] for entry in self.__snapshots.get(resource, {}).values()])
@@ -0,0 +1,156 @@
+import threading
+
+from . import payloads
+
+
+class WriteBuffer:
+    """
+    Buffer that coalesces account writes before sending them.
+
+    update_account and update_account_bot_settings calls are not sent right away. They are merged per account,
+    later values overriding earlier ones exactly as if the calls had been sent one after the other. flush() then sends
+    at most one attribute PATCH and one bot settings PATCH per account, concurrently.
+    The buffer flushes itself when `max_pending` accounts are pending, and every `flush_interval` seconds when set.
+    Writes a flush could not start before the deadline (see CloudConformity.deadline) stay pending for the next flush.
+    It is safe to share between threads.
+
+    Get one with CloudConformity.write_buffer() and use it as a context manager to flush on exit:
+
+        with cc.write_buffer() as writes:
+            writes.update_account_bot_settings(account_id, scan_interval_hour=6)
+            writes.update_account_bot_settings(account_id, disabled_regions=["ap-south-1"])
+
+    Args:
+        flush (callable): Function sending the pending writes, called with
+                          {account_id: {"attributes": dict or None, "bot": dict or None}}. It returns the flush result.
+        max_pending (int): Number of pending accounts that triggers a flush. (default 100)
+        flush_interval (float): Seconds between two automatic flushes, None to only flush on demand or on size. (default None)
+    """
+
+    def __init__(self, flush, max_pending=100, flush_interval=None):
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.errors = {}
+        self.__flush = flush
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__thread = None
+
+        if flush_interval is not None:
+            self.__thread = threading.Thread(target=self.__flush_periodically, daemon=True)
+            self.__thread.start()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __flush_periodically(self):
+        """
+        Helper method flushing the buffer every flush_interval seconds until the buffer is closed.
+        """
+
+        while not self.__closed.wait(self.flush_interval):
+            self.flush()
+
+    def __add(self, account_id, key, values):
+        """
+        Helper method to merge values into the pending writes of an account, then flush when the buffer is full.
+        """
+
+        with self.__lock:
+            pending = self.__pending.setdefault(account_id, {"attributes": None, "bot": None})
+            pending[key] = dict(pending[key] or {}, **values)
+            full = len(self.__pending) >= self.max_pending
+
+        if full:
+            self.flush()
+
+    def update_account(self, account_id, aws_account_name, aws_tag_environment, aws_tag_product_domain):
+        """
+        Buffer an update of the account name, environment, and code. See CloudConformity.update_account.
+        """
+
+        self.__add(account_id, "attributes", payloads.update_account_payload(
+            aws_account_name=aws_account_name,
+            aws_tag_environment=aws_tag_environment,
+            aws_tag_product_domain=aws_tag_product_domain
+        )["data"]["attributes"])
+
+    def update_account_bot_settings(self, account_id, is_disabled=False, disabled_until=None, scan_interval_hour=None, disabled_regions=None):
+        """
+        Buffer an update of Conformity Bot settings. See CloudConformity.update_account_bot_settings.
+        """
+
+        self.__add(account_id, "bot", payloads.bot_settings(
+            is_disabled=is_disabled,
+            disabled_until=disabled_until,
+            scan_interval_hour=scan_interval_hour,
+            disabled_regions=disabled_regions
+        ))
+
+    def pending(self):
+        """
+        Returns:
+            int: Number of accounts with pending writes.
+        """
+
+        with self.__lock:
+            return(len(self.__pending))
+
+    def flush(self):
+        """
+        Send the pending writes now.
+
+        Errors are returned and also kept in self.errors, so errors of automatic flushes are not lost.
+        The writes of the accounts under "skipped" are put back into the buffer, under the writes buffered
+        since the flush started.
+
+        Returns:
+            dict: The result of the flush function, see CloudConformity.write_buffer.
+        """
+
+        with self.__flush_lock:
+            with self.__lock:
+                pending, self.__pending = self.__pending, {}
+
+            if not pending:
+                return({
+                    "data": {},
+                    "errors": {},
+                    "skipped": [],
+                    "meta": {"total": 0, "succeeded": 0, "failed": 0, "skipped": 0, "elapsed": 0.0, "latency": {"min": 0.0, "mean": 0.0, "max": 0.0}}
+                })
+
+            result = self.__flush(pending)
+            self.errors.update(result["errors"])
+
+            if result["skipped"]:
+                with self.__lock:
+                    for account_id in result["skipped"]:
+                        writes = self.__pending.setdefault(account_id, {"attributes": None, "bot": None})
+                        for key, values in pending[account_id].items():
+                            if values is not None:
+                                writes[key] = dict(values, **(writes[key] or {}))
+
+            return(result)
+
+    def close(self):
+        """
+        Stop the automatic flushes and flush the pending writes.
+
+        Writes skipped by the deadline are still pending afterwards, see pending().
+
+        Returns:
+            dict: The result of the last flush.
+        """
+
+        self.__closed.set()
+
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+        return(self.flush())
@@ -23,26 +23,31 @@ if __name__ == "__main__":
 
     cc_account_ids = [x["id"] for x in data]
 
-    for account_id in cc_account_ids:
-        data = cc.update_account_bot_settings(
-            account_id=account_id,
-            is_disabled=False,
-            disabled_until=None,
-            scan_interval_hour=6,
-            disabled_regions=[
-                "eu-north-1",
-                "ap-northeast-1",
-                "ap-northeast-2",
-                "ap-south-1",
-                "ap-southeast-2",
-                "ca-central-1",
-                "eu-central-1",
-                "eu-west-1",
-                "eu-west-2",
-                "eu-west-3",
-                "sa-east-1",
-                "us-east-2",
-                "us-west-1",
-                "us-west-2"
-            ]
-        )
+    result = cc.bulk_update_account_bot_settings(
+        account_ids=cc_account_ids,
+        is_disabled=False,
+        disabled_until=None,
+        scan_interval_hour=6,
+        disabled_regions=[
+            "eu-north-1",
+            "ap-northeast-1",
+            "ap-northeast-2",
+            "ap-south-1",
+            "ap-southeast-2",
+            "ca-central-1",
+            "eu-central-1",
+            "eu-west-1",
+            "eu-west-2",
+            "eu-west-3",
+            "sa-east-1",
+            "us-east-2",
+            "us-west-1",
+            "us-west-2"
+        ],
+        max_workers=10
+    )
+
+    for account_id, error in result["errors"].items():
+        print("Failed to update {}: {}".format(account_id, error))
+
+    print("Updated {succeeded}/{total} accounts in {elapsed:.2f}s".format(**result["meta"]))
@@ -7,8 +7,8 @@ with open(path.join(this_directory, 'README.md'), encoding='utf-8') as f:
 
 setup(
     name="cloud-conformity",
-    version="1.0.3",
-    packages=find_packages(),
+    version="1.1.0",
+    packages=find_packages(exclude=("tests", "tests.*")),
     url="https://github.com/traveloka/cloud-conformity-python-library",
     license="Apache License 2.0",
     author="Rafi Kurnia Putra",
@@ -19,5 +19,10 @@ setup(
     install_requires=[
         "requests==2.23.0"
     ],
-    python_requires=">=3",
+    extras_require={
+        "async": ["aiohttp>=3.6"],
+        "http2": ["httpx[http2]>=0.18"],
+        "fast": ["orjson>=3"],
+    },
+    python_requires=">=3.7",
 )
@@ -0,0 +1,117 @@
+import unittest
+
+from unittest import mock
+
+from cloud_conformity.account_index import AccountIndex
+
+
+def account(account_id, name, environment="production", aws_account_id=None):
+    attributes = {"name": name, "environment": environment}
+    if aws_account_id is not None:
+        attributes["access"] = {"keys": {"roleArn": "arn:aws:iam::{}:role/CloudConformity".format(aws_account_id)}}
+    return({"type": "accounts", "id": account_id, "attributes": attributes})
+
+
+class AccountIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("cloud_conformity.account_index.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetches = 0
+        self.records = [
+            account("a", "alias-a", "production", "123456789000"),
+            account("b", "alias-b", "staging", "000000000042")
+        ]
+
+    def fetch(self):
+        self.fetches += 1
+        return(list(self.records))
+
+    def test_lookups(self):
+        index = AccountIndex(fetch=self.fetch)
+
+        self.assertEqual(index.by_id("a")["id"], "a")
+        self.assertEqual(index.by_name("alias-b")["id"], "b")
+        self.assertEqual(index.by_aws_account_id(42)["id"], "b")
+        self.assertEqual(index.by_aws_account_id("123456789000")["id"], "a")
+        self.assertEqual([record["id"] for record in index.by_environment("staging")], ["b"])
+        self.assertIsNone(index.by_name("missing"))
+        self.assertEqual(self.fetches, 1)
+
+    def test_accounts_are_fetched_again_after_the_ttl(self):
+        index = AccountIndex(fetch=self.fetch, ttl=60)
+        index.by_id("a")
+
+        self.now += 59
+        index.by_id("a")
+        self.assertEqual(self.fetches, 1)
+
+        self.now += 1
+        self.records.append(account("c", "alias-c"))
+        self.assertEqual(index.by_id("c")["id"], "c")
+        self.assertEqual(self.fetches, 2)
+
+    def test_no_ttl_keeps_accounts_until_invalidated(self):
+        index = AccountIndex(fetch=self.fetch, ttl=None)
+        index.accounts()
+
+        self.now += 10 ** 6
+        index.accounts()
+        self.assertEqual(self.fetches, 1)
+
+        index.invalidate()
+        index.accounts()
+        self.assertEqual(self.fetches, 2)
+
+    def test_upsert_replaces_every_lookup(self):
+        index = AccountIndex(fetch=self.fetch)
+        index.accounts()
+
+        index.upsert(account("a", "renamed", "staging", "123456789000"))
+
+        self.assertIsNone(index.by_name("alias-a"))
+        self.assertEqual(index.by_name("renamed")["id"], "a")
+        self.assertEqual(index.by_environment("production"), [])
+        self.assertEqual(sorted(record["id"] for record in index.by_environment("staging")), ["a", "b"])
+        self.assertEqual(index.by_aws_account_id("123456789000")["attributes"]["name"], "renamed")
+
+    def test_upsert_adds_new_accounts(self):
+        index = AccountIndex(fetch=self.fetch)
+        index.accounts()
+
+        index.upsert(account("c", "alias-c"))
+
+        self.assertEqual(index.by_name("alias-c")["id"], "c")
+        self.assertEqual(len(index.accounts()), 3)
+        self.assertEqual(self.fetches, 1)
+
+    def test_upsert_before_loading_is_ignored(self):
+        index = AccountIndex(fetch=self.fetch)
+
+        index.upsert(account("c", "alias-c"))
+
+        self.assertIsNone(index.by_id("c"))
+        self.assertEqual(self.fetches, 1)
+
+    def test_remove(self):
+        index = AccountIndex(fetch=self.fetch)
+        index.accounts()
+
+        index.remove("a")
+        index.remove("missing")
+
+        self.assertIsNone(index.by_id("a"))
+        self.assertIsNone(index.by_name("alias-a"))
+        self.assertIsNone(index.by_aws_account_id("123456789000"))
+        self.assertEqual(index.by_environment("production"), [])
+        self.assertEqual([record["id"] for record in index.accounts()], ["b"])
+
+    def test_account_without_role_arn(self):
+        self.assertIsNone(AccountIndex.aws_account_id(account("a", "alias-a")))
+        self.assertIsNone(AccountIndex.aws_account_id({"attributes": {"access": None}}))
+
+
+if __name__ == "__main__":
+    unittest.main()
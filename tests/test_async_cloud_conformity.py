@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+import unittest
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    aiohttp = None
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class AsyncCloudConformityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockCloudConformityServer(accounts=5).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def run_client(self, function):
+        from cloud_conformity import AsyncCloudConformity
+
+        async def run():
+            async with AsyncCloudConformity(api_key="test", api_endpoint=self.mock.url) as acc:
+                return(await function(acc))
+
+        return(asyncio.run(run()))
+
+    def test_http_error_carries_a_requests_response(self):
+        with self.assertRaises(requests.exceptions.HTTPError) as raised:
+            self.run_client(lambda acc: acc.get_profile("missing"))
+
+        response = raised.exception.response
+        self.assertIsInstance(response, requests.Response)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["errors"][0]["status"], 404)
+        self.assertTrue(response.url.endswith("/v1/profiles/missing"))
+
+    def test_get_profile_metadata(self):
+        metadata = self.run_client(lambda acc: acc.get_profile_metadata("profile-0"))
+
+        self.assertEqual(metadata["id"], "profile-0")
+        self.assertNotIn("included", metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
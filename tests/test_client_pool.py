@@ -0,0 +1,29 @@
+import unittest
+
+from cloud_conformity.client_pool import ClientPool
+
+
+class ClientPoolTest(unittest.TestCase):
+
+    def test_one_connection_pool_per_endpoint(self):
+        with ClientPool("https://eu-west-1-api.example.com", api_endpoints=["https://us-west-2-api.example.com"]) as pool:
+            adapter = pool.transport.session.get_adapter("https://eu-west-1-api.example.com")
+
+            self.assertEqual(adapter.poolmanager.pools._maxsize, 2)
+
+    def test_clients_are_per_api_key_and_endpoint(self):
+        with ClientPool("https://eu-west-1-api.example.com", api_endpoints=["https://us-west-2-api.example.com"]) as pool:
+            client = pool.client("key-a")
+
+            self.assertIs(pool.client("key-a"), client)
+            self.assertIsNot(pool.client("key-b"), client)
+            self.assertEqual(pool.client("key-a", api_endpoint="https://us-west-2-api.example.com").api_endpoint, "https://us-west-2-api.example.com")
+
+    def test_unknown_endpoint_is_refused(self):
+        with ClientPool("https://eu-west-1-api.example.com") as pool:
+            with self.assertRaises(ValueError):
+                pool.client("key-a", api_endpoint="https://us-west-2-api.example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
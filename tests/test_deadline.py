@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+from cloud_conformity import CloudConformity  # noqa: E402
+from cloud_conformity.deadline import Deadline, DeadlineExceeded  # noqa: E402
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_timeouts_are_shortened_to_the_remaining_budget(self):
+        deadline = Deadline(5)
+
+        self.assertLessEqual(deadline.timeout(None), 5)
+        self.assertEqual(deadline.timeout(1), 1)
+        self.assertLessEqual(deadline.timeout(60), 5)
+        connect, read = deadline.timeout((1, 60))
+        self.assertEqual(connect, 1)
+        self.assertLessEqual(read, 5)
+
+    def test_expired_deadline(self):
+        deadline = Deadline(0)
+
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertGreater(deadline.timeout(10), 0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check()
+
+
+class NestedDeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cc = CloudConformity(api_key="test", api_endpoint="http://127.0.0.1:1")
+
+    def tearDown(self):
+        self.cc.close()
+
+    def test_inner_deadline_does_not_extend_the_outer_one(self):
+        with self.cc.deadline(1) as outer:
+            with self.cc.deadline(60) as inner:
+                self.assertIs(inner, outer)
+                self.assertIs(self.cc.current_deadline(), outer)
+
+    def test_inner_deadline_can_shorten_the_outer_one(self):
+        with self.cc.deadline(60) as outer:
+            with self.cc.deadline(1) as inner:
+                self.assertLess(inner.expires_at, outer.expires_at)
+                self.assertIs(self.cc.current_deadline(), inner)
+            self.assertIs(self.cc.current_deadline(), outer)
+
+        self.assertIsNone(self.cc.current_deadline())
+
+    def test_none_keeps_the_current_deadline(self):
+        with self.cc.deadline(1) as outer:
+            with self.cc.deadline(None) as inner:
+                self.assertIs(inner, outer)
+
+    def test_expired_deadline_raises_before_sending(self):
+        with self.assertRaises(DeadlineExceeded):
+            with self.cc.deadline(0):
+                self.cc.list_accounts()
+
+
+class DeadlineRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockCloudConformityServer(accounts=10, latency=0.3).start()
+        self.cc = CloudConformity(api_key="test", api_endpoint=self.mock.url)
+
+    def tearDown(self):
+        self.cc.close()
+        self.mock.stop()
+
+    def test_request_cut_short_raises_deadline_exceeded(self):
+        with self.assertRaises(DeadlineExceeded):
+            with self.cc.deadline(0.1):
+                self.cc.list_profiles()
+
+    def test_bulk_items_cut_short_fail_with_deadline_exceeded(self):
+        result = self.cc.bulk_update_account_bot_settings(["account-0", "account-1"], scan_interval_hour=6, max_workers=2, deadline=0.1)
+
+        self.assertEqual(sorted(result["errors"]), ["account-0", "account-1"])
+        for error in result["errors"].values():
+            self.assertIsInstance(error, DeadlineExceeded)
+
+    def test_bulk_items_not_started_are_skipped(self):
+        account_ids = ["account-{}".format(i) for i in range(6)]
+
+        result = self.cc.bulk_update_account_bot_settings(account_ids, scan_interval_hour=6, max_workers=1, deadline=0.45)
+
+        self.assertEqual(result["data"].keys() | result["errors"].keys() | set(result["skipped"]), set(account_ids))
+        self.assertGreaterEqual(len(result["skipped"]), 3)
+        self.assertEqual(result["meta"]["skipped"], len(result["skipped"]))
+        self.assertLessEqual(self.mock.requests, len(account_ids) - len(result["skipped"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from unittest import mock
+
+from cloud_conformity.disk_cache import DiskCache
+
+
+@unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions")
+class DiskCachePermissionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def mode(self, path):
+        return(stat.S_IMODE(os.stat(path).st_mode))
+
+    def test_private_directory_and_database(self):
+        cache = DiskCache(directory=os.path.join(self.root, "cache"))
+        cache.set("namespace", "url", {"data": []})
+
+        self.assertEqual(self.mode(cache.directory), 0o700)
+        self.assertEqual(self.mode(cache.path), 0o600)
+        self.assertEqual(cache.get("namespace", "url"), {"data": []})
+
+    def test_open_directory_is_made_private(self):
+        directory = os.path.join(self.root, "cache")
+        os.makedirs(directory, mode=0o755)
+        os.chmod(directory, 0o755)
+
+        DiskCache(directory=directory)
+
+        self.assertEqual(self.mode(directory), 0o700)
+
+    def test_symbolic_link_is_refused(self):
+        os.makedirs(os.path.join(self.root, "cache"))
+        os.symlink(os.path.join(self.root, "cache"), os.path.join(self.root, "link"))
+
+        with self.assertRaises(PermissionError):
+            DiskCache(directory=os.path.join(self.root, "link"))
+
+    @unittest.skipUnless(hasattr(os, "getuid") and os.getuid() == 0, "needs root to chown")
+    def test_directory_of_another_user_is_refused(self):
+        directory = os.path.join(self.root, "cache")
+        os.makedirs(directory)
+        os.chown(directory, 12345, 12345)
+
+        with self.assertRaises(PermissionError):
+            DiskCache(directory=directory)
+
+    def test_fallback_to_temporary_directory(self):
+        read_only = os.path.join(self.root, "file")
+        open(read_only, "w").close()
+        temporary = os.path.join(self.root, "tmp")
+        os.makedirs(temporary)
+
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": read_only}), mock.patch("tempfile.tempdir", temporary):
+            cache = DiskCache()
+
+        self.assertEqual(cache.directory, os.path.join(temporary, "cloud-conformity-{}".format(os.getuid())))
+        self.assertEqual(self.mode(cache.directory), 0o700)
+
+    @unittest.skipUnless(hasattr(os, "getuid") and os.getuid() == 0, "needs root to chown")
+    def test_fallback_directory_of_another_user_is_refused(self):
+        read_only = os.path.join(self.root, "file")
+        open(read_only, "w").close()
+        directory = os.path.join(self.root, "cloud-conformity-{}".format(os.getuid()))
+        os.makedirs(directory)
+        os.chown(directory, 12345, 12345)
+
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": read_only}), mock.patch("tempfile.tempdir", self.root):
+            with self.assertRaises(PermissionError):
+                DiskCache()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+from cloud_conformity import CloudConformity  # noqa: E402
+from cloud_conformity.http_cache import HTTPCache  # noqa: E402
+
+
+class HTTPCacheTest(unittest.TestCase):
+
+    def test_lookup_returns_validators_with_their_body(self):
+        cache = HTTPCache()
+        cache.store("url", {"ETag": '"1"', "Last-Modified": "Mon"}, b'{"data":[]}')
+
+        self.assertEqual(cache.lookup("url"), ({"If-None-Match": '"1"', "If-Modified-Since": "Mon"}, b'{"data":[]}'))
+        self.assertEqual(cache.lookup("other"), ({}, None))
+
+    def test_responses_without_validators_are_not_stored(self):
+        cache = HTTPCache()
+        cache.store("url", {}, b"{}")
+
+        self.assertIsNone(cache.get("url"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = HTTPCache(max_entries=2)
+        cache.store("a", {"ETag": "a"}, b"a")
+        cache.store("b", {"ETag": "b"}, b"b")
+        cache.lookup("a")
+        cache.store("c", {"ETag": "c"}, b"c")
+
+        self.assertEqual(cache.validators("b"), {})
+        self.assertEqual(cache.get("a"), b"a")
+
+
+class ConditionalRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockCloudConformityServer(accounts=5).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_not_modified_returns_the_cached_body(self):
+        with CloudConformity(api_key="test", api_endpoint=self.mock.url, http_cache=True, single_flight=False) as cc:
+            first = cc.list_accounts()
+            first["data"].clear()
+            requests = self.mock.requests
+
+            self.assertEqual(len(cc.list_accounts()["data"]), 5)
+            self.assertEqual(self.mock.requests, requests + 1)
+
+    def test_not_modified_after_eviction_uses_the_body_looked_up(self):
+        with CloudConformity(api_key="test", api_endpoint=self.mock.url, http_cache=True, single_flight=False) as cc:
+            cc.list_accounts()
+            lookup = cc.http_cache.lookup
+
+            def lookup_then_evict(url):
+                entry = lookup(url)
+                cc.http_cache.clear()
+                return(entry)
+
+            cc.http_cache.lookup = lookup_then_evict
+
+            self.assertEqual(len(cc.list_accounts()["data"]), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
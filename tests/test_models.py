@@ -0,0 +1,120 @@
+import unittest
+
+from cloud_conformity.codec import JSONCodec
+from cloud_conformity.models import Account, CommunicationSetting, Profile, ReportConfig, TypedCloudConformity, wrap
+
+ACCOUNT = {
+    "type": "accounts",
+    "id": "account-1",
+    "attributes": {
+        "name": "alias-1",
+        "environment": "production",
+        "tags": ["production", "abc"],
+        "access": {"keys": {"roleArn": "arn:aws:iam::123456789000:role/CloudConformity"}},
+        "settings": {"bot": {"disabled": False, "delay": 6}},
+        "costPackage": True
+    }
+}
+
+
+class CountingCodec(JSONCodec):
+
+    def __init__(self):
+        super().__init__()
+        self.dumped = 0
+        self.loaded = 0
+
+    def dumps(self, value):
+        self.dumped += 1
+        return(super().dumps(value))
+
+    def loads(self, data):
+        self.loaded += 1
+        return(super().loads(data))
+
+
+class ModelsTest(unittest.TestCase):
+
+    def test_account_fields(self):
+        account = Account(ACCOUNT)
+
+        self.assertEqual((account.id, account.type, account.name, account.environment), ("account-1", "accounts", "alias-1", "production"))
+        self.assertEqual(account.tags, ["production", "abc"])
+        self.assertEqual(account.aws_account_id, "123456789000")
+        self.assertEqual(account.bot_settings, {"disabled": False, "delay": 6})
+        self.assertTrue(account.cost_package)
+
+    def test_raw_is_decoded_on_demand(self):
+        account = Account(ACCOUNT)
+
+        self.assertFalse(hasattr(account, "__dict__"))
+        self.assertEqual(account.raw, ACCOUNT)
+        account.raw["attributes"]["name"] = "changed"
+        self.assertEqual(account.attributes["name"], "alias-1")
+
+    def test_attributes_are_decoded_once(self):
+        codec = CountingCodec()
+        setting = CommunicationSetting({
+            "type": "settings",
+            "id": "setting-1",
+            "attributes": {"channel": "email", "enabled": True},
+            "relationships": {"account": {"data": {"type": "accounts", "id": "account-1"}}}
+        }, codec=codec)
+
+        for _ in range(10):
+            self.assertEqual(setting.attributes["channel"], "email")
+            self.assertEqual(setting.related_id("account"), "account-1")
+
+        self.assertIs(setting.attributes, setting.attributes)
+        self.assertEqual(codec.loaded, 1)
+
+    def test_records_use_the_codec_of_the_client(self):
+        codec = CountingCodec()
+
+        class Client:
+            def __init__(self):
+                self.codec = codec
+
+            def list_accounts(self):
+                return({"data": [ACCOUNT, ACCOUNT]})
+
+        accounts = TypedCloudConformity(Client()).list_accounts()
+
+        self.assertEqual([account.codec for account in accounts], [codec, codec])
+        self.assertEqual(codec.dumped, 2)
+        self.assertEqual(accounts[0].raw, ACCOUNT)
+        self.assertEqual(codec.loaded, 1)
+
+    def test_communication_setting(self):
+        setting = CommunicationSetting({
+            "type": "settings",
+            "id": "setting-1",
+            "attributes": {"channel": "email", "enabled": True},
+            "relationships": {"account": {"data": None}}
+        })
+
+        self.assertEqual(setting.channel, "email")
+        self.assertTrue(setting.is_organisation_level)
+
+    def test_profile_rule_settings(self):
+        profile = wrap({
+            "data": {"type": "profiles", "id": "profile-1", "attributes": {"name": "Profile 1"}},
+            "included": [{"type": "rules", "id": "EC2-001"}, {"type": "other", "id": "x"}]
+        }, Profile)
+
+        self.assertEqual(profile.name, "Profile 1")
+        self.assertEqual(profile.rule_settings, [{"type": "rules", "id": "EC2-001"}])
+        self.assertEqual(wrap({"data": [{"type": "profiles", "id": "profile-2"}]}, Profile)[0].rule_settings, [])
+
+    def test_report_config(self):
+        config = ReportConfig({
+            "type": "report-config",
+            "id": "report-config-1",
+            "attributes": {"accountId": "account-1", "configuration": {"title": "t", "emails": ["a@example.com"], "frequency": "* * MON"}}
+        })
+
+        self.assertEqual((config.account_id, config.title, config.emails, config.frequency), ("account-1", "t", ["a@example.com"], "* * MON"))
+
+
+if __name__ == "__main__":
+    unittest.main()
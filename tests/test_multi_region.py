@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+from cloud_conformity import MultiRegionCloudConformity  # noqa: E402
+
+
+class MultiRegionCloudConformityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.eu = MockCloudConformityServer(accounts=2).start()
+        self.us = MockCloudConformityServer(accounts=0).start()
+        self.us.add_account("us-account", "us-alias", "production", "200000000000")
+        self.us.add_setting("us-setting", "email", "us-account")
+        self.cc = MultiRegionCloudConformity(api_key="test", api_endpoints={"eu-west-1": self.eu.url, "us-west-2": self.us.url})
+
+    def tearDown(self):
+        self.cc.close()
+        self.eu.stop()
+        self.us.stop()
+
+    def test_communication_settings_of_an_account_have_the_shape_of_every_read(self):
+        result = self.cc.list_communication_settings(account_id="us-account")
+
+        self.assertEqual(set(result), {"data", "errors"})
+        self.assertEqual(result["errors"], {})
+        self.assertIn("us-setting", [setting["id"] for setting in result["data"]])
+
+    def test_error_of_the_owning_region_is_returned(self):
+        error = ConnectionError("region down")
+
+        def fail(**kwargs):
+            raise error
+
+        self.cc.client("us-west-2").list_communication_settings = fail
+
+        result = self.cc.list_communication_settings(account_id="us-account")
+
+        self.assertEqual(result["data"], [])
+        self.assertEqual(result["errors"], {"us-west-2": error})
+
+    def test_reads_merge_every_region(self):
+        result = self.cc.list_accounts()
+
+        self.assertEqual(len(result["data"]), 3)
+        self.assertEqual(result["errors"], {})
+        self.assertEqual(self.cc.region_of("us-account"), "us-west-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
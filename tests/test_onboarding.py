@@ -0,0 +1,153 @@
+import contextlib
+import threading
+import unittest
+
+from cloud_conformity.onboarding import onboard_accounts, steps_of
+
+
+class FakeAccountIndex:
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+
+    def by_aws_account_id(self, aws_account_id):
+        return(self.accounts.get(aws_account_id))
+
+
+class FakeClient:
+    """
+    Stand-in for CloudConformity recording the calls onboard_accounts makes.
+    """
+
+    def __init__(self, existing=None):
+        self.account_index = FakeAccountIndex(existing or {})
+        self.calls = []
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def record(self, method, **kwargs):
+        with self.lock:
+            self.calls.append((method, kwargs))
+        if (method, kwargs.get("account_id")) in self.failing:
+            raise RuntimeError("{} failed".format(method))
+
+    def methods(self, method):
+        return([kwargs for name, kwargs in self.calls if name == method])
+
+    def current_deadline(self):
+        return(None)
+
+    @contextlib.contextmanager
+    def deadline(self, budget):
+        yield budget
+
+    def get_organisation_external_id(self):
+        self.record("get_organisation_external_id")
+        return({"data": {"id": "external-id"}})
+
+    def create_account(self, aws_account_id, **kwargs):
+        self.record("create_account", aws_account_id=aws_account_id, **kwargs)
+        return({"data": {"id": "id-{}".format(aws_account_id)}})
+
+    def create_report_configuration(self, account_id, **kwargs):
+        self.record("create_report_configuration", account_id=account_id, **kwargs)
+        return({"data": {}})
+
+    def update_account_bot_settings(self, account_id, **kwargs):
+        self.record("update_account_bot_settings", account_id=account_id, **kwargs)
+        return({"data": {}})
+
+    def apply_profile_to_accounts(self, profile_id, account_ids, mode):
+        self.record("apply_profile_to_accounts", profile_id=profile_id, account_ids=account_ids, mode=mode)
+        return({"meta": {}})
+
+
+def spec(i, **kwargs):
+    return(dict({
+        "aws_account_id": "{:012d}".format(i),
+        "aws_account_name": "alias-{}".format(i),
+        "aws_tag_environment": "production"
+    }, **kwargs))
+
+
+class OnboardAccountsTest(unittest.TestCase):
+
+    def test_steps_of(self):
+        self.assertEqual(steps_of(spec(1), None), ["create_account"])
+        self.assertEqual(
+            steps_of(spec(1, report_recipients=["a@example.com"], bot_settings={}), "profile"),
+            ["create_account", "create_report_configuration", "update_account_bot_settings", "apply_profile_to_accounts"]
+        )
+        self.assertEqual(steps_of(spec(1, profile_id=None), "profile"), ["create_account"])
+
+    def test_profiles_are_applied_in_batches(self):
+        client = FakeClient()
+
+        result = onboard_accounts(client, [spec(i) for i in range(5)], profile_id="profile", chunk_size=2, max_workers=3)
+
+        applies = client.methods("apply_profile_to_accounts")
+        self.assertEqual(sorted(len(call["account_ids"]) for call in applies), [1, 2, 2])
+        self.assertEqual(
+            sorted(account_id for call in applies for account_id in call["account_ids"]),
+            ["id-{:012d}".format(i) for i in range(5)]
+        )
+        self.assertEqual(len(client.methods("get_organisation_external_id")), 1)
+        self.assertEqual(result["meta"]["succeeded"], 5)
+
+    def test_batches_are_per_profile(self):
+        client = FakeClient()
+
+        onboard_accounts(client, [spec(1), spec(2, profile_id="other"), spec(3)], profile_id="profile", profile_mode="overwrite")
+
+        applies = sorted((call["profile_id"], sorted(call["account_ids"]), call["mode"]) for call in client.methods("apply_profile_to_accounts"))
+        self.assertEqual(applies, [
+            ("other", ["id-000000000002"], "overwrite"),
+            ("profile", ["id-000000000001", "id-000000000003"], "overwrite")
+        ])
+
+    def test_resume_only_runs_the_missing_steps(self):
+        client = FakeClient()
+        client.failing.add(("update_account_bot_settings", "id-000000000001"))
+        specs = [spec(i, report_recipients=["a@example.com"], bot_settings={"scan_interval_hour": 6}) for i in range(3)]
+
+        first = onboard_accounts(client, specs, profile_id="profile")
+
+        self.assertEqual(list(first["errors"]), ["alias-1"])
+        self.assertEqual(sorted(first["data"]), ["alias-0", "alias-2"])
+        self.assertEqual(
+            sorted(first["progress"]["alias-1"]["completed"]),
+            ["apply_profile_to_accounts", "create_account", "create_report_configuration"]
+        )
+
+        client.failing.clear()
+        client.calls = []
+        second = onboard_accounts(client, specs, profile_id="profile", progress=first["progress"])
+
+        self.assertEqual(client.calls, [("update_account_bot_settings", {"account_id": "id-000000000001", "scan_interval_hour": 6})])
+        self.assertEqual(second["errors"], {})
+        self.assertEqual(second["meta"]["succeeded"], 3)
+        self.assertEqual(second["data"]["alias-1"]["responses"], {"update_account_bot_settings": {"data": {}}})
+
+    def test_existing_accounts_are_not_created_again(self):
+        client = FakeClient(existing={"000000000001": {"id": "existing", "attributes": {"name": "alias-1"}}})
+
+        result = onboard_accounts(client, [spec(1)], profile_id="profile")
+
+        self.assertEqual(client.methods("create_account"), [])
+        self.assertEqual(client.methods("apply_profile_to_accounts")[0]["account_ids"], ["existing"])
+        self.assertEqual(result["data"]["alias-1"]["account_id"], "existing")
+
+    def test_failed_creation_skips_the_other_steps(self):
+        client = FakeClient()
+        client.failing.add(("create_account", None))
+
+        result = onboard_accounts(client, [spec(1, bot_settings={})], profile_id="profile")
+
+        self.assertEqual(list(result["errors"]), ["alias-1"])
+        self.assertEqual(client.methods("apply_profile_to_accounts"), [])
+        self.assertEqual(client.methods("update_account_bot_settings"), [])
+        self.assertEqual(result["progress"]["alias-1"]["completed"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
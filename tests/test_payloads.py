@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from cloud_conformity import payloads
+from cloud_conformity.codec import JSONCodec, OrjsonCodec
+
+
+class UpdateAccountPayloadTest(unittest.TestCase):
+
+    def test_tags(self):
+        self.assertEqual(payloads.update_account_payload("n", "production", "abc")["data"]["attributes"]["tags"], ["production", "abc"])
+
+    def test_no_null_tag_without_domain(self):
+        self.assertEqual(payloads.update_account_payload("n", "production", None)["data"]["attributes"]["tags"], ["production"])
+
+
+class PayloadTemplateTest(unittest.TestCase):
+
+    def codecs(self):
+        codecs = [None, JSONCodec()]
+        try:
+            codecs.append(OrjsonCodec())
+        except ImportError:
+            pass
+        return(codecs)
+
+    def test_report_configuration(self):
+        values = {"account_id": "id\"1", "aws_account_name": "naïve", "recipient_email_addresses": ["a@example.com"]}
+        for codec in self.codecs():
+            data = payloads.REPORT_CONFIGURATION_TEMPLATE.render(codec, **values)
+            self.assertEqual(json.loads(data), payloads.report_configuration_payload(**values))
+
+    def test_bot_settings(self):
+        bot = payloads.bot_settings(is_disabled=True, disabled_until=1234, scan_interval_hour=None, disabled_regions=["eu-west-1"])
+        for codec in self.codecs():
+            data = payloads.BOT_SETTINGS_TEMPLATE.render(codec, bot=bot)
+            self.assertEqual(json.loads(data), {"data": {"type": "accounts", "attributes": {"settings": {"bot": bot}}}})
+
+    def test_encoded_with_codec(self):
+        class Codec(JSONCodec):
+            def dumps(self, value):
+                return(super().dumps(value).encode("utf-8"))
+
+        self.assertIsInstance(payloads.BOT_SETTINGS_TEMPLATE.render(Codec(), bot={}), bytes)
+        self.assertIsInstance(payloads.BOT_SETTINGS_TEMPLATE.render(JSONCodec(), bot={}), str)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from cloud_conformity.reconcile import plan_reconciliation, product_domain
+
+
+def account(account_id, name, environment, tags, bot=None):
+    return({
+        "type": "accounts",
+        "id": account_id,
+        "attributes": {
+            "name": name,
+            "environment": environment,
+            "tags": tags,
+            "settings": {"bot": bot} if bot is not None else {}
+        }
+    })
+
+
+def setting(setting_id, account_id, channel):
+    return({
+        "type": "settings",
+        "id": setting_id,
+        "attributes": {"channel": channel},
+        "relationships": {"account": {"data": {"type": "accounts", "id": account_id}}}
+    })
+
+
+def methods(plan):
+    return([(call["account_name"], call["method"]) for call in plan])
+
+
+class ProductDomainTest(unittest.TestCase):
+
+    def test_tag_other_than_environment(self):
+        self.assertEqual(product_domain(account("a", "n", "production", ["production", "abc"])), "abc")
+
+    def test_no_domain_tag(self):
+        self.assertIsNone(product_domain(account("a", "n", "production", ["production"])))
+        self.assertIsNone(product_domain(account("a", "n", "production", None)))
+
+
+class PlanReconciliationTest(unittest.TestCase):
+
+    def test_converged_state_plans_nothing(self):
+        accounts = [account("a1", "alias-1", "production", ["production", "abc"], bot={"disabled": False, "delay": 6, "disabledRegions": {"ap-south-1": True}})]
+        desired = {"accounts": {"alias-1": {
+            "environment": "production",
+            "product_domain": "abc",
+            "bot_settings": {"scan_interval_hour": 6, "disabled_regions": ["ap-south-1"]},
+            "communication_channels": ["email"]
+        }}}
+
+        self.assertEqual(plan_reconciliation(desired, accounts, [setting("s1", "a1", "email")]), [])
+
+    def test_environment_only_without_domain_is_idempotent(self):
+        accounts = [account("a1", "alias-1", "production", ["production"])]
+
+        self.assertEqual(plan_reconciliation({"accounts": {"alias-1": {"environment": "production"}}}, accounts, []), [])
+
+    def test_environment_change_without_domain_has_no_null_tag(self):
+        accounts = [account("a1", "alias-1", "production", ["production"])]
+
+        plan = plan_reconciliation({"accounts": {"alias-1": {"environment": "staging"}}}, accounts, [])
+
+        self.assertEqual(methods(plan), [("alias-1", "update_account")])
+        self.assertEqual(plan[0]["kwargs"], {"aws_account_name": "alias-1", "aws_tag_environment": "staging", "aws_tag_product_domain": None})
+
+    def test_domain_change_keeps_environment(self):
+        accounts = [account("a1", "alias-1", "production", ["production", "abc"])]
+
+        plan = plan_reconciliation({"accounts": {"alias-1": {"product_domain": "xyz"}}}, accounts, [])
+
+        self.assertEqual(plan[0]["kwargs"]["aws_tag_environment"], "production")
+        self.assertEqual(plan[0]["kwargs"]["aws_tag_product_domain"], "xyz")
+
+    def test_missing_account_is_created_then_updated(self):
+        plan = plan_reconciliation({"accounts": {"alias-2": {
+            "aws_account_id": "123456789000",
+            "environment": "production",
+            "product_domain": "abc",
+            "bot_settings": {"is_disabled": True}
+        }}}, [], [])
+
+        self.assertEqual(methods(plan), [
+            ("alias-2", "create_account"),
+            ("alias-2", "update_account"),
+            ("alias-2", "update_account_bot_settings")
+        ])
+        self.assertIsNone(plan[0]["account_id"])
+
+    def test_missing_account_without_aws_account_id(self):
+        with self.assertRaises(ValueError):
+            plan_reconciliation({"accounts": {"alias-2": {"environment": "production"}}}, [], [])
+
+    def test_bot_settings_differ(self):
+        accounts = [account("a1", "alias-1", "production", ["production"], bot={"disabled": False, "delay": 6, "disabledRegions": {"ap-south-1": True}})]
+
+        plan = plan_reconciliation({"accounts": {"alias-1": {"bot_settings": {"scan_interval_hour": 6, "disabled_regions": ["us-east-1"]}}}}, accounts, [])
+
+        self.assertEqual(methods(plan), [("alias-1", "update_account_bot_settings")])
+
+    def test_other_channels_are_deleted(self):
+        accounts = [account("a1", "alias-1", "production", ["production"])]
+        settings = [setting("s1", "a1", "email"), setting("s2", "a1", "slack"), setting("s3", "a2", "slack")]
+
+        plan = plan_reconciliation({"accounts": {"alias-1": {"communication_channels": ["email"]}}}, accounts, settings)
+
+        self.assertEqual([call["kwargs"] for call in plan], [{"setting_id": "s2"}])
+
+    def test_prune_accounts(self):
+        accounts = [account("a1", "alias-1", "production", ["production"]), account("a2", "alias-2", "production", ["production"])]
+        desired = {"accounts": {"alias-1": {}}}
+
+        self.assertEqual(plan_reconciliation(desired, accounts, []), [])
+        self.assertEqual(methods(plan_reconciliation(desired, accounts, [], prune_accounts=True)), [("alias-2", "delete_account")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import unittest
+
+from email.utils import formatdate
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+from cloud_conformity import CloudConformity  # noqa: E402
+from cloud_conformity.retry import RateLimiter, RetryPolicy, parse_retry_after  # noqa: E402
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_exponential_backoff_without_jitter(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+
+        self.assertEqual([policy.backoff(attempt) for attempt in range(1, 6)], [0.5, 1.0, 2.0, 3, 3])
+
+    def test_jitter_stays_below_the_exponential_delay(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=30)
+
+        for _ in range(100):
+            self.assertTrue(0 <= policy.backoff(3) <= 2.0)
+
+    def test_retry_after_is_honoured_and_capped(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=30)
+
+        self.assertEqual(policy.backoff(1, "7"), 7.0)
+        self.assertEqual(policy.backoff(1, "120"), 30)
+        self.assertEqual(policy.backoff(1, "-5"), 0.0)
+
+    def test_invalid_retry_after_falls_back_to_backoff(self):
+        policy = RetryPolicy(backoff_factor=0.5, jitter=False)
+
+        self.assertEqual(policy.backoff(2, "soon"), 1.0)
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after(""))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("2.5"), 2.5)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+
+    def test_server_errors_are_only_retried_for_idempotent_methods(self):
+        policy = RetryPolicy()
+
+        for method in ("GET", "patch", "DELETE"):
+            self.assertTrue(policy.should_retry_status(method, 503, 0))
+            self.assertTrue(policy.should_retry_error(method, 0))
+
+        self.assertFalse(policy.should_retry_status("POST", 503, 0))
+        self.assertFalse(policy.should_retry_error("POST", 0))
+
+    def test_throttled_requests_are_retried_for_every_method(self):
+        self.assertTrue(RetryPolicy().should_retry_status("POST", 429, 0))
+
+    def test_other_statuses_and_exhausted_retries_are_not_retried(self):
+        policy = RetryPolicy(max_retries=2)
+
+        self.assertFalse(policy.should_retry_status("GET", 404, 0))
+        self.assertFalse(policy.should_retry_status("GET", 503, 2))
+        self.assertFalse(policy.should_retry_error("GET", 2))
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("cloud_conformity.retry.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_throttle_halves_the_rate(self):
+        limiter = RateLimiter(rate=8, min_rate=1)
+
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 4)
+
+        self.now += 2
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 2)
+
+    def test_rate_is_not_decreased_below_min_rate(self):
+        limiter = RateLimiter(rate=1, min_rate=0.75, cooldown=0)
+
+        limiter.on_throttle()
+        limiter.on_throttle()
+
+        self.assertEqual(limiter.rate, 0.75)
+
+    def test_throttles_within_the_cooldown_decrease_the_rate_once(self):
+        limiter = RateLimiter(rate=8, cooldown=1)
+
+        for _ in range(5):
+            limiter.on_throttle()
+            self.now += 0.1
+
+        self.assertEqual(limiter.rate, 4)
+
+        self.now += 1
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 2)
+
+    def test_success_increases_the_rate_additively(self):
+        limiter = RateLimiter(rate=4, max_rate=5, increase=1)
+
+        for _ in range(4):
+            limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 5, delta=0.1)
+        self.assertLess(limiter.rate, 5)
+
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 5)
+
+    def test_reserve_borrows_tokens_at_the_current_rate(self):
+        limiter = RateLimiter(rate=2, burst=2)
+
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.reserve(), 0.5)
+        self.assertIsNone(limiter.reserve(timeout=0.5))
+
+        self.now += 1.5
+        self.assertEqual(limiter.reserve(), 0.0)
+
+
+class ThrottledRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockCloudConformityServer(accounts=5, max_requests_per_second=3).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_throttled_requests_are_retried(self):
+        policy = RetryPolicy(max_retries=5, max_backoff=1.5)
+
+        with CloudConformity(api_key="test", api_endpoint=self.mock.url, retry_policy=policy, single_flight=False) as cc:
+            results = [cc.get_organisation_external_id() for _ in range(5)]
+
+        self.assertEqual(len(results), 5)
+        self.assertGreater(self.mock.throttled, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
+
+from mock_server import MockCloudConformityServer  # noqa: E402
+
+from cloud_conformity import CloudConformity  # noqa: E402
+from cloud_conformity.single_flight import SingleFlight  # noqa: E402
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_concurrent_calls_are_coalesced(self):
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def function():
+            calls.append(1)
+            time.sleep(0.1)
+            return(b'{"data":[1,2,3]}')
+
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do("key", function))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b'{"data":[1,2,3]}'] * 5)
+        self.assertEqual(single_flight.in_flight(), 0)
+
+    def test_error_is_raised_to_every_caller(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def function():
+            started.set()
+            time.sleep(0.1)
+            raise KeyError("boom")
+
+        def follow():
+            started.wait()
+            try:
+                single_flight.do("key", function)
+            except KeyError as e:
+                errors.append(e)
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+
+        with self.assertRaises(KeyError):
+            single_flight.do("key", function)
+        follower.join()
+
+        self.assertEqual(len(errors), 1)
+
+
+class CoalescedRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockCloudConformityServer(accounts=50, latency=0.1).start()
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_callers_get_their_own_result(self):
+        results = []
+
+        with CloudConformity(api_key="test", api_endpoint=self.mock.url) as cc:
+            def call():
+                result = cc.list_accounts()
+                results.append(len(result["data"]))
+                result["data"].clear()
+
+            threads = [threading.Thread(target=call) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, [50] * 5)
+        self.assertEqual(self.mock.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
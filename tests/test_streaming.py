@@ -0,0 +1,57 @@
+import json
+import time
+import unittest
+
+from cloud_conformity.streaming import iter_records
+
+
+def chunks(body, size):
+    return(body[i:i + size] for i in range(0, len(body), size))
+
+
+class IterRecordsTest(unittest.TestCase):
+
+    DOCUMENT = {
+        "data": [{"a": "q\"\\ é", "b": [1, {"c": "]}"}]}, "x\\", 12345, -1.5e3, True, None, []],
+        "meta": {"total": 7},
+        "included": [],
+        "links": "s\""
+    }
+
+    def expected(self):
+        return([("data", record) for record in self.DOCUMENT["data"]] + [("meta", {"total": 7}), ("links", "s\"")])
+
+    def test_every_chunk_size(self):
+        body = json.dumps(self.DOCUMENT, ensure_ascii=False).encode("utf-8")
+
+        for size in range(1, len(body) + 1):
+            self.assertEqual(list(iter_records(chunks(body, size))), self.expected(), size)
+
+    def test_single_record(self):
+        self.assertEqual(list(iter_records([b'{"data": {"id": 1}}'])), [("data", {"id": 1})])
+        self.assertEqual(list(iter_records([b"{}"])), [])
+
+    def test_truncated_body(self):
+        for body in (b'{"data":[{"a":1}', b'{"data":[{"a":"x', b'{"data":[1'):
+            with self.assertRaises(ValueError):
+                list(iter_records(chunks(body, 3)))
+
+    def test_invalid_record(self):
+        with self.assertRaises(ValueError):
+            list(iter_records(chunks(b'{"data":[{"a":1,]}, {"b":2}]}', 4)))
+
+    def test_large_record_is_linear(self):
+        record = {"rules": [{"id": "R-{}".format(i), "s": "x" * 20} for i in range(100000)]}
+        body = json.dumps({"data": [record]}).encode("utf-8")
+
+        start = time.perf_counter()
+        self.assertEqual(list(iter_records(chunks(body, 65536))), [("data", record)])
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        json.loads(body)
+        self.assertLess(elapsed, 20 * (time.perf_counter() - start) + 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
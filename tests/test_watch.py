@@ -0,0 +1,104 @@
+import unittest
+
+from cloud_conformity.watch import Watcher, diff_snapshot, value_hash
+
+
+def account(account_id, name="alias", environment="production", **members):
+    return(dict({"type": "accounts", "id": account_id, "attributes": {"name": name, "environment": environment}}, **members))
+
+
+class DiffSnapshotTest(unittest.TestCase):
+
+    def test_first_poll_adds_every_record(self):
+        events, snapshot = diff_snapshot("accounts", {}, [account("a"), account("b")])
+
+        self.assertEqual([(event["type"], event["id"]) for event in events], [("added", "a"), ("added", "b")])
+        self.assertEqual(sorted(snapshot), ["a", "b"])
+
+    def test_unchanged_records_emit_nothing(self):
+        _, snapshot = diff_snapshot("accounts", {}, [account("a")])
+
+        events, next_snapshot = diff_snapshot("accounts", snapshot, [account("a")])
+
+        self.assertEqual(events, [])
+        self.assertIs(next_snapshot["a"], snapshot["a"])
+
+    def test_changed_attributes_are_named(self):
+        _, snapshot = diff_snapshot("accounts", {}, [account("a")])
+
+        events, _ = diff_snapshot("accounts", snapshot, [account("a", name="renamed", environment="staging")])
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["type"], "changed")
+        self.assertEqual(events[0]["fields"], ["attributes.environment", "attributes.name"])
+        self.assertEqual(events[0]["previous"]["attributes"]["name"], "alias")
+        self.assertEqual(events[0]["record"]["attributes"]["name"], "renamed")
+
+    def test_added_and_removed_fields_are_named(self):
+        before = account("a")
+        before["attributes"]["tags"] = ["production"]
+        _, snapshot = diff_snapshot("accounts", {}, [before])
+
+        events, _ = diff_snapshot("accounts", snapshot, [account("a", relationships={"organisation": {"id": "o"}})])
+
+        self.assertEqual(events[0]["fields"], ["attributes.tags", "relationships"])
+
+    def test_nested_changes_name_the_attribute(self):
+        before = account("a")
+        before["attributes"]["settings"] = {"bot": {"delay": 6}, "rules": []}
+        after = account("a")
+        after["attributes"]["settings"] = {"rules": [], "bot": {"delay": 12}}
+        _, snapshot = diff_snapshot("accounts", {}, [before])
+
+        events, _ = diff_snapshot("accounts", snapshot, [after])
+
+        self.assertEqual(events[0]["fields"], ["attributes.settings"])
+
+    def test_key_order_is_not_a_change(self):
+        record = account("a")
+        reordered = {"attributes": {"environment": "production", "name": "alias"}, "id": "a", "type": "accounts"}
+        _, snapshot = diff_snapshot("accounts", {}, [record])
+
+        self.assertEqual(value_hash(record), value_hash(reordered))
+        self.assertEqual(diff_snapshot("accounts", snapshot, [reordered])[0], [])
+
+    def test_fields_of_the_previous_change_are_reused(self):
+        _, snapshot = diff_snapshot("accounts", {}, [account("a")])
+        _, snapshot = diff_snapshot("accounts", snapshot, [account("a", name="second")])
+
+        self.assertIsNotNone(snapshot["a"]["fields"])
+
+        events, _ = diff_snapshot("accounts", snapshot, [account("a", name="second", environment="staging")])
+
+        self.assertEqual(events[0]["fields"], ["attributes.environment"])
+
+    def test_missing_records_are_removed(self):
+        _, snapshot = diff_snapshot("accounts", {}, [account("a"), account("b")])
+
+        events, next_snapshot = diff_snapshot("accounts", snapshot, [account("a")])
+
+        self.assertEqual([(event["type"], event["id"]) for event in events], [("removed", "b")])
+        self.assertEqual(events[0]["previous"]["id"], "b")
+        self.assertEqual(list(next_snapshot), ["a"])
+
+
+class WatcherTest(unittest.TestCase):
+
+    def test_first_poll_is_the_baseline_and_interval_adapts(self):
+        polls = [[account("a")], None, [account("a", name="renamed")]]
+        watcher = Watcher(fetch=lambda resource: polls.pop(0), resources=("accounts",), min_interval=1, max_interval=10, backoff=2, speedup=0.5)
+
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(watcher.interval, 1)
+
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(watcher.interval, 2)
+
+        events = watcher.poll()
+        self.assertEqual([(event["type"], event["fields"]) for event in events], [("changed", ["attributes.name"])])
+        self.assertEqual(watcher.interval, 1)
+        self.assertEqual(watcher.snapshot("accounts"), [account("a", name="renamed")])
+
+
+if __name__ == "__main__":
+    unittest.main()
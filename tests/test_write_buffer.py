@@ -0,0 +1,136 @@
+import time
+import unittest
+
+from cloud_conformity.write_buffer import WriteBuffer
+
+
+def flush_result(data, errors, skipped):
+    return({
+        "data": data,
+        "errors": errors,
+        "skipped": skipped,
+        "meta": {"total": len(data) + len(errors) + len(skipped), "succeeded": len(data), "failed": len(errors), "skipped": len(skipped)}
+    })
+
+
+class WriteBufferTest(unittest.TestCase):
+
+    def recorder(self):
+        flushed = []
+
+        def flush(pending):
+            flushed.append(pending)
+            return(flush_result({account_id: [] for account_id in pending}, {}, []))
+
+        return(flush, flushed)
+
+    def test_later_bot_settings_override_earlier_ones(self):
+        flush, flushed = self.recorder()
+        buffer = WriteBuffer(flush=flush)
+
+        buffer.update_account_bot_settings("a", scan_interval_hour=6, disabled_regions=["eu-west-1"])
+        buffer.update_account_bot_settings("a", is_disabled=True, scan_interval_hour=12)
+        buffer.flush()
+
+        self.assertEqual(flushed, [{"a": {"attributes": None, "bot": {
+            "disabled": True,
+            "delay": 12,
+            "disabledRegions": {"eu-west-1": True}
+        }}}])
+
+    def test_attributes_and_bot_settings_are_kept_apart(self):
+        flush, flushed = self.recorder()
+        buffer = WriteBuffer(flush=flush)
+
+        buffer.update_account("a", "old", "staging", "abc")
+        buffer.update_account_bot_settings("a", scan_interval_hour=6)
+        buffer.update_account("a", "new", "production", None)
+        buffer.update_account_bot_settings("b", scan_interval_hour=3)
+        buffer.flush()
+
+        self.assertEqual(len(flushed), 1)
+        self.assertEqual(flushed[0]["a"]["attributes"], {"name": "new", "environment": "production", "tags": ["production"]})
+        self.assertEqual(flushed[0]["a"]["bot"]["delay"], 6)
+        self.assertEqual(flushed[0]["b"]["attributes"], None)
+
+    def test_flush_empties_the_buffer(self):
+        flush, flushed = self.recorder()
+        buffer = WriteBuffer(flush=flush)
+
+        buffer.update_account_bot_settings("a", scan_interval_hour=6)
+        buffer.flush()
+        result = buffer.flush()
+
+        self.assertEqual(len(flushed), 1)
+        self.assertEqual(result["meta"]["total"], 0)
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_flush_when_full(self):
+        flush, flushed = self.recorder()
+        buffer = WriteBuffer(flush=flush, max_pending=2)
+
+        buffer.update_account_bot_settings("a", scan_interval_hour=6)
+        buffer.update_account_bot_settings("a", scan_interval_hour=7)
+        self.assertEqual(flushed, [])
+
+        buffer.update_account_bot_settings("b", scan_interval_hour=6)
+        self.assertEqual(sorted(flushed[0]), ["a", "b"])
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_periodic_flush(self):
+        flush, flushed = self.recorder()
+        buffer = WriteBuffer(flush=flush, flush_interval=0.05)
+
+        buffer.update_account_bot_settings("a", scan_interval_hour=6)
+        time.sleep(0.2)
+        buffer.close()
+
+        self.assertEqual(list(flushed[0]), ["a"])
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_close_flushes(self):
+        flush, flushed = self.recorder()
+
+        with WriteBuffer(flush=flush) as buffer:
+            buffer.update_account_bot_settings("a", scan_interval_hour=6)
+
+        self.assertEqual(list(flushed[0]), ["a"])
+
+    def test_skipped_writes_stay_pending(self):
+        flushed = []
+
+        def flush(pending):
+            flushed.append(pending)
+            if len(flushed) == 1:
+                return(flush_result({"a": []}, {"b": TimeoutError()}, ["c", "d"]))
+            return(flush_result({account_id: [] for account_id in pending}, {}, []))
+
+        buffer = WriteBuffer(flush=flush)
+        for account_id in "abcd":
+            buffer.update_account_bot_settings(account_id, scan_interval_hour=6)
+
+        result = buffer.flush()
+
+        self.assertEqual(result["skipped"], ["c", "d"])
+        self.assertEqual(list(buffer.errors), ["b"])
+        self.assertEqual(buffer.pending(), 2)
+
+        buffer.update_account_bot_settings("c", scan_interval_hour=12)
+        buffer.flush()
+
+        self.assertEqual(sorted(flushed[1]), ["c", "d"])
+        self.assertEqual(flushed[1]["c"]["bot"]["delay"], 12)
+        self.assertEqual(flushed[1]["d"]["bot"]["delay"], 6)
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_size_triggered_flush_keeps_skipped_writes(self):
+        buffer = WriteBuffer(flush=lambda pending: flush_result({}, {}, list(pending)), max_pending=3)
+
+        for account_id in "abcdef":
+            buffer.update_account_bot_settings(account_id, is_disabled=True)
+
+        self.assertEqual(buffer.pending(), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()